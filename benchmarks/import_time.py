@@ -0,0 +1,115 @@
+"""
+Import-time benchmark for ``perustats`` with a regression budget.
+
+Each scenario runs in a fresh interpreter (so nothing is cached in
+``sys.modules``) several times; the median wall time is compared against its
+budget and the set of heavy third-party modules that ended up imported is
+checked against the scenario's allow-list.
+
+Usage
+-----
+    python benchmarks/import_time.py            # report + exit 1 on regression
+    python benchmarks/import_time.py --runs 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, field
+
+# Third-party packages that dominate start-up time.
+HEAVY_MODULES = (
+    "pandas",
+    "polars",
+    "pyarrow",
+    "requests",
+    "httpx",
+    "bs4",
+    "rich",
+    "tqdm",
+)
+
+
+@dataclass
+class Scenario:
+    name: str
+    code: str
+    budget_ms: float
+    allowed_heavy: tuple[str, ...] = field(default_factory=tuple)
+
+
+SCENARIOS = [
+    Scenario("import perustats", "import perustats", budget_ms=50),
+    Scenario(
+        "from perustats import BCRPSeries",
+        "from perustats import BCRPSeries",
+        budget_ms=50,
+    ),
+    Scenario(
+        "from perustats.inei import registry",
+        "from perustats.inei import registry",
+        budget_ms=50,
+    ),
+    Scenario(
+        "from perustats import BCRPDataSeries",
+        "from perustats import BCRPDataSeries",
+        budget_ms=600,
+        allowed_heavy=("pandas", "pyarrow"),  # pandas>=3 imports pyarrow
+    ),
+    Scenario(
+        "from perustats.inei import INEIFetcher",
+        "from perustats.inei import INEIFetcher",
+        budget_ms=800,
+        # polars and the lake/join/estimation modules load on first use
+        allowed_heavy=("pandas", "pyarrow", "rich"),
+    ),
+]
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+{code}
+elapsed = (time.perf_counter() - t0) * 1000
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"ms": elapsed, "heavy": heavy}}))
+"""
+
+
+def _run_once(scenario: Scenario) -> dict:
+    probe = _PROBE.format(code=scenario.code, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for scenario in SCENARIOS:
+        samples = [_run_once(scenario) for _ in range(args.runs)]
+        median = statistics.median(s["ms"] for s in samples)
+        heavy = sorted({m for s in samples for m in s["heavy"]})
+        leaked = [m for m in heavy if m not in scenario.allowed_heavy]
+
+        ok = median <= scenario.budget_ms and not leaked
+        failed |= not ok
+        status = "ok  " if ok else "FAIL"
+        print(
+            f"{status} {scenario.name:<40} {median:8.1f} ms "
+            f"(budget {scenario.budget_ms:.0f} ms)"
+            + (f"  unexpected imports: {', '.join(leaked)}" if leaked else "")
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
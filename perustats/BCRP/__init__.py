@@ -1,2 +1,24 @@
-from perustats.BCRP.fetcher import BCRPDataSeries
-from perustats.BCRP.models import BCRPSeries
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from perustats.BCRP.fetcher import BCRPDataSeries
+    from perustats.BCRP.models import BCRPSeries
+
+# BCRPSeries only needs the standard library; BCRPDataSeries pulls in pandas.
+_LAZY_EXPORTS = {
+    "BCRPDataSeries": "perustats.BCRP.fetcher",
+    "BCRPSeries": "perustats.BCRP.models",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = ["BCRPDataSeries", "BCRPSeries"]
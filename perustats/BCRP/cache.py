@@ -13,15 +13,24 @@ Estrategia de tablas
 
 * Tabla ``valid_codes_cache`` → acumula metadata de todos los códigos
   válidos que se han descargado (sin duplicados por ``code``).
+
+* Tabla ``vintages`` (opcional, ``track_vintages=True``) → historial de
+  revisiones en formato largo ``(freq, code, date, vintage, value)``.
+  Cada refresco guarda **solo las celdas que cambiaron** respecto a la
+  última vintage conocida, de modo que cualquier versión pasada se
+  reconstruye con una sola consulta sin guardar copias completas.
 """
 
 import logging
 import sqlite3
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 import pandas as pd
 
+from perustats.BCRP.models import DETAILS_TABLE, METADATA_TABLE
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -29,6 +38,18 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------------------------
 
 _VALID_CODES_TABLE = "Codigos Procesados"
+_VINTAGES_TABLE = "vintages"
+
+_CREATE_VINTAGES = f"""
+CREATE TABLE IF NOT EXISTS {_VINTAGES_TABLE} (
+    freq    TEXT    NOT NULL,
+    code    TEXT    NOT NULL,
+    date    TEXT    NOT NULL,
+    vintage INTEGER NOT NULL,
+    value   REAL,
+    PRIMARY KEY (freq, code, date, vintage)
+) WITHOUT ROWID
+"""
 
 
 def _table_name(freq: str, start_date: str, end_date: str) -> str:
@@ -38,6 +59,28 @@ def _table_name(freq: str, start_date: str, end_date: str) -> str:
     return f"series_{freq}_{start}_{end}"
 
 
+def _key_columns(df: pd.DataFrame) -> list[str]:
+    """Columnas identificadoras de fila (``date`` y ``yq`` en trimestrales)."""
+    return [c for c in ("date", "yq") if c in df.columns]
+
+
+def _vintage_ms(vintage: Union[None, int, str, pd.Timestamp]) -> int:
+    """
+    Normaliza *vintage* a milisegundos desde epoch (UTC).
+
+    ``None`` equivale a "ahora"; los enteros se asumen ya en milisegundos y
+    las fechas sin zona horaria se interpretan como UTC.
+    """
+    if vintage is None:
+        return int(time.time() * 1000)
+    if isinstance(vintage, int):
+        return vintage
+    ts = pd.Timestamp(vintage)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.timestamp() * 1000)
+
+
 # ---------------------------------------------------------------------------
 # BCRPCache
 # ---------------------------------------------------------------------------
@@ -51,23 +94,30 @@ class BCRPCache:
     ----------
     db_path:
         Ruta al archivo ``.db``. Se crea si no existe.
+    track_vintages:
+        Si es ``True``, cada :meth:`save` registra en la tabla ``vintages``
+        las celdas que cambiaron respecto a la última versión guardada.
     """
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, track_vintages: bool = False) -> None:
         self._path = Path(db_path)
         self._path.parent.mkdir(parents=True, exist_ok=True)
+        self.track_vintages = track_vintages
 
     def clean_cache(self):
-        """Elimina todas las tablas excepto 'metadata'."""
+        """Elimina todas las tablas excepto el catálogo ('metadata' y sus detalles)."""
         with self._connect() as conn:
             cursor = conn.cursor()
 
-            # Obtener todas las tablas excepto 'metadata'
-            cursor.execute("""
+            # Obtener todas las tablas excepto las del catálogo
+            cursor.execute(
+                """
                 SELECT name
                 FROM sqlite_master
-                WHERE type='table' AND name != 'metadata';
-            """)
+                WHERE type='table' AND name NOT IN (?, ?);
+            """,
+                (METADATA_TABLE, DETAILS_TABLE),
+            )
             tables = cursor.fetchall()
 
             # Eliminar cada tabla
@@ -151,8 +201,11 @@ class BCRPCache:
         Persiste *df* (columnas: ``date`` + códigos) para los parámetros dados.
 
         - Si la tabla no existe → se crea.
-        - Si ya existe y hay columnas nuevas → ALTER TABLE ADD COLUMN.
-        - Las filas se insertan con ``INSERT OR REPLACE`` (upsert por ``date``).
+        - Si ya existe → upsert por ``date``: los códigos presentes en *df*
+          reemplazan sus valores anteriores y los códigos nuevos se agregan
+          como columnas.
+        - Con ``track_vintages`` activo, las celdas que cambiaron se
+          registran además en la tabla ``vintages``.
         """
         if df is None or df.empty:
             return
@@ -163,11 +216,155 @@ class BCRPCache:
             if not self._table_exists(conn, table):
                 df.to_sql(table, con=conn, index=False, if_exists="replace")
             else:
-                # Agregar columnas que falten
+                keys = _key_columns(df)
                 df_last = pd.read_sql(f"select * from {table}", con=conn)
-                df_merged = df_last.merge(df, "outer")
+                replaced = [
+                    c for c in df.columns if c not in keys and c in df_last.columns
+                ]
+                df_merged = df_last.drop(columns=replaced).merge(
+                    df, on=keys, how="outer"
+                )
+                df_merged = df_merged.sort_values("date")
                 df_merged.to_sql(table, con=conn, index=False, if_exists="replace")
 
+            if self.track_vintages:
+                self._record_vintage(conn, df, freq)
+
+    # ------------------------------------------------------------------
+    # Vintages
+    # ------------------------------------------------------------------
+
+    def _vintage_values(
+        self,
+        conn: sqlite3.Connection,
+        freq: str,
+        codes: list[str],
+        vintage_ms: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Valores vigentes (``code``, ``date``, ``value``) en la vintage
+        *vintage_ms*: para cada celda, la última revisión con
+        ``vintage <= vintage_ms``. Sin *vintage_ms* devuelve la más reciente.
+        """
+        conn.execute(_CREATE_VINTAGES)
+        codes = [c.upper() for c in codes]
+        marks = ", ".join("?" * len(codes))
+        cutoff = "AND vintage <= ?" if vintage_ms is not None else ""
+        params = [freq, *codes] + ([vintage_ms] if vintage_ms is not None else [])
+        query = f"""
+            SELECT v.code, v.date, v.value
+            FROM {_VINTAGES_TABLE} v
+            JOIN (
+                SELECT code, date, MAX(vintage) AS vintage
+                FROM {_VINTAGES_TABLE}
+                WHERE freq = ? AND code IN ({marks}) {cutoff}
+                GROUP BY code, date
+            ) last USING (code, date, vintage)
+            WHERE v.freq = ?
+        """
+        return pd.read_sql(query, conn, params=params + [freq])
+
+    def _record_vintage(
+        self, conn: sqlite3.Connection, df: pd.DataFrame, freq: str
+    ) -> int:
+        """
+        Guarda en ``vintages`` solo las celdas de *df* que difieren de la
+        última versión registrada. Devuelve el número de celdas escritas.
+        """
+        keys = _key_columns(df)
+        codes = [c for c in df.columns if c not in keys]
+        if not codes:
+            return 0
+
+        new = df.melt(
+            id_vars=["date"], value_vars=codes, var_name="code", value_name="value"
+        )
+        new["code"] = new["code"].str.upper()
+        new["date"] = new["date"].astype(str)
+
+        prev = self._vintage_values(conn, freq, codes)
+        merged = new.merge(
+            prev,
+            on=["code", "date"],
+            how="left",
+            suffixes=("", "_prev"),
+            indicator=True,
+        )
+        known = merged["_merge"] == "both"
+        same = (merged["value"] == merged["value_prev"]) | (
+            merged["value"].isna() & merged["value_prev"].isna()
+        )
+        changed = merged[(known & ~same) | (~known & merged["value"].notna())]
+        if changed.empty:
+            return 0
+
+        vintage = _vintage_ms(None)
+        rows = [
+            (freq, code, date, vintage, None if pd.isna(value) else float(value))
+            for code, date, value in changed[["code", "date", "value"]].itertuples(
+                index=False, name=None
+            )
+        ]
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {_VINTAGES_TABLE} "
+            "(freq, code, date, vintage, value) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        logger.info("Vintage %d: %d celdas modificadas (%s).", vintage, len(rows), freq)
+        return len(rows)
+
+    def load_vintage(
+        self,
+        freq: str,
+        codes: list[str],
+        as_of: Union[None, int, str, pd.Timestamp] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Reconstruye los *codes* tal como estaban publicados en *as_of*.
+
+        Parameters
+        ----------
+        freq:
+            Frecuencia (``'D'``, ``'M'``, ``'Q'``, ``'A'``).
+        codes:
+            Códigos a reconstruir.
+        as_of:
+            Instante de la vintage (fecha, ``Timestamp`` o milisegundos UTC).
+            ``None`` devuelve la última versión registrada.
+
+        Returns
+        -------
+        DataFrame con ``date`` + un código (en minúsculas) por columna, o
+        ``None`` si no hay vintages registradas para esos códigos.
+        """
+        as_of_ms = None if as_of is None else _vintage_ms(as_of)
+        with self._connect() as conn:
+            long = self._vintage_values(conn, freq, codes, as_of_ms)
+        if long.empty:
+            return None
+        wide = long.pivot(index="date", columns="code", values="value")
+        wide.columns = [c.lower() for c in wide.columns]
+        return wide.reset_index().sort_values("date").reset_index(drop=True)
+
+    def list_vintages(self, freq: Optional[str] = None) -> pd.DataFrame:
+        """
+        Lista las vintages registradas con el número de celdas que cambiaron
+        en cada una. Columnas: ``vintage`` (UTC), ``freq``, ``cells``.
+        """
+        where = "WHERE freq = ?" if freq else ""
+        params = [freq] if freq else []
+        with self._connect() as conn:
+            conn.execute(_CREATE_VINTAGES)
+            df = pd.read_sql(
+                f"SELECT vintage, freq, COUNT(*) AS cells FROM {_VINTAGES_TABLE} "
+                f"{where} GROUP BY vintage, freq ORDER BY vintage",
+                conn,
+                params=params,
+            )
+        df["vintage"] = pd.to_datetime(df["vintage"], unit="ms", utc=True)
+        return df
+
     # ------------------------------------------------------------------
     # valid_codes_cache
     # ------------------------------------------------------------------
@@ -0,0 +1,382 @@
+"""
+details.py
+----------
+Bulk, concurrent enrichment of the BCRP catalogue with the per-series
+detail pages (unit, notes, methodology, source).
+
+Responsibilities
+~~~~~~~~~~~~~~~~
+* Download the page behind each catalogue ``url`` with a pooled
+  :class:`requests.Session`, a bounded thread pool and a global rate limit.
+* Keep every raw response on disk (one HTML file per code and
+  ``last_update``) so re-parsing never hits the network.
+* Persist the parsed fields to the ``metadata_details`` table of the metadata
+  DB and skip codes whose catalogue ``last_update`` has not changed since the
+  last run.
+
+The page layout is not documented by the BCRP, so parsing is label-driven:
+any ``label: value`` pair (table rows, definition lists or plain
+paragraphs) is kept in ``fields`` and the well-known labels are promoted to
+their own columns.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urljoin
+
+import pandas as pd
+
+from .metadata import _clean_text, _load_metadata
+from .models import BASE_WEB_URL, CACHE_DB, DETAILS_TABLE
+
+logger = logging.getLogger(__name__)
+
+_CREATE_DETAILS = f"""
+CREATE TABLE IF NOT EXISTS {DETAILS_TABLE} (
+    code        TEXT PRIMARY KEY,
+    url         TEXT,
+    last_update TEXT,
+    title       TEXT,
+    unit        TEXT,
+    notes       TEXT,
+    methodology TEXT,
+    source      TEXT,
+    fields      TEXT,
+    status      INTEGER,
+    fetched_at  TEXT
+)
+"""
+
+# normalised label prefix → column in ``metadata_details``
+_LABEL_COLUMNS = {
+    "unidad": "unit",
+    "unit": "unit",
+    "nota": "notes",
+    "note": "notes",
+    "metodolog": "methodology",
+    "methodolog": "methodology",
+    "fuente": "source",
+    "source": "source",
+}
+
+_DETAIL_COLUMNS = ("title", "unit", "notes", "methodology", "source")
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+
+def _normalise_label(label: str) -> str:
+    """Lower-case, accent-free label without the trailing colon."""
+    label = unicodedata.normalize("NFD", label)
+    label = "".join(c for c in label if unicodedata.category(c) != "Mn")
+    return _clean_text(label).rstrip(":").strip().lower()
+
+
+def _parse_detail_page(html: str) -> dict:
+    """
+    Extract the descriptive fields of a series detail page.
+
+    Returns a dict with ``title``, ``unit``, ``notes``, ``methodology``,
+    ``source`` (``None`` when absent) and ``fields`` (every label/value pair
+    found on the page).
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    fields: dict[str, str] = {}
+
+    # <tr><th>Unidad</th><td>...</td></tr>  or  <tr><td>Unidad:</td><td>...</td>
+    for tr in soup.find_all("tr"):
+        cells = tr.find_all(["th", "td"], recursive=False)
+        if len(cells) == 2:
+            label = _clean_text(cells[0].get_text(" "))
+            value = _clean_text(cells[1].get_text(" "))
+            if label and value and len(label) < 60:
+                fields.setdefault(label.rstrip(":"), value)
+
+    # <dt>Unidad</dt><dd>...</dd>
+    for dt in soup.find_all("dt"):
+        dd = dt.find_next_sibling("dd")
+        if dd is not None:
+            fields.setdefault(
+                _clean_text(dt.get_text(" ")).rstrip(":"),
+                _clean_text(dd.get_text(" ")),
+            )
+
+    # "Nota: ..." in free text
+    for node in soup.find_all(["p", "li", "span", "div"]):
+        if node.find(["p", "div", "table"]):
+            continue
+        match = re.match(r"^\s*([^:]{2,40}):\s*(.+)$", node.get_text(" "), re.S)
+        if match:
+            fields.setdefault(_clean_text(match[1]), _clean_text(match[2]))
+
+    heading = soup.find(["h1", "h2"]) or soup.find("title")
+    parsed = {col: None for col in _DETAIL_COLUMNS}
+    parsed["title"] = _clean_text(heading.get_text(" ")) if heading else None
+
+    for label, value in fields.items():
+        norm = _normalise_label(label)
+        for prefix, column in _LABEL_COLUMNS.items():
+            if norm.startswith(prefix) and parsed[column] is None:
+                parsed[column] = value
+                break
+
+    # BCRP titles usually end with the unit in parentheses: "... (S/ millones)"
+    if parsed["unit"] is None and parsed["title"]:
+        match = re.search(r"\(([^()]+)\)\s*$", parsed["title"])
+        if match:
+            parsed["unit"] = match[1].strip()
+
+    parsed["fields"] = fields
+    return parsed
+
+
+# ---------------------------------------------------------------------------
+# Rate limiting
+# ---------------------------------------------------------------------------
+
+
+class _RateLimiter:
+    """Thread-safe limiter that spaces calls at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# ---------------------------------------------------------------------------
+# Public interface
+# ---------------------------------------------------------------------------
+
+
+class BCRPDetailsFetcher:
+    """
+    Concurrent, rate-limited fetcher for the per-series BCRP detail pages.
+
+    Parameters
+    ----------
+    db_path:
+        SQLite file holding the ``metadata`` catalogue. Parsed details are
+        written to the ``metadata_details`` table of the same file.
+    cache_dir:
+        Directory for the raw HTML responses. Defaults to a ``details/``
+        folder next to *db_path*.
+    max_workers:
+        Number of concurrent requests (each worker keeps one keep-alive
+        connection).
+    rate_limit:
+        Maximum requests per second across all workers (``0`` disables it).
+    timeout:
+        Per-request timeout in seconds.
+
+    Usage
+    -----
+    >>> fetcher = BCRPDetailsFetcher("data/bcrp_cache.db", max_workers=16)
+    >>> details = fetcher.fetch()                 # whole catalogue, once
+    >>> details = fetcher.fetch(["PN01288PM"])    # only stale/new codes hit the web
+    """
+
+    def __init__(
+        self,
+        db_path: str = CACHE_DB,
+        cache_dir: Optional[str] = None,
+        max_workers: int = 8,
+        rate_limit: float = 10.0,
+        timeout: float = 30.0,
+    ) -> None:
+        self._db_path = Path(db_path)
+        self._cache_dir = (
+            Path(cache_dir) if cache_dir else self._db_path.parent / "details"
+        )
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._limiter = _RateLimiter(rate_limit)
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _session(self):
+        """One pooled ``requests.Session`` per worker thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests
+
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=1, max_retries=2
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._local.session = session
+        return session
+
+    def _cache_file(self, code: str, last_update: Optional[str]) -> Path:
+        tag = hashlib.sha1(str(last_update).encode()).hexdigest()[:10]
+        return self._cache_dir / f"{code}_{tag}.html"
+
+    def _get_page(self, code: str, url: str, last_update: Optional[str]):
+        """Return ``(html, status)`` from the disk cache or the website."""
+        cached = self._cache_file(code, last_update)
+        if cached.exists():
+            return cached.read_text(encoding="utf-8"), 200
+
+        self._limiter.wait()
+        response = self._session().get(
+            urljoin(BASE_WEB_URL + "/", url), timeout=self.timeout
+        )
+        if response.status_code != 200:
+            return None, response.status_code
+
+        html = response.text
+        tmp = cached.with_suffix(".tmp")
+        tmp.write_text(html, encoding="utf-8")
+        tmp.replace(cached)
+        return html, response.status_code
+
+    def _fetch_one(self, row: dict) -> dict:
+        record = {
+            "code": row["code"],
+            "url": row["url"],
+            "last_update": row.get("last_update"),
+            **{col: None for col in _DETAIL_COLUMNS},
+            "fields": None,
+            "status": None,
+        }
+        try:
+            html, status = self._get_page(
+                row["code"], row["url"], row.get("last_update")
+            )
+        except Exception as exc:
+            logger.warning("Could not fetch details for %s: %s", row["code"], exc)
+            return record
+
+        record["status"] = status
+        if html is not None:
+            parsed = _parse_detail_page(html)
+            record.update(parsed)
+            record["fields"] = json.dumps(parsed["fields"], ensure_ascii=False)
+        return record
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path)
+        conn.execute(_CREATE_DETAILS)
+        return conn
+
+    def _save(self, records: list[dict]) -> None:
+        if not records:
+            return
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        cols = ["code", "url", "last_update", *_DETAIL_COLUMNS, "fields", "status"]
+        rows = [tuple(r[c] for c in cols) + (now,) for r in records]
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {DETAILS_TABLE} "
+                f"({', '.join(cols)}, fetched_at) "
+                f"VALUES ({', '.join('?' * (len(cols) + 1))})",
+                rows,
+            )
+
+    def load(self, codes: Optional[list[str]] = None) -> pd.DataFrame:
+        """Return the stored details (all of them, or only *codes*)."""
+        with self._connect() as conn:
+            df = pd.read_sql(f"SELECT * FROM {DETAILS_TABLE}", conn)
+        if codes is not None:
+            wanted = {c.strip().upper() for c in codes}
+            df = df[df["code"].str.upper().isin(wanted)]
+        return df.reset_index(drop=True)
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+
+    def _stale_rows(self, codes: Optional[list[str]], force: bool) -> list[dict]:
+        catalogue = _load_metadata(self._db_path)
+        if catalogue is None:
+            raise RuntimeError(
+                "No BCRP catalogue found — instantiate BCRPMetadata first."
+            )
+        catalogue = catalogue.dropna(subset=["code", "url"]).drop_duplicates("code")
+        if codes is not None:
+            wanted = {c.strip().upper() for c in codes}
+            catalogue = catalogue[catalogue["code"].str.upper().isin(wanted)]
+
+        if not force:
+            stored = self.load()
+            fresh = stored[stored["status"] == 200][["code", "last_update"]]
+            merged = catalogue.merge(
+                fresh, on="code", how="left", suffixes=("", "_stored"), indicator=True
+            )
+            unchanged = (merged["_merge"] == "both") & (
+                merged["last_update"] == merged["last_update_stored"]
+            )
+            catalogue = merged[~unchanged]
+
+        return catalogue[["code", "url", "last_update"]].to_dict("records")
+
+    def fetch(
+        self,
+        codes: Optional[list[str]] = None,
+        force: bool = False,
+        batch_size: int = 200,
+    ) -> pd.DataFrame:
+        """
+        Download and parse the detail pages of *codes* (whole catalogue by default).
+
+        Codes whose catalogue ``last_update`` matches the stored one are
+        skipped unless *force* is ``True``. Results are written to the DB every
+        *batch_size* pages so an interrupted run keeps its progress.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Stored details for *codes* (all codes when omitted).
+        """
+        from tqdm import tqdm
+
+        rows = self._stale_rows(codes, force)
+        logger.info("Fetching %d BCRP detail pages.", len(rows))
+
+        pending: list[dict] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._fetch_one, row) for row in rows]
+            for future in tqdm(
+                as_completed(futures), total=len(futures), desc="details", leave=False
+            ):
+                pending.append(future.result())
+                if len(pending) >= batch_size:
+                    self._save(pending)
+                    pending = []
+        self._save(pending)
+
+        return self.load(codes)
@@ -5,6 +5,9 @@ from perustats.BCRP.metadata import BCRPMetadata
 from perustats.BCRP.models import CACHE_DB, REF_DATE_FORMATS, BCRPSeries
 from perustats.BCRP.utils import apply_date_format, get_data_api, json_to_df
 
+# pandas period aliases used to clip rebuilt vintages to the requested range
+_PERIOD_FREQ = {"D": "D", "M": "M", "Q": "Q", "A": "Y"}
+
 
 class BCRPDataSeries:
     """
@@ -44,10 +47,26 @@ class BCRPDataSeries:
         self.format_date = format_date
         self.ref_date_formats = REF_DATE_FORMATS
 
-    def fetch_data(self, cache=None) -> "BCRPDataSeries":
+    def fetch_data(
+        self, cache=None, refresh: bool = False, track_vintages: bool = False
+    ) -> "BCRPDataSeries":
+        """
+        Fetch, cache, and parse all requested series.
+
+        Args:
+            cache (str, optional): Path to the SQLite cache. Defaults to ``CACHE_DB``.
+            refresh (bool, optional): Re-request every code from the API even if
+                it is already cached, replacing the stored values. Defaults to False
+            track_vintages (bool, optional): Record the cells that changed in the
+                ``vintages`` table so past releases can be rebuilt with
+                :meth:`as_of`. Defaults to False
+
+        Returns:
+            BCRPDataSeries: ``self`` with ``result`` and ``valid_codes`` populated.
+        """
         db_name = CACHE_DB if cache is None else cache
         metadata = BCRPMetadata(db_name)
-        bcrp_cache = BCRPCache(db_name)
+        bcrp_cache = BCRPCache(db_name, track_vintages=track_vintages)
         series = self.series
         freq_codes = series.freq_codes
         date_limits = series.date_limits
@@ -66,7 +85,7 @@ class BCRPDataSeries:
             end_date_freq = limits.get("end_date")
             # cache
             cols_cached = bcrp_cache.cached_codes(freq, start_date_freq, end_date_freq)
-            new_codes = [c for c in codes if c.upper() not in cols_cached]
+            new_codes = [c for c in codes if refresh or c.upper() not in cols_cached]
 
             if new_codes:
                 data_json = get_data_api(codes, start_date_freq, end_date_freq)
@@ -86,6 +105,46 @@ class BCRPDataSeries:
         # self.metadata_valid_codes = pd.concat(df_validos)
         return self
 
+    def as_of(self, vintage, cache=None) -> "BCRPDataSeries":
+        """
+        Rebuild the requested series as they were published at *vintage*.
+
+        Only works for data saved with ``fetch_data(track_vintages=True)``; each
+        cell takes its latest revision recorded at or before *vintage*.
+
+        Args:
+            vintage (str | datetime | int): Point in time (naive values are read
+                as UTC; integers as epoch milliseconds).
+            cache (str, optional): Path to the SQLite cache. Defaults to ``CACHE_DB``.
+
+        Returns:
+            BCRPDataSeries: ``self`` with ``result`` populated by frequency. A
+            frequency maps to ``None`` when no vintage covers its codes.
+        """
+        db_name = CACHE_DB if cache is None else cache
+        bcrp_cache = BCRPCache(db_name)
+        series = self.series
+
+        result = dict()
+        for freq, codes in series.freq_codes.items():
+            df_freq = bcrp_cache.load_vintage(freq, codes, as_of=vintage)
+            if df_freq is None:
+                result[freq] = None
+                continue
+            df_freq = self.df_date_format(df_freq)
+
+            period = df_freq["date"].dt.to_period(_PERIOD_FREQ[freq])
+            start = pd.Period(series.start_date, _PERIOD_FREQ[freq])
+            end = pd.Period(series.end_date, _PERIOD_FREQ[freq])
+            df_freq = df_freq[(period >= start) & (period <= end)].copy()
+            if freq == "Q":
+                df_freq.insert(1, "yq", df_freq["date"].dt.to_period("Q").astype(str))
+            result[freq] = df_freq.reset_index(drop=True)
+
+        self.vintage = vintage
+        self.result = result
+        return self
+
     def df_date_format(self, df):
         """
         Apply appropriate date formatting to DataFrame based on frequency.
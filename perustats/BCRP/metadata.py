@@ -25,10 +25,6 @@ from pathlib import Path
 from typing import Optional
 
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from rich import print
-from tqdm import tqdm
 
 from .models import (
     CACHE_DB,
@@ -89,19 +85,29 @@ def _parse_series_table(table) -> pd.DataFrame:
 # ---------------------------------------------------------------------------
 
 
-def _scrape_metadata() -> pd.DataFrame:
+def _scrape_metadata(freq_labels: Optional[list[str]] = None) -> pd.DataFrame:
     """
     Download the full BCRP series catalogue from the statistics website.
 
+    Parameters
+    ----------
+    freq_labels:
+        Subset of :data:`FREQ_WEB_LABELS` to scrape (all of them by default).
+
     Returns
     -------
     pandas.DataFrame
         Columns: ``code``, ``description``, ``group``, ``source``,
         ``freq_label``, ``freq`` (canonical D/M/Q/A indicator).
     """
+    # Scraping dependencies are only needed here; keep them off the import path.
+    import requests
+    from bs4 import BeautifulSoup
+    from tqdm import tqdm
+
     all_frames: list[pd.DataFrame] = []
 
-    for freq_label in FREQ_WEB_LABELS:
+    for freq_label in freq_labels or FREQ_WEB_LABELS:
         url = SERIES_WEB_URL.format(type=freq_label)
         logger.debug("Scraping %s", url)
 
@@ -230,14 +236,30 @@ class BCRPMetadata:
             logger.info("No cached metadata found — scraping BCRP website…")
             self.refresh()
 
-    def refresh(self) -> None:
+    def refresh(self, frequencies: Optional[list[str]] = None) -> None:
         """
         Force a full re-scrape of the BCRP catalogue and overwrite the cache.
 
         Call this whenever you suspect the catalogue has been updated (e.g.
         new series published by the BCRP).
+
+        Parameters
+        ----------
+        frequencies:
+            Only re-scrape these frequencies (``'D'``, ``'M'``, ``'Q'``,
+            ``'A'`` or aliases) and keep the stored rows of the others.
         """
-        df = _scrape_metadata()
+        from .models import resolve_frequency
+
+        labels = None
+        if frequencies:
+            freqs = {resolve_frequency(f) for f in frequencies}
+            labels = [lb for lb, f in FREQ_WEB_MAP.items() if f in freqs]
+
+        df = _scrape_metadata(labels)
+        if not df.empty and labels and self._df is not None:
+            keep = self._df[~self._df["freq"].isin(df["freq"].unique())]
+            df = pd.concat([keep, df], ignore_index=True)
         if not df.empty:
             _save_metadata(df, self._db_path)
             self._df = df
@@ -339,6 +361,21 @@ class BCRPMetadata:
         mask = self._df["description"].str.contains(query, case=False, na=False)
         return self._df[mask].reset_index(drop=True)
 
+    def fetch_details(
+        self, codes: Optional[list[str]] = None, force: bool = False, **kwargs
+    ) -> pd.DataFrame:
+        """
+        Enrich the catalogue with the per-series detail pages (unit, notes,
+        methodology). See :class:`~perustats.BCRP.details.BCRPDetailsFetcher`
+        for the accepted keyword arguments.
+
+        Only codes whose ``last_update`` changed since the previous run are
+        downloaded again.
+        """
+        from .details import BCRPDetailsFetcher
+
+        return BCRPDetailsFetcher(self._db_path, **kwargs).fetch(codes, force=force)
+
     def codes_for_frequency(self, frequency: str) -> list[str]:
         """
         Return all known codes for a given frequency.
@@ -358,6 +395,8 @@ class BCRPMetadata:
 
 
 if __name__ == "__main__":
+    from rich import print
+
     meta = BCRPMetadata()
     # meta.refresh()
     valid, invalid = meta.validate_codes(["RD16085DA", "FAKE_CODE", "PM06178MA"])
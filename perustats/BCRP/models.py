@@ -58,6 +58,19 @@ SPANISH_MONTH_MAP: dict[str, str] = {
 
 DEFAULT_START_DATE = "1990-01-02"
 
+
+def resolve_frequency(frequency: str) -> str:
+    """
+    Return the canonical indicator (``'D'``, ``'M'``, ``'Q'``, ``'A'``) for
+    *frequency*, accepting any alias in :data:`FREQ_ALIAS_MAP`.
+    """
+    key = frequency.strip()
+    freq = FREQ_ALIAS_MAP.get(key.lower(), key.upper())
+    if freq not in VALID_FREQUENCIES:
+        raise ValueError(f"Unknown frequency: {frequency!r}")
+    return freq
+
+
 # ---------------------------------------------------------------------------
 # Metadata scraping constants
 # ---------------------------------------------------------------------------
@@ -79,6 +92,8 @@ FREQ_WEB_MAP: dict[str, str] = {
 # SQLite table names
 METADATA_TABLE = "metadata"  # full catalogue scraped from the BCRP website
 SERIES_TABLE = "series"  # active-codes subset used for validation
+DETAILS_TABLE = "metadata_details"  # parsed per-series detail pages
+PREFETCH_TABLE = "prefetch_state"  # last_update seen by the prefetcher per code
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,258 @@
+"""
+prefetch.py
+-----------
+Background prefetcher that keeps a watchlist of BCRP codes warm in
+:class:`~perustats.BCRP.cache.BCRPCache`.
+
+Strategy
+~~~~~~~~
+* Each frequency is polled on its own cadence (daily series more often than
+  annual ones).
+* A poll re-scrapes only that frequency's catalogue page and compares each
+  watched code's ``last_update`` with the one recorded in the
+  ``prefetch_state`` table.
+* Only codes that changed (or were never fetched for the configured date
+  range) go to the API, in batches, through
+  :meth:`BCRPDataSeries.fetch_data(refresh=True) <perustats.BCRP.fetcher.BCRPDataSeries.fetch_data>`.
+
+User-facing ``fetch_data`` calls hit the warm cache as long as they use the
+same ``start_date`` / ``end_date`` as the prefetcher (the cache keeps one
+table per date range).
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from .cache import BCRPCache
+from .fetcher import BCRPDataSeries
+from .metadata import BCRPMetadata
+from .models import CACHE_DB, PREFETCH_TABLE, BCRPSeries
+
+logger = logging.getLogger(__name__)
+
+# Poll cadence in seconds per frequency
+DEFAULT_INTERVALS: dict[str, float] = {
+    "D": 60 * 60,
+    "M": 6 * 60 * 60,
+    "Q": 12 * 60 * 60,
+    "A": 24 * 60 * 60,
+}
+
+_CREATE_PREFETCH = f"""
+CREATE TABLE IF NOT EXISTS {PREFETCH_TABLE} (
+    code        TEXT NOT NULL,
+    start_date  TEXT NOT NULL,
+    end_date    TEXT NOT NULL,
+    freq        TEXT NOT NULL,
+    last_update TEXT,
+    fetched_at  TEXT,
+    PRIMARY KEY (code, start_date, end_date)
+)
+"""
+
+
+class BCRPPrefetcher:
+    """
+    Keep a watchlist of BCRP series warm in the local cache.
+
+    Parameters
+    ----------
+    codes:
+        Watchlist of series codes (any frequency mix).
+    start_date, end_date:
+        Date range (``YYYY-MM-DD``) to keep cached. Dashboards must request
+        the same range to hit the warm tables; a far-future ``end_date``
+        (e.g. ``'2035-12-31'``) keeps the range stable across publications.
+    cache:
+        Path to the SQLite cache shared with :class:`BCRPDataSeries`.
+    intervals:
+        Poll cadence in seconds per frequency, merged over
+        :data:`DEFAULT_INTERVALS`.
+    batch_size:
+        Maximum codes per API request.
+    track_vintages:
+        Forwarded to ``fetch_data`` so revisions are kept as vintages.
+
+    Usage
+    -----
+    >>> pf = BCRPPrefetcher(watchlist, "2000-01-01", "2035-12-31").start()
+    >>> ...                      # dashboards call fetch_data() as usual
+    >>> pf.stop()
+    """
+
+    def __init__(
+        self,
+        codes: list[str],
+        start_date: str,
+        end_date: str,
+        cache: str = CACHE_DB,
+        intervals: Optional[dict[str, float]] = None,
+        batch_size: int = 50,
+        track_vintages: bool = False,
+    ) -> None:
+        self.series = BCRPSeries(codes, start_date=start_date, end_date=end_date)
+        self.cache = cache
+        self.intervals = {**DEFAULT_INTERVALS, **(intervals or {})}
+        self.batch_size = batch_size
+        self.track_vintages = track_vintages
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_run: dict[str, float] = {}
+
+        Path(cache).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_CREATE_PREFETCH)
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.cache)
+
+    def _stored_updates(self, codes: list[str]) -> dict[str, Optional[str]]:
+        marks = ", ".join("?" * len(codes))
+        with self._connect() as conn:
+            conn.execute(_CREATE_PREFETCH)
+            rows = conn.execute(
+                f"SELECT code, last_update FROM {PREFETCH_TABLE} "
+                f"WHERE start_date = ? AND end_date = ? AND code IN ({marks})",
+                (self.series.start_date, self.series.end_date, *codes),
+            ).fetchall()
+        return dict(rows)
+
+    def _record(self, freq: str, updates: dict[str, Optional[str]]) -> None:
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        rows = [
+            (code, self.series.start_date, self.series.end_date, freq, last, now)
+            for code, last in updates.items()
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {PREFETCH_TABLE} "
+                "(code, start_date, end_date, freq, last_update, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+
+    def _changed_codes(self, freq: str, catalogue: pd.DataFrame) -> dict:
+        """Watched codes of *freq* whose ``last_update`` moved (or never fetched)."""
+        codes = self.series.freq_codes.get(freq, [])
+        if not codes:
+            return {}
+
+        known = catalogue[catalogue["code"].str.upper().isin(codes)]
+        latest = dict(zip(known["code"].str.upper(), known["last_update"]))
+        stored = self._stored_updates(codes)
+
+        limits = self.series.date_limits[freq]
+        cached = BCRPCache(self.cache).cached_codes(
+            freq, limits["start_date"], limits["end_date"]
+        )
+
+        return {
+            code: latest.get(code)
+            for code in codes
+            if code in latest
+            and (code not in cached or stored.get(code) != latest.get(code))
+        }
+
+    def run_once(self, frequencies: Optional[list[str]] = None) -> dict[str, list]:
+        """
+        Poll *frequencies* (all watched ones by default) once and refresh the
+        codes that changed.
+
+        Returns
+        -------
+        dict
+            Frequency → list of codes that were re-fetched.
+        """
+        freqs = frequencies or list(self.series.freq_codes)
+        metadata = BCRPMetadata(self.cache)
+        metadata.refresh(frequencies=freqs)
+        catalogue = metadata.dataframe
+
+        refreshed: dict[str, list] = {}
+        for freq in freqs:
+            changed = self._changed_codes(freq, catalogue)
+            codes = list(changed)
+            for i in range(0, len(codes), self.batch_size):
+                batch = codes[i : i + self.batch_size]
+                series = BCRPSeries(
+                    batch,
+                    start_date=self.series.start_date,
+                    end_date=self.series.end_date,
+                )
+                try:
+                    BCRPDataSeries(series).fetch_data(
+                        cache=self.cache,
+                        refresh=True,
+                        track_vintages=self.track_vintages,
+                    )
+                except Exception as exc:
+                    logger.error("Prefetch failed for %s: %s", batch, exc)
+                    continue
+                self._record(freq, {c: changed[c] for c in batch})
+                refreshed.setdefault(freq, []).extend(batch)
+            logger.info("Prefetch %s: %d codes refreshed.", freq, len(codes))
+        return refreshed
+
+    # ------------------------------------------------------------------
+    # Background thread
+    # ------------------------------------------------------------------
+
+    def _loop(self) -> None:
+        now = time.monotonic()
+        self._next_run = {freq: now for freq in self.series.freq_codes}
+        while self._next_run and not self._stop.is_set():
+            now = time.monotonic()
+            due = [f for f, at in self._next_run.items() if at <= now]
+            if due:
+                try:
+                    self.run_once(due)
+                except Exception as exc:
+                    logger.error("Prefetch poll failed (%s): %s", due, exc)
+                for freq in due:
+                    self._next_run[freq] = time.monotonic() + self.intervals[freq]
+            wait = min(self._next_run.values()) - time.monotonic()
+            self._stop.wait(max(wait, 0))
+
+    def start(self) -> "BCRPPrefetcher":
+        """Start polling in a daemon thread. Returns self."""
+        if self.is_running:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="bcrp-prefetch", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask the background thread to stop and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def __enter__(self) -> "BCRPPrefetcher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,465 @@
+"""
+server.py
+---------
+Small read-only HTTP service over the local BCRP cache and catalogue.
+
+One node answers every consumer (R, Excel, other services) from SQLite while
+upstream traffic stays at one API request per series:
+
+* an in-memory LRU *hot layer* keeps rendered responses for ``ttl`` seconds;
+* misses go through a *single-flight* :meth:`BCRPDataSeries.fetch_data` call
+  per cache table (frequency and date range), holding that table's lock:
+  concurrent requests for the same codes share one fetch, overlapping ones
+  only send upstream the codes still missing from the cache, and saves to
+  a table never interleave;
+* responses carry an ``ETag`` (conditional GET → ``304``) and are gzipped
+  when the client accepts it.
+
+Endpoints
+~~~~~~~~~
+``GET /series?codes=PN01288PM,PN01289PM&start=2015-01-01&end=2024-12-31&format=json``
+    ``format`` is ``json`` (default, keyed by frequency), ``csv`` or
+    ``arrow`` (IPC stream). ``csv``/``arrow`` need a single frequency; pick
+    one with ``freq=M`` when codes are mixed.
+``GET /catalogue?q=inflacion&freq=M&format=json``
+    Catalogue rows, optionally filtered.
+``GET /health``
+
+Usage
+~~~~~
+    python -m perustats.BCRP.server --cache ./data/bcrp_cache.db --port 8765
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from .cache import BCRPCache
+from .fetcher import BCRPDataSeries
+from .metadata import BCRPMetadata
+from .models import CACHE_DB, DEFAULT_START_DATE, BCRPSeries, resolve_frequency
+
+logger = logging.getLogger(__name__)
+
+_CONTENT_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+_GZIP_MIN_BYTES = 1024
+
+
+class _BadRequest(ValueError):
+    """Client error surfaced as HTTP 400."""
+
+
+class _NotFound(LookupError):
+    """Unknown endpoint, surfaced as HTTP 404."""
+
+
+# ---------------------------------------------------------------------------
+# Hot layer + single flight
+# ---------------------------------------------------------------------------
+
+
+class _HotCache:
+    """Thread-safe LRU with a per-entry time-to-live."""
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            created, value = item
+            if self.ttl and time.monotonic() - created > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class _SingleFlight:
+    """Collapse concurrent calls for the same key into one execution."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: dict = {}
+
+    def do(self, key, fn: Callable):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+
+class _KeyedLocks:
+    """One lock per key, created on first use."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._locks: dict = {}
+
+    def get(self, key) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+
+def _render(frames: dict, fmt: str) -> bytes:
+    """Serialise ``freq → DataFrame`` as JSON, CSV or an Arrow IPC stream."""
+    if fmt == "json":
+        parts = [
+            f"{json.dumps(freq)}:"
+            + df.to_json(orient="records", date_format="iso", force_ascii=False)
+            for freq, df in frames.items()
+        ]
+        return ("{" + ",".join(parts) + "}").encode("utf-8")
+
+    if len(frames) != 1:
+        raise _BadRequest(
+            f"format={fmt} needs a single frequency; pass freq= one of {sorted(frames)}"
+        )
+    (df,) = frames.values()
+
+    if fmt == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Application
+# ---------------------------------------------------------------------------
+
+
+class BCRPServer:
+    """
+    Read-only HTTP front for the BCRP cache.
+
+    Parameters
+    ----------
+    cache:
+        SQLite cache shared with :class:`BCRPDataSeries`.
+    host, port:
+        Bind address.
+    hot_entries:
+        Maximum rendered responses kept in memory.
+    ttl:
+        Seconds a hot entry is served before it is re-read from SQLite
+        (``0`` keeps entries until evicted).
+
+    Usage
+    -----
+    >>> server = BCRPServer(port=8765).start()   # background thread
+    >>> server.url
+    'http://127.0.0.1:8765'
+    >>> server.stop()
+    """
+
+    def __init__(
+        self,
+        cache: str = CACHE_DB,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        hot_entries: int = 512,
+        ttl: float = 300,
+    ) -> None:
+        self.cache = cache
+        self.host = host
+        self.port = port
+        self.ttl = ttl
+        self._hot = _HotCache(hot_entries, ttl)
+        self._flight = _SingleFlight()
+        self._table_locks = _KeyedLocks()
+        self._metadata: Optional[BCRPMetadata] = None
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Data access
+    # ------------------------------------------------------------------
+
+    @property
+    def metadata(self) -> BCRPMetadata:
+        if self._metadata is None:
+            self._metadata = BCRPMetadata(self.cache)
+        return self._metadata
+
+    def _series_frames(self, params: dict) -> dict:
+        codes = sorted(
+            {c.strip().upper() for c in params.get("codes", "").split(",") if c.strip()}
+        )
+        if not codes:
+            raise _BadRequest("codes= is required")
+        start = params.get("start") or DEFAULT_START_DATE
+        end = params.get("end") or date.today().isoformat()
+        try:
+            series = BCRPSeries(codes, start_date=start, end_date=end)
+        except ValueError as exc:
+            raise _BadRequest(str(exc)) from exc
+
+        frames = {}
+        for freq, freq_codes in series.freq_codes.items():
+            limits = series.date_limits[freq]
+            table = (freq, limits["start_date"], limits["end_date"])
+            frames.update(
+                self._flight.do(
+                    ("series", table, tuple(freq_codes)),
+                    partial(self._fetch_table, table, freq_codes, start, end),
+                )
+            )
+        frames = {f: df for f, df in frames.items() if df is not None}
+
+        if params.get("freq"):
+            try:
+                freq = resolve_frequency(params["freq"])
+            except ValueError as exc:
+                raise _BadRequest(str(exc)) from exc
+            frames = {f: df for f, df in frames.items() if f == freq}
+        return frames
+
+    def _fetch_table(self, table: tuple, codes: list, start: str, end: str) -> dict:
+        """
+        Fetch *codes* of one cache table ``(freq, start, end)`` under its lock.
+
+        Only codes not cached yet are requested upstream; the result is then
+        read from the cache.
+        """
+        cache = BCRPCache(self.cache)
+        with self._table_locks.get(table):
+            missing = [c for c in codes if c not in cache.cached_codes(*table)]
+            if missing:
+                BCRPDataSeries(BCRPSeries(missing, start, end)).fetch_data(
+                    cache=self.cache
+                )
+            cached = cache.cached_codes(*table)
+            ready = [c for c in codes if c in cached]
+            if not ready:
+                return {}
+            series = BCRPSeries(ready, start_date=start, end_date=end)
+            return BCRPDataSeries(series).fetch_data(cache=self.cache).result
+
+    def _catalogue_frames(self, params: dict) -> dict:
+        df = self.metadata.dataframe
+        if df is None:
+            df = pd.DataFrame()
+        if params.get("q"):
+            df = self.metadata.search(params["q"])
+        if params.get("freq") and not df.empty:
+            try:
+                freq = resolve_frequency(params["freq"])
+            except ValueError as exc:
+                raise _BadRequest(str(exc)) from exc
+            df = df[df["freq"] == freq]
+        return {"catalogue": df.reset_index(drop=True)}
+
+    def respond(self, path: str, params: dict) -> tuple[bytes, str, str]:
+        """
+        Build ``(body, content_type, etag)`` for a request, using the hot layer.
+
+        Raises ``_NotFound`` for unknown paths and ``_BadRequest`` for invalid
+        parameters.
+        """
+        fmt = params.get("format", "json").lower()
+        if fmt not in _CONTENT_TYPES:
+            raise _BadRequest(f"unknown format {fmt!r}")
+
+        key = (path, tuple(sorted(params.items())))
+        hit = self._hot.get(key)
+        if hit is not None:
+            return hit
+
+        if path == "/series":
+            frames = self._series_frames(params)
+        elif path == "/catalogue":
+            frames = self._catalogue_frames(params)
+        else:
+            raise _NotFound(path)
+
+        if path == "/catalogue" and fmt == "json":
+            body = frames["catalogue"].to_json(orient="records", force_ascii=False)
+            body = body.encode("utf-8")
+        else:
+            body = _render(frames, fmt)
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        entry = (body, _CONTENT_TYPES[fmt], etag)
+        self._hot.put(key, entry)
+        return entry
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def url(self) -> str:
+        host, port = (
+            self._httpd.server_address if self._httpd else (self.host, self.port)
+        )
+        return f"http://{host}:{port}"
+
+    def _make_httpd(self) -> ThreadingHTTPServer:
+        httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        httpd.daemon_threads = True
+        httpd.app = self
+        return httpd
+
+    def serve_forever(self) -> None:
+        """Serve in the current thread until interrupted."""
+        self._httpd = self._make_httpd()
+        logger.info("Serving BCRP cache on %s", self.url)
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def start(self) -> "BCRPServer":
+        """Serve in a daemon thread. Returns self."""
+        self._httpd = self._make_httpd()
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="bcrp-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        self._httpd = self._thread = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "perustats-bcrp"
+
+    def do_GET(self) -> None:  # noqa: N802 (http.server API)
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/health":
+            self._send(200, b'{"status":"ok"}', "application/json")
+            return
+
+        try:
+            body, content_type, etag = self.server.app.respond(url.path, params)
+        except _NotFound:
+            self._send_error(404, f"unknown endpoint {url.path}")
+            return
+        except _BadRequest as exc:
+            self._send_error(400, str(exc))
+            return
+        except Exception as exc:
+            logger.exception("Upstream failure for %s", self.path)
+            self._send_error(502, f"upstream error: {exc}")
+            return
+
+        if etag in self.headers.get("If-None-Match", ""):
+            self._send(304, b"", content_type, etag=etag)
+            return
+        self._send(200, body, content_type, etag=etag)
+
+    def _send_error(self, status: int, message: str) -> None:
+        body = json.dumps({"error": message}).encode("utf-8")
+        self._send(status, body, "application/json")
+
+    def _send(
+        self, status: int, body: bytes, content_type: str, etag: Optional[str] = None
+    ) -> None:
+        gzipped = (
+            status == 200
+            and len(body) >= _GZIP_MIN_BYTES
+            and "gzip" in self.headers.get("Accept-Encoding", "")
+        )
+        if gzipped:
+            body = gzip.compress(body, compresslevel=5)
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"max-age={int(self.server.app.ttl)}")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve the local BCRP cache over HTTP."
+    )
+    parser.add_argument("--cache", default=CACHE_DB)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttl", type=float, default=300)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    BCRPServer(args.cache, args.host, args.port, ttl=args.ttl).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,6 @@ import sqlite3
 from datetime import datetime, timedelta
 
 import pandas as pd
-import requests
 
 from perustats.BCRP.archive.constants import DB_PATH
 from perustats.BCRP.models import BASE_API_URL
@@ -103,6 +102,8 @@ def active_codes(metadata: pd.DataFrame, years: int = 2) -> pd.DataFrame:
 
 
 def get_data_api(codes, start_date, end_date):
+    import requests
+
     codes = [cd.strip() for cd in codes]
     codes_j = "-".join(codes)
     root_url = BASE_API_URL.format(codes=codes_j, begin=start_date, end=end_date)
@@ -1,11 +1,27 @@
+from importlib import import_module
+from typing import TYPE_CHECKING
+
 from perustats.MEF.constants import buttons as BTN
 from perustats.MEF.steps.click import ClickBtn, Rows, Search
 
-from .scrapper import MEFScraper
+if TYPE_CHECKING:
+    from .scrapper import MEFScraper
+
+
+def __getattr__(name: str):
+    # MEFScraper pulls in pandas/requests/rich; load it on first access.
+    if name == "MEFScraper":
+        value = import_module(".scrapper", __name__).MEFScraper
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
     from rich import print
 
+    from perustats.MEF.scrapper import MEFScraper
+
     base_inicio = [
         Rows(["total"]),
         ClickBtn(BTN.NIVEL_GOBIERNO),
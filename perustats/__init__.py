@@ -1,9 +1,52 @@
-from .BCRP import BCRPDataSeries, BCRPSeries
-from .inei.fetcher import INEIFetcher
-from .MEF import BTN, ClickBtn, MEFScraper, Rows, Search
+"""
+perustats
+=========
+
+Public data sources from Peru (BCRP, INEI, MEF).
+
+Top-level names are resolved lazily through a module ``__getattr__`` so that
+``import perustats`` stays cheap: pandas, requests, bs4 or rich are only
+imported when the subsystem that needs them is first accessed.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
 from .utils import print_tree
 from .version import version as __version__
 
+if TYPE_CHECKING:
+    from .BCRP.fetcher import BCRPDataSeries
+    from .BCRP.models import BCRPSeries
+    from .inei.fetcher import INEIFetcher
+    from .MEF import BTN, ClickBtn, MEFScraper, Rows, Search
+
+# public name → module that defines it
+_LAZY_EXPORTS = {
+    "BCRPDataSeries": "perustats.BCRP.fetcher",
+    "BCRPSeries": "perustats.BCRP.models",
+    "INEIFetcher": "perustats.inei.fetcher",
+    "MEFScraper": "perustats.MEF.scrapper",
+    "BTN": "perustats.MEF",
+    "ClickBtn": "perustats.MEF.steps.click",
+    "Rows": "perustats.MEF.steps.click",
+    "Search": "perustats.MEF.steps.click",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value  # cache: later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
+
 __all__ = [
     "BCRPDataSeries",
     "BCRPSeries",
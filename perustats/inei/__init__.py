@@ -24,7 +24,29 @@ Quick start
 >>> fetcher.fetch_modules().download(module_codes=[1, 2, 3]).organize(organize_by="year")
 """
 
-from .fetcher import INEIFetcher
+from importlib import import_module
+from typing import TYPE_CHECKING
+
 from .surveys.registry import Survey, registry
 
-__all__ = ["INEIFetcher", "Survey", "registry"]
+if TYPE_CHECKING:
+    from .fetcher import INEIFetcher
+    from .orchestrator import Job, Orchestrator
+
+_LAZY = {
+    "INEIFetcher": ".fetcher",
+    "Job": ".orchestrator",
+    "Orchestrator": ".orchestrator",
+}
+
+
+def __getattr__(name: str):
+    # INEIFetcher pulls in pandas/rich/bs4; the registry does not.
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["INEIFetcher", "Job", "Orchestrator", "Survey", "registry"]
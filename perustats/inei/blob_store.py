@@ -0,0 +1,148 @@
+"""
+BlobStore: content-addressed store of downloaded ZIP archives, shared by
+every :class:`~perustats.inei.fetcher.INEIFetcher` that points at it.
+
+Layout
+------
+::
+
+    blobs/
+      objects/3f/3fa4…e1.zip      one file per distinct SHA-256
+      refs/9c/9c1b…77.json        one file per URL: {"url", "sha256", "size"}
+
+Responsibilities
+----------------
+* Keep a single copy of each archive, whatever the number of projects,
+  surveys or ``master_directory`` roots that download it.
+* Map a download URL to the digest of the archive last fetched from it, so
+  a repeated pull is served from disk instead of the network.
+* Place archives at per-survey paths (``0_zips/...``) as reflinks or hard
+  links into ``objects/``, falling back to a copy across filesystems.
+
+Every write goes through a temporary file and :func:`os.replace`, so
+several processes can share one store.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .utils.file_utils import file_hash, link_or_copy
+
+
+class BlobStore:
+    """
+    Content-addressed archive store.
+
+    Parameters
+    ----------
+    root:
+        Directory of the store; created when missing.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        (self.root / "refs").mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------------ #
+    # Public API                                                           #
+    # ------------------------------------------------------------------ #
+
+    def object_path(self, sha256: str) -> Path:
+        """Path of the archive whose SHA-256 is *sha256*."""
+        return self.root / "objects" / sha256[:2] / f"{sha256}.zip"
+
+    def lookup(self, url: str) -> Optional[Tuple[Path, str]]:
+        """
+        Return ``(object_path, sha256)`` of the archive stored for *url*.
+
+        ``None`` when the URL was never stored or its object is missing or
+        has the wrong size.
+        """
+        try:
+            ref = json.loads(self._ref_path(url).read_text(encoding="utf-8"))
+            obj = self.object_path(ref["sha256"])
+            if obj.stat().st_size != ref["size"]:
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+        return obj, ref["sha256"]
+
+    def add(self, url: str, path: Path, sha256: Optional[str] = None) -> Path:
+        """
+        Store the archive at *path* as the content of *url*.
+
+        *sha256* skips hashing when the digest is already known. The object
+        is linked from *path* when possible, so adding costs no extra space;
+        when the object already existed, *path* is swapped for a hard link
+        to it (kept as is across filesystems). Returns the object path.
+        """
+        digest = sha256 or file_hash(path)
+        obj = self.object_path(digest)
+        if not obj.exists():
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            tmp = obj.with_name(_tmp_name(obj.name))
+            try:
+                link_or_copy(path, tmp)
+                os.replace(tmp, obj)
+            finally:
+                tmp.unlink(missing_ok=True)
+        elif not os.path.samefile(path, obj):
+            tmp = Path(path).with_name(_tmp_name(Path(path).name))
+            try:
+                os.link(obj, tmp)
+                os.replace(tmp, path)
+            except OSError:
+                pass  # another filesystem: keep the downloaded copy
+            finally:
+                tmp.unlink(missing_ok=True)
+        self._write_ref(url, digest, obj.stat().st_size)
+        return obj
+
+    def link(self, url: str, dest: Path) -> Optional[str]:
+        """
+        Place the archive stored for *url* at *dest*.
+
+        Returns its SHA-256, or ``None`` (leaving *dest* untouched) when the
+        store has no archive for *url*.
+        """
+        hit = self.lookup(url)
+        if hit is None:
+            return None
+        obj, digest = hit
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        link_or_copy(obj, dest)
+        return digest
+
+    # ------------------------------------------------------------------ #
+    # Refs                                                                 #
+    # ------------------------------------------------------------------ #
+
+    def _ref_path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.root / "refs" / key[:2] / f"{key}.json"
+
+    def _write_ref(self, url: str, sha256: str, size: int) -> None:
+        ref = self._ref_path(url)
+        ref.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ref.with_name(_tmp_name(ref.name))
+        try:
+            tmp.write_text(
+                json.dumps({"url": url, "sha256": sha256, "size": size}),
+                encoding="utf-8",
+            )
+            os.replace(tmp, ref)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+
+def _tmp_name(name: str) -> str:
+    """Temporary file name unique to this process and thread."""
+    return f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
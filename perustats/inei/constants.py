@@ -24,6 +24,22 @@ DOC_EXTENSIONS = {".pdf", ".doc", ".docx", ".ppt", ".pptx", ".xls", ".xlsx", ".o
 # SQLite table name used for caching module lists
 CACHE_MICRODATOS = "inei_microdatos"
 
+# SQLite table listing the members of each module ZIP (remote inspection)
+ZIP_MEMBERS = "inei_zip_members"
+
+# SQLite table mapping source columns to harmonized lake columns
+SCHEMA_MAP = "inei_schema_map"
+
+# SQLite table caching file digests by (path, size, mtime)
+FILE_HASHES = "inei_file_hashes"
+
+# SQLite tables of the cross-year variable dictionary (file headers only)
+VARIABLES = "inei_variables"
+VALUE_LABELS = "inei_value_labels"
+
+# SQLite table tracking the jobs of the multi-survey orchestrator
+JOBS = "inei_jobs"
+
 # Progress-tracking columns stored in the DB alongside each module row
 PROGRESS_COLUMNS = [
     "url",
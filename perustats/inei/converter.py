@@ -0,0 +1,531 @@
+"""
+Converter: streams data files out of module ZIPs straight into Parquet.
+
+Responsibilities
+----------------
+* Read ``.csv``, ``.dbf``, ``.dta`` and ``.sav`` members directly from the
+  downloaded ZIP (or from the extracted folder when the ZIP was removed),
+  so no intermediate copy is written.
+* Write one typed, compressed Parquet file per member under
+  ``3_parquet/{year}_mod_{code}/{member}.parquet`` (atomic rename).
+* Read ``.dta`` / ``.sav`` in row chunks sized from a memory ceiling
+  (optionally across processes with ``pyreadstat``) and store value labels
+  as dictionary-encoded categoricals.
+* Update the :class:`~perustats.inei.utils.db_utils.DatabaseManager` once
+  every member of a module has been converted.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import csv
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    Progress,
+    SpinnerColumn,
+    TaskProgressColumn,
+    TextColumn,
+    TimeElapsedColumn,
+)
+
+from .utils.db_utils import DatabaseManager
+from .utils.dbf_utils import read_dbf
+from .utils.file_utils import slugify
+from .utils.zip_utils import member_kind
+
+console = Console()
+
+# Bytes sampled from a CSV to detect its encoding, delimiter and code columns
+_CSV_SAMPLE = 1 << 20
+# Identifier-like values whose leading zeros must survive type inference
+_ZERO_PADDED = re.compile(r"^0\d+$")
+
+# Rough in-memory cost of one pandas object cell on top of its text
+_OBJECT_OVERHEAD = 56
+# pandas chunk + Arrow copy + writer buffers held at the same time
+_COPIES_IN_FLIGHT = 3
+# Assumed row width when column widths are unknown (pandas fallback)
+_FALLBACK_ROW_BYTES = 4096
+
+Opener = Callable[[], BinaryIO]
+
+
+class _FileOpener:
+    """Opener for a file on disk; exposes ``path`` so readers can skip spooling."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def __call__(self) -> BinaryIO:
+        return self.path.open("rb")
+
+
+class Converter:
+    """
+    Converts the data files of a list of module rows to Parquet.
+
+    Parameters
+    ----------
+    db:
+        A :class:`~perustats.inei.utils.db_utils.DatabaseManager` used to
+        record per-module progress.
+    parquet_directory:
+        Root directory for the Parquet output (``3_parquet``).
+    workers:
+        Number of modules converted concurrently.
+    compression:
+        Parquet compression codec.
+    batch_size:
+        Rows per record batch for the streaming readers (CSV, DBF).
+    memory_limit_mb:
+        Memory ceiling per ``.dta`` / ``.sav`` conversion; the row chunk
+        size is derived from it and from the file's column widths.
+    processes:
+        Worker processes used by ``pyreadstat`` to read each chunk
+        (``1`` reads in-process). The memory ceiling is shared among them.
+    value_labels:
+        Store labelled variables as dictionary-encoded label categoricals.
+        When ``False`` the numeric codes are kept.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        parquet_directory: Path,
+        workers: int = 2,
+        compression: str = "zstd",
+        batch_size: int = 65_536,
+        memory_limit_mb: int = 512,
+        processes: int = 1,
+        value_labels: bool = True,
+    ) -> None:
+        self.db = db
+        self.parquet_dir = Path(parquet_directory)
+        self.workers = workers
+        self.compression = compression
+        self.batch_size = batch_size
+        self.memory_limit_mb = memory_limit_mb
+        self.processes = processes
+        self.value_labels = value_labels
+
+    # ------------------------------------------------------------------ #
+    # Public API                                                           #
+    # ------------------------------------------------------------------ #
+
+    def convert(self, rows: List[Dict], force: bool = False) -> None:
+        """
+        Convert the data members of every row in *rows* to Parquet.
+
+        Parameters
+        ----------
+        rows:
+            List of dicts with at least ``url``, ``year_ref``,
+            ``module_code``, ``path_download`` and ``path_extract`` keys.
+        force:
+            Rewrite Parquet files that already exist.
+        """
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task(
+                f"[cyan]Converting {len(rows)} modules to Parquet...", total=len(rows)
+            )
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {
+                    executor.submit(self._process_row, row, force): row for row in rows
+                }
+                for future in as_completed(futures):
+                    row = futures[future]
+                    try:
+                        future.result()
+                    except Exception as exc:
+                        console.print(f"[red]Error converting {row.get('url')}: {exc}")
+                    finally:
+                        progress.update(task, advance=1)
+
+    # ------------------------------------------------------------------ #
+    # Internal per-row pipeline                                            #
+    # ------------------------------------------------------------------ #
+
+    def _process_row(self, row: Dict, force: bool) -> None:
+        out_dir = self.parquet_dir / f"{row['year_ref']}_mod_{row['module_code']}"
+        names: Dict[str, int] = {}
+        failed = False
+        found = False
+
+        for member, opener in _data_members(row):
+            found = True
+            slug = slugify(Path(member).stem) or "data"
+            names[slug] = names.get(slug, 0) + 1
+            if names[slug] > 1:
+                slug = f"{slug}_{names[slug]}"
+            dest = out_dir / f"{slug}.parquet"
+            if dest.exists() and not force:
+                continue
+            try:
+                out_dir.mkdir(parents=True, exist_ok=True)
+                self._convert_member(member, opener, dest)
+            except Exception as exc:
+                failed = True
+                console.print(f"[red]Could not convert {member}: {exc}")
+
+        if not found:
+            console.print(f"[yellow]No data files found for {row.get('url')}")
+        elif not failed:
+            self.db.mark_converted(row["url"], str(out_dir))
+
+    def _convert_member(self, member: str, opener: Opener, dest: Path) -> None:
+        """Write *member* to *dest* through a temporary file + atomic rename."""
+        tmp = dest.with_name(dest.name + ".tmp")
+        ext = Path(member).suffix.lower()
+        try:
+            if ext == ".csv":
+                self._write_csv(opener, tmp)
+            elif ext == ".dbf":
+                self._write_dbf(opener, tmp)
+            elif ext in (".dta", ".sav"):
+                self._write_labelled(opener, tmp, ext)
+            else:
+                raise ValueError(f"unsupported format {ext!r}")
+            os.replace(tmp, dest)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------ #
+    # Format writers                                                       #
+    # ------------------------------------------------------------------ #
+
+    def _write_batches(self, schema, batches: Iterator, dest: Path) -> None:
+        import pyarrow.parquet as pq
+
+        with pq.ParquetWriter(dest, schema, compression=self.compression) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+
+    def _write_table(self, table, dest: Path) -> None:
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, dest, compression=self.compression)
+
+    def _write_csv(self, opener: Opener, dest: Path) -> None:
+        import pyarrow as pa
+        import pyarrow.csv as pv
+
+        with opener() as fh:
+            sample = fh.read(_CSV_SAMPLE)
+        encoding = _sniff_encoding(sample)
+        delimiter = _sniff_delimiter(sample, encoding)
+        codes = _zero_padded_columns(sample, encoding, delimiter)
+
+        def stream(column_types: Dict) -> None:
+            with opener() as fh:
+                reader = pv.open_csv(
+                    fh,
+                    read_options=pv.ReadOptions(encoding=encoding),
+                    parse_options=pv.ParseOptions(delimiter=delimiter),
+                    convert_options=pv.ConvertOptions(
+                        column_types=column_types, strings_can_be_null=True
+                    ),
+                )
+                self._write_batches(reader.schema, reader, dest)
+
+        try:
+            stream({name: pa.string() for name in codes})
+        except pa.ArrowInvalid:
+            # A later block contradicted the inferred types: keep text
+            with opener() as fh:
+                header = pv.open_csv(
+                    fh,
+                    read_options=pv.ReadOptions(encoding=encoding),
+                    parse_options=pv.ParseOptions(delimiter=delimiter),
+                ).schema.names
+            stream({name: pa.string() for name in header})
+
+    def _write_dbf(self, opener: Opener, dest: Path) -> None:
+        with opener() as fh:
+            schema, batches = read_dbf(fh, batch_size=self.batch_size)
+            self._write_batches(schema, batches, dest)
+
+    def _write_labelled(self, opener: Opener, dest: Path, ext: str) -> None:
+        """Chunked ``.dta`` / ``.sav`` conversion with a bounded memory use."""
+        try:
+            import pyreadstat
+        except ImportError:
+            if ext == ".sav":
+                raise ImportError(
+                    "Reading .sav files requires pyreadstat (pip install pyreadstat)."
+                ) from None
+            return self._write_stata_pandas(opener, dest)
+
+        read = pyreadstat.read_dta if ext == ".dta" else pyreadstat.read_sav
+        with _local_path(opener, dest.parent, ext) as path:
+            _, meta = read(str(path), metadataonly=True)
+            labels = (
+                _ValueLabels(meta.variable_value_labels) if self.value_labels else None
+            )
+            chunks = pyreadstat.read_file_in_chunks(
+                read,
+                str(path),
+                chunksize=self._chunk_rows(meta),
+                multiprocess=self.processes > 1,
+                num_processes=self.processes,
+            )
+            self._write_frames((df for df, _ in chunks), dest, labels)
+
+    def _write_stata_pandas(self, opener: Opener, dest: Path) -> None:
+        """Fallback without pyreadstat: pandas' chunked ``StataReader``."""
+        import pandas as pd
+
+        chunksize = max(
+            1_000,
+            self.memory_limit_mb * 2**20 // (_COPIES_IN_FLIGHT * _FALLBACK_ROW_BYTES),
+        )
+        with opener() as fh:
+            with pd.read_stata(
+                fh, chunksize=chunksize, convert_categoricals=False
+            ) as reader:
+                labels = None
+                if self.value_labels:
+                    sets = reader.value_labels()
+                    # Variable → label-set names; not public API, so optional
+                    names = getattr(reader, "_lbllist", None)
+                    columns = getattr(reader, "_varlist", None)
+                    if names and columns:
+                        labels = _ValueLabels(
+                            {
+                                col: sets[name]
+                                for col, name in zip(columns, names)
+                                if name in sets
+                            }
+                        )
+                self._write_frames(reader, dest, labels)
+
+    def _chunk_rows(self, meta) -> int:
+        """Rows per chunk so that one chunk stays under the memory ceiling."""
+        row_bytes = 0
+        for name in meta.column_names:
+            if meta.readstat_variable_types.get(name) == "string":
+                width = meta.variable_storage_width.get(name) or 8
+                row_bytes += _OBJECT_OVERHEAD + width
+            else:
+                row_bytes += 8
+        budget = self.memory_limit_mb * 2**20 // max(self.processes, 1)
+        return max(1_000, budget // (_COPIES_IN_FLIGHT * max(row_bytes, 1)))
+
+    def _write_frames(
+        self, frames, dest: Path, labels: Optional["_ValueLabels"] = None
+    ) -> None:
+        """Append every DataFrame of *frames* to one Parquet file."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        schema = None
+        try:
+            for df in frames:
+                table = _labelled_table(df, labels)
+                if writer is None:
+                    schema = pa.schema(
+                        [
+                            f.with_type(pa.string()) if pa.types.is_null(f.type) else f
+                            for f in table.schema
+                        ]
+                    )
+                    writer = pq.ParquetWriter(
+                        dest, schema, compression=self.compression
+                    )
+                writer.write_table(_conform(table, schema))
+            if writer is None:
+                self._write_table(pa.table({}), dest)
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+# ---------------------------------------------------------------------- #
+# Helpers                                                                  #
+# ---------------------------------------------------------------------- #
+
+
+def _data_members(row: Dict) -> Iterator[Tuple[str, Opener]]:
+    """Yield ``(name, opener)`` for every data file of *row*."""
+    zip_path = Path(row["path_download"])
+    extract_path = Path(row["path_extract"])
+
+    if zip_path.exists():
+        with zipfile.ZipFile(zip_path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and member_kind(info.filename) == "data":
+                    yield info.filename, lambda info=info: zf.open(info)
+    elif extract_path.exists():
+        for path in sorted(extract_path.rglob("*")):
+            if path.is_file() and member_kind(path.name) == "data":
+                yield str(path.relative_to(extract_path)), _FileOpener(path)
+
+
+def _sniff_encoding(sample: bytes) -> str:
+    if sample.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        # A multi-byte character cut at the end of the sample is fine
+        if exc.start < len(sample) - 3:
+            return "latin-1"
+    return "utf-8"
+
+
+def _sample_lines(sample: bytes, encoding: str) -> List[str]:
+    text = sample.decode(encoding, errors="ignore")
+    lines = text.splitlines()
+    # The last line is probably cut by the sample boundary
+    return lines[:-1] if len(sample) >= _CSV_SAMPLE and len(lines) > 1 else lines
+
+
+def _sniff_delimiter(sample: bytes, encoding: str) -> str:
+    lines = _sample_lines(sample, encoding)[:50]
+    try:
+        return csv.Sniffer().sniff("\n".join(lines), delimiters=",;|\t").delimiter
+    except csv.Error:
+        return ","
+
+
+def _zero_padded_columns(sample: bytes, encoding: str, delimiter: str) -> List[str]:
+    """Columns whose sampled values look like zero-padded codes (ubigeo…)."""
+    rows = csv.reader(_sample_lines(sample, encoding), delimiter=delimiter)
+    header = next(rows, [])
+    padded = set()
+    for values in rows:
+        for name, value in zip(header, values):
+            if _ZERO_PADDED.match(value.strip()):
+                padded.add(name)
+    return [name for name in header if name in padded]
+
+
+@contextlib.contextmanager
+def _local_path(opener: Opener, directory: Path, suffix: str) -> Iterator[Path]:
+    """
+    Path of the member on disk: the file itself when it already is one,
+    otherwise a temporary copy in *directory* (pyreadstat needs a path).
+    """
+    if isinstance(opener, _FileOpener):
+        yield opener.path
+        return
+    with tempfile.NamedTemporaryFile(suffix=suffix, dir=directory, delete=False) as tmp:
+        with opener() as fh:
+            shutil.copyfileobj(fh, tmp, 1 << 20)
+    try:
+        yield Path(tmp.name)
+    finally:
+        os.unlink(tmp.name)
+
+
+class _ValueLabels:
+    """
+    Turns labelled codes into dictionary arrays whose dictionary is stable
+    across chunks: declared labels first, then unlabelled codes as they show
+    up.
+    """
+
+    def __init__(self, value_labels: Dict[str, Dict]) -> None:
+        self.maps = value_labels
+        self.dictionaries = {
+            col: list(dict.fromkeys(str(label) for label in labels.values()))
+            for col, labels in value_labels.items()
+        }
+
+    def encode(self, col: str, values):
+        import pandas as pd
+        import pyarrow as pa
+
+        text = values.map(self.maps[col]).astype(object)
+        unlabelled = text.isna() & values.notna()
+        if unlabelled.any():
+            text[unlabelled] = values[unlabelled].map(_code_text)
+        dictionary = self.dictionaries[col]
+        known = set(dictionary)
+        dictionary.extend(
+            label for label in dict.fromkeys(text.dropna()) if label not in known
+        )
+        codes = pd.Categorical(text, categories=dictionary).codes
+        indices = pa.array(codes, type=pa.int32(), mask=codes < 0)
+        return pa.DictionaryArray.from_arrays(
+            indices, pa.array(dictionary, type=pa.string())
+        )
+
+
+def _code_text(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _labelled_table(df, labels: Optional[_ValueLabels]):
+    """Arrow table of a chunk with labelled columns dictionary-encoded."""
+    import pyarrow as pa
+
+    labelled = [c for c in df.columns if labels is not None and c in labels.maps]
+    table = _frame_to_table(df.drop(columns=labelled))
+    arrays = {name: table.column(name) for name in table.column_names}
+    for col in labelled:
+        arrays[col] = labels.encode(col, df[col])
+    return pa.table({col: arrays[col] for col in df.columns})
+
+
+def _conform(table, schema):
+    """Cast a chunk to the schema of the first chunk of the same file."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if table.schema.equals(schema):
+        return table
+    columns = []
+    for field in schema:
+        column = table.column(field.name)
+        if column.type != field.type:
+            if pa.types.is_dictionary(column.type):
+                column = column.cast(column.type.value_type)
+            if pa.types.is_dictionary(field.type):
+                column = pc.dictionary_encode(column.cast(field.type.value_type))
+                column = column.cast(field.type)
+            else:
+                column = column.cast(field.type, safe=False)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _frame_to_table(df):
+    """Arrow table from *df*; mixed-type object columns are stored as text."""
+    import pyarrow as pa
+
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].astype("string")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    # pandas categoricals: one index width and no ordering across chunks
+    target = pa.dictionary(pa.int32(), pa.string())
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type) and field.type != target:
+            column = table.column(i).cast(field.type.value_type).cast(pa.string())
+            table = table.set_column(
+                i, field.with_type(target), column.dictionary_encode()
+            )
+    return table.replace_schema_metadata(None)
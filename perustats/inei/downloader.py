@@ -3,22 +3,36 @@ Downloader: handles parallel ZIP download and extraction for a batch of modules.
 
 Responsibilities
 ----------------
-* Download ZIPs (parallel, with curl primary / requests fallback).
-* Validate ZIPs (single check after download; no redundant re-validation).
-* Extract ZIPs.
+* Download ZIPs (parallel, with curl primary / requests fallback) into
+  ``.part`` files that are resumed with HTTP ``Range`` requests and renamed
+  atomically once valid.
+* Validate ZIPs once after download and record a size / mtime / SHA-256
+  manifest; later runs trust an unchanged ``stat`` and only re-verify on
+  mismatch or on demand (``verify="deep"``).
+* Extract ZIPs on a separate worker pool as soon as each download is
+  verified, so network and disk are busy at the same time. Only the
+  members selected by a :class:`~perustats.inei.utils.zip_utils.MemberFilter`
+  are written, several members at a time.
+* Optionally share archives through a
+  :class:`~perustats.inei.blob_store.BlobStore`: a URL already stored is
+  linked into place instead of downloaded, and new downloads are added.
 * Update the :class:`~perustats.inei.utils.db_utils.DatabaseManager` at each
   step so progress is always persisted correctly.
 """
 
 from __future__ import annotations
 
+import json
+import math
+import os
+import re
 import subprocess
+import threading
 import zipfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Literal, Optional
 
-import requests
 from rich.console import Console
 from rich.progress import (
     BarColumn,
@@ -29,12 +43,25 @@ from rich.progress import (
     TimeElapsedColumn,
 )
 
+from .blob_store import BlobStore
 from .constants import BASE_URL
 from .utils.db_utils import DatabaseManager
-from .utils.file_utils import is_zip_valid
+from .utils.file_utils import file_hash, is_zip_valid
+from .utils.http_utils import TokenBucket
+from .utils.zip_utils import MemberFilter
 
 console = Console()
 
+# Resume attempts with requests after curl gave up
+_RESUME_ATTEMPTS = 3
+# Persist partial-download progress every this many bytes
+_MARK_EVERY = 8 << 20
+
+# Smallest byte range worth its own connection in segmented mode
+MIN_SEGMENT_SIZE = 16 << 20
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
 
 class Downloader:
     """
@@ -47,11 +74,42 @@ class Downloader:
         record per-file progress.
     parallel_jobs:
         Number of concurrent download threads.
+    extract_jobs:
+        Number of concurrent extraction threads. At most ``2 * extract_jobs``
+        verified ZIPs wait for extraction; further downloads block until one
+        is picked up, which bounds the disk space held by pending ZIPs.
+    segments:
+        Byte ranges fetched concurrently per ZIP. ``1`` (default) downloads
+        each file over a single stream; larger values split files of at
+        least ``2 * MIN_SEGMENT_SIZE`` bytes when the server honours
+        ``Range`` requests, and fall back to a single stream otherwise.
+    blob_store:
+        Optional :class:`~perustats.inei.blob_store.BlobStore` shared with
+        other fetchers. Archives it already holds are linked into place
+        rather than downloaded (unless ``force``); downloaded archives are
+        added to it.
+    limiter:
+        Optional :class:`~perustats.inei.utils.http_utils.TokenBucket`
+        capping the bandwidth of every stream, possibly shared with other
+        downloaders. Throttled downloads skip ``curl`` and stream through
+        requests.
     """
 
-    def __init__(self, db: DatabaseManager, parallel_jobs: int = 2) -> None:
+    def __init__(
+        self,
+        db: DatabaseManager,
+        parallel_jobs: int = 2,
+        extract_jobs: int = 2,
+        segments: int = 1,
+        blob_store: Optional[BlobStore] = None,
+        limiter: Optional[TokenBucket] = None,
+    ) -> None:
         self.db = db
         self.parallel_jobs = parallel_jobs
+        self.extract_jobs = extract_jobs
+        self.segments = segments
+        self.blob_store = blob_store
+        self.limiter = limiter
 
     # ------------------------------------------------------------------ #
     # Public API                                                           #
@@ -62,9 +120,17 @@ class Downloader:
         rows: List[Dict],
         force: bool = False,
         remove_zip_after_extract: bool = False,
+        verify: Literal["stat", "deep"] = "stat",
+        extract: bool = True,
+        member_filter: Optional[MemberFilter] = None,
+        member_jobs: int = 2,
     ) -> None:
         """
-        Download + extract every row in *rows* in parallel.
+        Download + extract every row in *rows* as a pipeline.
+
+        Downloads run on ``parallel_jobs`` threads; each ZIP is handed to
+        the extraction pool (``extract_jobs`` threads) as soon as it has
+        been verified.
 
         Parameters
         ----------
@@ -75,7 +141,23 @@ class Downloader:
             Re-download even if the ZIP already exists and is valid.
         remove_zip_after_extract:
             Delete the ZIP file after successful extraction.
+        verify:
+            ``"stat"`` trusts ZIPs whose size and mtime match the recorded
+            manifest; ``"deep"`` re-checks their content hash (and CRCs
+            when the hash differs).
+        extract:
+            When ``False`` only download and verify; the ZIPs are left for
+            :class:`~perustats.inei.converter.Converter` to read directly.
+        member_filter:
+            Extract only the members it accepts (everything when ``None``).
+            Members already on disk with the right size are skipped when
+            they came from the same ZIP (same SHA-256), so a wider filter on
+            a later run only adds the missing files.
+        member_jobs:
+            Threads extracting the members of one ZIP concurrently.
         """
+        pending = threading.BoundedSemaphore(2 * self.extract_jobs)
+
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -84,42 +166,64 @@ class Downloader:
             TimeElapsedColumn(),
             console=console,
         ) as progress:
-            task = progress.add_task(
+            download_task = progress.add_task(
                 f"[cyan]Downloading {len(rows)} zips...", total=len(rows)
             )
+            extract_task = progress.add_task(
+                "[cyan]Extracting modules...", total=len(rows), visible=extract
+            )
 
-            with ThreadPoolExecutor(max_workers=self.parallel_jobs) as executor:
-                futures = {
-                    executor.submit(self._process_row_download, row, force): row
-                    for row in rows
-                }
-                for future in as_completed(futures):
-                    row = futures[future]
-                    try:
-                        future.result()
-                    except Exception as exc:
-                        console.print(f"[red]Error processing {row.get('url')}: {exc}")
-                    finally:
-                        progress.update(task, advance=1)
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            TimeElapsedColumn(),
-            console=console,
-        ) as progress:
-            task = progress.add_task("[cyan]Extracting modules...", total=len(rows))
+            def extract_row(row: Dict) -> None:
+                try:
+                    self._process_row_extract(
+                        row, remove_zip_after_extract, member_filter, member_jobs
+                    )
+                except Exception as exc:
+                    console.print(f"[red]Error extracting {row.get('url')}: {exc}")
+                finally:
+                    pending.release()
+                    progress.update(extract_task, advance=1)
+
+            def download_row(row: Dict) -> bool:
+                ready = self._process_row_download(row, force, verify == "deep")
+                if not ready or not extract:
+                    return False
+                pending.acquire()
+                try:
+                    extractors.submit(extract_row, row)
+                except BaseException:
+                    pending.release()
+                    raise
+                return True
 
-            for row in rows:
-                self._process_row_extract(row, remove_zip_after_extract)
-                progress.update(task, advance=1)
+            # Leaving the outer block waits for the extractions queued by
+            # the downloaders, which finish first.
+            with ThreadPoolExecutor(max_workers=self.extract_jobs) as extractors:
+                with ThreadPoolExecutor(max_workers=self.parallel_jobs) as downloaders:
+                    futures = {
+                        downloaders.submit(download_row, row): row for row in rows
+                    }
+                    for future in as_completed(futures):
+                        row = futures[future]
+                        queued = False
+                        try:
+                            queued = future.result()
+                        except Exception as exc:
+                            console.print(
+                                f"[red]Error processing {row.get('url')}: {exc}"
+                            )
+                        finally:
+                            progress.update(download_task, advance=1)
+                        if not queued:
+                            # Nothing to extract for this row
+                            progress.update(extract_task, advance=1)
 
     # ------------------------------------------------------------------ #
     # Internal per-row pipeline                                            #
     # ------------------------------------------------------------------ #
 
-    def _process_row_download(self, row: Dict, force: bool) -> None:
+    def _process_row_download(self, row: Dict, force: bool, deep: bool = False) -> bool:
+        """Ensure a verified ZIP for *row*. Returns True when it is ready."""
         url_path: str = row["url"]  # relative path on INEI host
         full_url: str = BASE_URL["descarga"] + url_path
         zip_path = Path(row["path_download"])
@@ -127,93 +231,495 @@ class Downloader:
         # ── 1. Download ────────────────────────────────────────────────
         if force:
             self.db.reset_download(url_path)
-            if zip_path.exists():
-                zip_path.unlink()
+            for path in (zip_path, _part_path(zip_path)):
+                if path.exists():
+                    path.unlink()
 
-        if not zip_path.exists() or not is_zip_valid(zip_path):
-            ok = self._download(full_url, zip_path)
-            if not ok:
-                console.print(f"[red]Failed to download {url_path}")
-                return
-            self.db.mark_downloaded(url_path, str(zip_path))
-        else:
+        if zip_path.exists() and self._verify(url_path, zip_path, deep):
             # Already present and valid — just ensure the DB knows
+            if self.blob_store and self.blob_store.lookup(full_url) is None:
+                digest = self.db.get_manifest(url_path)["zip_sha256"]
+                self.blob_store.add(full_url, zip_path, digest)
             self.db.mark_downloaded(url_path, str(zip_path))
+            return True
+
+        # Another fetcher already stored this archive: link it into place
+        if self.blob_store and not force:
+            digest = self.blob_store.link(full_url, zip_path)
+            if digest is not None:
+                self._record_manifest(url_path, zip_path, digest)
+                self.db.mark_downloaded(url_path, str(zip_path))
+                return True
 
-    def _process_row_extract(self, row, remove_zip_after_extract: bool) -> None:
+        ok = self._download(full_url, zip_path, key=url_path)
+        if not ok:
+            console.print(f"[red]Failed to download {url_path}")
+            return False
+        digest = file_hash(zip_path)
+        if self.blob_store:
+            # May swap zip_path for a link to an identical stored archive
+            self.blob_store.add(full_url, zip_path, digest)
+        self._record_manifest(url_path, zip_path, digest)
+        self.db.mark_downloaded(url_path, str(zip_path))
+        return True
+
+    def _process_row_extract(
+        self,
+        row,
+        remove_zip_after_extract: bool,
+        member_filter: Optional[MemberFilter] = None,
+        member_jobs: int = 1,
+    ) -> bool:
+        """Extract the ZIP of *row*. Returns True when it is marked unzipped."""
         zip_path = Path(row["path_download"])
         extract_path = Path(row["path_extract"])
         url_path: str = row["url"]  # relative path on INEI host
 
         # ── 2. Extract ─────────────────────────────────────────────────
-        if not extract_path.exists():
-            extracted = self._extract(zip_path, extract_path)
+        # Re-run against the ZIP when present: members already on disk are
+        # skipped, so only files missing from an earlier (filtered) run are
+        # written. A ZIP that changed since (e.g. re-downloaded with force)
+        # rewrites every member, even those whose size did not change.
+        digest = None
+        if zip_path.exists() or not extract_path.exists():
+            manifest = self.db.get_manifest(url_path)
+            digest = manifest["zip_sha256"] if manifest else None
+            extracted_from = self.db.get_extract_digest(url_path)
+            same_zip = digest is not None and digest == extracted_from
+            extracted = self._extract(
+                zip_path, extract_path, member_filter, member_jobs, same_zip
+            )
             if not extracted:
-                return
-        self.db.mark_unzipped(url_path, str(extract_path))
+                return False
+        self.db.mark_unzipped(url_path, str(extract_path), digest)
 
         # ── 3. Optionally remove ZIP ───────────────────────────────────
         if remove_zip_after_extract and zip_path.exists():
             zip_path.unlink()
             self.db.mark_removed_zip(url_path)
+        return True
 
     # ------------------------------------------------------------------ #
     # Download helpers                                                     #
     # ------------------------------------------------------------------ #
 
-    def _download(self, url: str, dest: Path) -> bool:
+    def _download(self, url: str, dest: Path, key: Optional[str] = None) -> bool:
         """
-        Try curl first; fall back to requests on failure or corrupt ZIP.
+        Download *url* into ``<dest>.part`` and rename it to *dest* once it
+        is a valid ZIP.
+
+        An existing ``.part`` file is resumed: curl first (``-C -``), then
+        requests with a ``Range`` request guarded by ``If-Range`` so a file
+        that changed on the server restarts instead of being corrupted.
+        Progress is recorded in the database under *key* so a later run
+        continues where this one stopped.
         Returns True only when *dest* contains a valid ZIP.
         """
         dest.parent.mkdir(parents=True, exist_ok=True)
+        part = _part_path(dest)
 
-        # ── attempt 1: curl ────────────────────────────────────────────
-        try:
-            subprocess.run(
-                [
-                    "curl",
-                    "-s",
-                    "-L",
-                    url,
-                    "-o",
-                    str(dest),
-                    "-H",
-                    "Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                    "-H",
-                    "Accept-Language: es,en;q=0.9",
-                    "-H",
-                    "Connection: keep-alive",
-                ],
-                check=True,
-            )
-        except subprocess.CalledProcessError:
-            pass  # fall through to requests
+        # A complete .part left behind by an interrupted rename
+        if part.exists() and is_zip_valid(part):
+            return self._finalize(part, dest, key)
 
-        if is_zip_valid(dest):
-            return True
+        state = (self.db.get_partial(key) if key else None) or {}
 
-        # ── attempt 2: requests ────────────────────────────────────────
-        if dest.exists():
-            dest.unlink()
-        try:
-            resp = requests.get(url, stream=True, timeout=120)
+        # ── segmented mode ─────────────────────────────────────────────
+        if self.segments > 1 and (state.get("segments") or not part.exists()):
+            done = self._download_segmented(url, part, key, state)
+            if done and is_zip_valid(part):
+                return self._finalize(part, dest, key)
+            if done is False:
+                return False  # segment state kept for the next run
+            # Unsupported, changed remotely or corrupt: single stream
+            part.unlink(missing_ok=True)
+            if key:
+                self.db.clear_partial(key)
+            state = {}
+        elif state.get("segments"):
+            # Preallocated by an earlier segmented run: cannot be appended to
+            part.unlink(missing_ok=True)
+            if key:
+                self.db.clear_partial(key)
+            state = {}
+
+        # ── attempt 1: curl (unthrottled only) ─────────────────────────
+        cmd = [
+            "curl",
+            "-s",
+            "-L",
+            "--fail",
+            "-C",
+            "-",
+            url,
+            "-o",
+            str(part),
+            "-H",
+            "Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "-H",
+            "Accept-Language: es,en;q=0.9",
+            "-H",
+            "Connection: keep-alive",
+        ]
+        if state.get("remote_validator"):
+            # Make curl refuse to append to a file that changed remotely
+            cmd += ["-H", f"If-Range: {state['remote_validator']}"]
+        if self.limiter is None:
+            try:
+                subprocess.run(cmd, check=True)
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                pass  # fall through to requests
+
+            if is_zip_valid(part):
+                return self._finalize(part, dest, key)
+            self._record_partial(key, part)
+
+        # ── attempt 2: requests with Range ─────────────────────────────
+        for _ in range(_RESUME_ATTEMPTS):
+            try:
+                self._resume(url, part, key)
+            except Exception:
+                continue  # keep the .part and resume from its new size
+            if is_zip_valid(part):
+                return self._finalize(part, dest, key)
+            # The whole body arrived but is not a ZIP: start over
+            part.unlink(missing_ok=True)
+            if key:
+                self.db.clear_partial(key)
+        return False
+
+    def _resume(self, url: str, part: Path, key: Optional[str]) -> None:
+        """Append the missing tail of *url* to *part* (or restart it)."""
+        import requests
+
+        state = (self.db.get_partial(key) if key else None) or {}
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if state.get("remote_validator"):
+                headers["If-Range"] = state["remote_validator"]
+
+        with requests.get(url, headers=headers, stream=True, timeout=120) as resp:
+            if resp.status_code == 416:
+                # .part already covers the remote file but is not valid
+                return
             resp.raise_for_status()
-            with open(dest, "wb") as fh:
-                for chunk in resp.iter_content(8192):
-                    fh.write(chunk)
-        except Exception:
-            return False
 
-        return is_zip_valid(dest)
+            match = _CONTENT_RANGE.match(resp.headers.get("Content-Range", ""))
+            if resp.status_code == 206 and match and int(match.group(1)) == offset:
+                mode = "ab"
+                total = match.group(3)
+                total = int(total) if total != "*" else None
+            else:
+                # Server ignored the range or the file changed: restart
+                offset, mode = 0, "wb"
+                total = resp.headers.get("Content-Length")
+                total = int(total) if total else None
+
+            validator = _validator(resp.headers)
+            written, unsaved = offset, 0
+            with open(part, mode) as fh:
+                try:
+                    for chunk in resp.iter_content(1 << 16):
+                        if self.limiter is not None:
+                            self.limiter.consume(len(chunk))
+                        fh.write(chunk)
+                        written += len(chunk)
+                        unsaved += len(chunk)
+                        if key and unsaved >= _MARK_EVERY:
+                            fh.flush()
+                            self.db.mark_partial(
+                                key, str(part), written, total, validator
+                            )
+                            unsaved = 0
+                finally:
+                    if key:
+                        fh.flush()
+                        self.db.mark_partial(key, str(part), written, total, validator)
+
+    # ------------------------------------------------------------------ #
+    # Segmented download                                                   #
+    # ------------------------------------------------------------------ #
+
+    def _download_segmented(
+        self, url: str, part: Path, key: Optional[str], state: Dict
+    ) -> Optional[bool]:
+        """
+        Fetch *url* as concurrent byte ranges into a preallocated *part*.
+
+        Returns True when every range arrived, False when some range failed
+        (its progress is kept for the next run) and None when the server
+        does not support ranges or the file changed, so the caller should
+        fall back to a single stream.
+        """
+        import requests
+
+        layout = json.loads(state["segments"]) if state.get("segments") else None
+        if layout and part.exists() and part.stat().st_size == state["content_length"]:
+            size, validator = state["content_length"], state["remote_validator"]
+        else:
+            probed = _probe_ranges(url)
+            if probed is None:
+                return None
+            size, validator = probed
+            count = min(self.segments, size // MIN_SEGMENT_SIZE)
+            if count < 2:
+                return None
+            step = math.ceil(size / count)
+            layout = [
+                [start, min(start + step, size) - 1, 0]
+                for start in range(0, size, step)
+            ]
+            with open(part, "wb") as fh:
+                fh.truncate(size)  # preallocate (sparse where supported)
+
+        lock = threading.Lock()
+        # Set when a range is rejected: the other segments stop early
+        stop = threading.Event()
+
+        def save() -> None:
+            if key:
+                with lock:
+                    received = sum(seg[2] for seg in layout)
+                    self.db.mark_partial(
+                        key, str(part), received, size, validator, json.dumps(layout)
+                    )
+
+        def fetch(seg: List[int]) -> None:
+            start, end = seg[0], seg[1]
+            for attempt in range(_RESUME_ATTEMPTS):
+                offset = start + seg[2]
+                if offset > end or stop.is_set():
+                    return
+                headers = {"Range": f"bytes={offset}-{end}"}
+                if validator:
+                    headers["If-Range"] = validator
+                try:
+                    with requests.get(
+                        url, headers=headers, stream=True, timeout=120
+                    ) as resp:
+                        match = _CONTENT_RANGE.match(
+                            resp.headers.get("Content-Range", "")
+                        )
+                        if (
+                            resp.status_code != 206
+                            or not match
+                            or int(match.group(1)) != offset
+                            or match.group(3) != str(size)
+                        ):
+                            raise _RangeRejected(resp.status_code)
+                        with open(part, "r+b") as fh:
+                            fh.seek(offset)
+                            unsaved = 0
+                            for chunk in resp.iter_content(1 << 16):
+                                if stop.is_set():
+                                    break
+                                chunk = chunk[: end + 1 - (start + seg[2])]
+                                if self.limiter is not None:
+                                    self.limiter.consume(len(chunk))
+                                fh.write(chunk)
+                                seg[2] += len(chunk)
+                                unsaved += len(chunk)
+                                if unsaved >= _MARK_EVERY:
+                                    fh.flush()
+                                    save()
+                                    unsaved = 0
+                                if start + seg[2] > end:
+                                    break
+                except _RangeRejected:
+                    raise
+                except Exception:
+                    if attempt == _RESUME_ATTEMPTS - 1 and not stop.is_set():
+                        raise
+                finally:
+                    save()
+                if start + seg[2] > end or stop.is_set():
+                    return
+            raise IOError(f"range {start}-{end} incomplete")
+
+        save()
+        ok = True
+        with ThreadPoolExecutor(max_workers=len(layout)) as pool:
+            futures = [
+                pool.submit(fetch, seg) for seg in layout if seg[2] <= seg[1] - seg[0]
+            ]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except _RangeRejected:
+                    # Stop the running segments and drop the queued ones
+                    # before leaving the pool, which waits for them
+                    stop.set()
+                    for other in futures:
+                        other.cancel()
+                    break
+                except Exception:
+                    ok = False
+        return None if stop.is_set() else ok
+
+    def _record_partial(self, key: Optional[str], part: Path) -> None:
+        if key and part.exists():
+            self.db.mark_partial(key, str(part), part.stat().st_size)
+
+    def _finalize(self, part: Path, dest: Path, key: Optional[str]) -> bool:
+        """Atomically move a verified ``.part`` file into place."""
+        os.replace(part, dest)
+        if key:
+            self.db.clear_partial(key)
+        return True
+
+    # ------------------------------------------------------------------ #
+    # Integrity manifest                                                   #
+    # ------------------------------------------------------------------ #
+
+    def _verify(self, key: str, zip_path: Path, deep: bool = False) -> bool:
+        """
+        Return True when *zip_path* is a valid ZIP.
+
+        An unchanged size and mtime against the manifest is trusted without
+        reading the file. Otherwise (or when *deep*) the SHA-256 is compared
+        with the manifest, and ``testzip`` only runs when it differs.
+        """
+        stat = zip_path.stat()
+        manifest = self.db.get_manifest(key)
+        if (
+            manifest
+            and not deep
+            and manifest["zip_size"] == stat.st_size
+            and manifest["zip_mtime_ns"] == stat.st_mtime_ns
+        ):
+            return True
+
+        digest = file_hash(zip_path)
+        if not (manifest and manifest["zip_sha256"] == digest):
+            if not is_zip_valid(zip_path):
+                return False
+        self.db.record_manifest(key, stat.st_size, stat.st_mtime_ns, digest)
+        return True
+
+    def _record_manifest(
+        self, key: str, zip_path: Path, digest: Optional[str] = None
+    ) -> None:
+        """
+        Fingerprint a ZIP that :meth:`_download` has just validated.
+        *digest* skips hashing when the SHA-256 is already known.
+        """
+        stat = zip_path.stat()
+        self.db.record_manifest(
+            key, stat.st_size, stat.st_mtime_ns, digest or file_hash(zip_path)
+        )
 
-    def _extract(self, zip_path: Path, dest: Path) -> bool:
-        """Extract *zip_path* into *dest*. Returns True on success."""
+    def _extract(
+        self,
+        zip_path: Path,
+        dest: Path,
+        member_filter: Optional[MemberFilter] = None,
+        member_jobs: int = 1,
+        skip_existing: bool = True,
+    ) -> bool:
+        """
+        Extract the members of *zip_path* accepted by *member_filter* into
+        *dest*. Returns True on success.
+
+        With *skip_existing*, members already in *dest* with their full size
+        are left as they are; pass ``False`` when *dest* may hold files of
+        another version of the ZIP.
+
+        Members are split into *member_jobs* groups of similar total size;
+        each group is extracted by its own thread through its own
+        :class:`zipfile.ZipFile` handle, so decompression runs in parallel.
+        """
         try:
             dest.mkdir(parents=True, exist_ok=True)
             with zipfile.ZipFile(zip_path, "r") as zf:
-                zf.extractall(dest)
+                todo = [
+                    info
+                    for info in zf.infolist()
+                    if not info.is_dir()
+                    and (member_filter is None or member_filter.accepts(info))
+                    and not (skip_existing and _already_extracted(info, dest))
+                ]
+            if not todo:
+                return True
+
+            groups: List[List[zipfile.ZipInfo]] = [
+                [] for _ in range(max(1, min(member_jobs, len(todo))))
+            ]
+            loads = [0] * len(groups)
+            for info in sorted(todo, key=lambda i: i.file_size, reverse=True):
+                i = loads.index(min(loads))
+                groups[i].append(info)
+                loads[i] += info.file_size
+
+            if len(groups) == 1:
+                _extract_members(zip_path, groups[0], dest)
+            else:
+                with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+                    for future in [
+                        pool.submit(_extract_members, zip_path, group, dest)
+                        for group in groups
+                    ]:
+                        future.result()
             return True
         except Exception as exc:
             console.print(f"[red]Extraction error ({zip_path.name}): {exc}")
             return False
+
+
+class _RangeRejected(Exception):
+    """The server answered a range request with the wrong range or status."""
+
+
+def _probe_ranges(url: str):
+    """
+    Return ``(size, validator)`` when *url* serves byte ranges, else None.
+
+    A one-byte ``Range`` request is used rather than ``HEAD`` +
+    ``Accept-Ranges``: it proves the server really answers with ``206``.
+    """
+    import requests
+
+    try:
+        with requests.get(
+            url, headers={"Range": "bytes=0-0"}, stream=True, timeout=30
+        ) as resp:
+            match = _CONTENT_RANGE.match(resp.headers.get("Content-Range", ""))
+            if resp.status_code != 206 or not match or match.group(3) == "*":
+                return None
+            return int(match.group(3)), _validator(resp.headers)
+    except Exception:
+        return None
+
+
+def _extract_members(
+    zip_path: Path, members: List[zipfile.ZipInfo], dest: Path
+) -> None:
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        for info in members:
+            try:
+                zf.extract(info, dest)
+            except FileExistsError:
+                # Another thread created a shared parent directory in between
+                zf.extract(info, dest)
+
+
+def _already_extracted(info: zipfile.ZipInfo, dest: Path) -> bool:
+    """Whether *info* sits in *dest* with its full uncompressed size."""
+    try:
+        return (dest / info.filename).stat().st_size == info.file_size
+    except (OSError, ValueError):
+        return False
+
+
+def _part_path(dest: Path) -> Path:
+    """Temporary download path used until *dest* is verified."""
+    return dest.with_name(dest.name + ".part")
+
+
+def _validator(headers) -> Optional[str]:
+    """Strong validator usable in ``If-Range`` (weak ETags are not allowed)."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
@@ -0,0 +1,242 @@
+"""
+Survey-weighted estimates over lazy frames of the lake.
+
+Responsibilities
+----------------
+* Reduce the rows of a :func:`~perustats.inei.fetcher.INEIFetcher.scan` or
+  :func:`~perustats.inei.fetcher.INEIFetcher.join` frame to weighted sums
+  per year, domain, stratum and PSU, with polars' streaming engine: Parquet
+  row groups are read one batch at a time and only the sums are kept.
+* Turn the sums into means, totals and proportions with Taylor-linearized
+  standard errors (with-replacement PSUs within strata), confidence
+  intervals and coefficients of variation.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import TYPE_CHECKING, List, Optional, Sequence, Union
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    import polars as pl
+
+STATISTICS = ("mean", "total", "proportion")
+
+RESULT_COLUMNS = [
+    "variable",
+    "category",
+    "estimate",
+    "se",
+    "cv",
+    "ci_low",
+    "ci_high",
+    "n",
+    "n_psu",
+    "weight_sum",
+]
+
+
+@dataclass(frozen=True)
+class Design:
+    """
+    Sampling design of a survey file.
+
+    Attributes
+    ----------
+    weight: Expansion factor column (e.g. ``'factor07'``, ``'fac500a'``).
+    strata: Stratum column (e.g. ``'estrato'``); one stratum when omitted.
+    psu:    Primary sampling unit column (e.g. ``'conglome'``); each row is
+            its own PSU when omitted.
+    """
+
+    weight: str
+    strata: Optional[str] = None
+    psu: Optional[str] = None
+
+    @property
+    def columns(self) -> List[str]:
+        return [c for c in (self.weight, self.strata, self.psu) if c is not None]
+
+
+def estimate(
+    lf: "pl.LazyFrame",
+    variables: Union[str, Sequence[str]],
+    design: Design,
+    by: Optional[Sequence[str]] = None,
+    stat: str = "mean",
+    level: float = 0.95,
+) -> pd.DataFrame:
+    """
+    Weighted mean, total or proportion of *variables* per year and domain.
+
+    Parameters
+    ----------
+    lf:
+        Rows to estimate from. When it has a ``year`` column every year is
+        estimated separately.
+    variables:
+        Numeric variables (``'mean'``/``'total'``) or categorical ones
+        (``'proportion'``, one row per category).
+    design:
+        Weight, strata and PSU columns.
+    by:
+        Domain columns (e.g. ``['dominio']`` or ``['ubigeo']``); national
+        estimates when omitted. Subpopulations should be domains rather
+        than filters on *lf*, so that their standard errors account for
+        every PSU of the sample.
+    stat:
+        ``'mean'``, ``'total'`` or ``'proportion'``.
+    level:
+        Confidence level of ``ci_low``/``ci_high``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        ``year`` (when present), the *by* columns, then
+        :data:`RESULT_COLUMNS`. Rows with a missing value of a variable or
+        of the weight are left out of that variable's estimate. Strata with
+        a single PSU add nothing to the variance.
+    """
+    import polars as pl
+
+    if stat not in STATISTICS:
+        raise ValueError(f"Unsupported statistic {stat!r}; use {STATISTICS}")
+    variables = [variables] if isinstance(variables, str) else list(variables)
+    by = list(by or [])
+    names = lf.collect_schema().names()
+    missing = {*variables, *by, *design.columns} - set(names)
+    if missing:
+        raise ValueError(f"Columns not found: {sorted(missing)}")
+    years = ["year"] if "year" in names and "year" not in by else []
+    groups = years + by
+
+    # ── 1. One indicator per estimated quantity ───────────────────────
+    if stat == "proportion":
+        labels, indicators = _category_indicators(lf, variables)
+    else:
+        labels = [(v, None) for v in variables]
+        indicators = [pl.col(v).cast(pl.Float64) for v in variables]
+
+    stratum = pl.col(design.strata) if design.strata else pl.lit(0)
+    rows = lf.filter(pl.col(design.weight).is_not_null()).select(
+        *groups,
+        stratum.alias("_stratum"),
+        *([pl.col(design.psu).alias("_psu")] if design.psu else []),
+        pl.col(design.weight).cast(pl.Float64).alias("_w"),
+        *[expr.alias(f"_y{k}") for k, expr in enumerate(indicators)],
+    )
+    psu = ["_psu"] if design.psu else []
+
+    # ── 2. Weighted sums per PSU, then per stratum ────────────────────
+    long = (
+        rows.unpivot(
+            index=groups + ["_stratum", *psu, "_w"],
+            on=[f"_y{k}" for k in range(len(indicators))],
+            variable_name="_k",
+            value_name="_y",
+        )
+        .filter(pl.col("_y").is_not_null())
+        .with_columns((pl.col("_w") * pl.col("_y")).alias("_wy"))
+    )
+    keys = groups + ["_k", "_stratum"]
+    if psu:
+        units = long.group_by(keys + psu).agg(
+            pl.col("_wy").sum().alias("Y"),
+            pl.col("_w").sum().alias("W"),
+            pl.len().alias("n"),
+        )
+    else:
+        units = long.select(
+            *keys,
+            pl.col("_wy").alias("Y"),
+            pl.col("_w").alias("W"),
+            pl.lit(1, dtype=pl.UInt32).alias("n"),
+        )
+    strata = units.group_by(keys).agg(
+        pl.col("Y").sum(),
+        pl.col("W").sum(),
+        (pl.col("Y") ** 2).sum().alias("YY"),
+        (pl.col("W") ** 2).sum().alias("WW"),
+        (pl.col("Y") * pl.col("W")).sum().alias("YW"),
+        pl.col("n").sum(),
+        pl.len().alias("n_psu"),
+    )
+    # PSUs per stratum over the whole sample, not only the domain
+    sample = rows.group_by(years + ["_stratum"]).agg(
+        (pl.col("_psu").n_unique() if psu else pl.len()).alias("n_h")
+    )
+    strata, sample = pl.collect_all([strata, sample], engine="streaming")
+
+    # ── 3. Estimates and linearized variances ─────────────────────────
+    strata = strata.join(sample, on=years + ["_stratum"], how="left")
+    domain = groups + ["_k"]
+    totals = strata.group_by(domain).agg(
+        pl.col("Y").sum().alias("Y_d"),
+        pl.col("W").sum().alias("W_d"),
+        pl.col("n").sum(),
+        pl.col("n_psu").sum(),
+    )
+    if stat == "total":
+        totals = totals.with_columns(pl.col("Y_d").alias("estimate"))
+        # Linearized values are the PSU totals themselves
+        ss = pl.col("YY") - pl.col("Y") ** 2 / pl.col("n_h")
+    else:
+        totals = totals.with_columns((pl.col("Y_d") / pl.col("W_d")).alias("estimate"))
+        r = pl.col("estimate")
+        # PSU values Y - r*W, scaled by the domain weight below
+        ss = (
+            pl.col("YY")
+            - 2 * r * pl.col("YW")
+            + r**2 * pl.col("WW")
+            - (pl.col("Y") - r * pl.col("W")) ** 2 / pl.col("n_h")
+        ) / pl.col("W_d") ** 2
+    factor = (
+        pl.when(pl.col("n_h") > 1)
+        .then(pl.col("n_h") / (pl.col("n_h") - 1))
+        .otherwise(0.0)
+    )
+    variance = (
+        strata.join(totals.select(domain + ["estimate", "W_d"]), on=domain)
+        .group_by(domain)
+        .agg((factor * ss).sum().clip(lower_bound=0).alias("variance"))
+    )
+
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    se = pl.col("variance").sqrt()
+    result = (
+        totals.join(variance, on=domain)
+        .with_columns(se.alias("se"))
+        .with_columns(
+            (pl.col("se") / pl.col("estimate").abs()).alias("cv"),
+            (pl.col("estimate") - z * pl.col("se")).alias("ci_low"),
+            (pl.col("estimate") + z * pl.col("se")).alias("ci_high"),
+            pl.col("W_d").alias("weight_sum"),
+        )
+    )
+
+    # Quantities in the order of *variables* and their sorted categories
+    result = result.with_columns(pl.col("_k").str.slice(2).cast(pl.Int64))
+    out = result.sort(groups + ["_k"]).to_pandas()
+    k = out.pop("_k")
+    out["variable"] = [labels[i][0] for i in k]
+    out["category"] = [labels[i][1] for i in k]
+    return out[groups + RESULT_COLUMNS]
+
+
+def _category_indicators(lf: "pl.LazyFrame", variables: List[str]):
+    """``(variable, category)`` labels and 0/1 indicator expressions."""
+    import polars as pl
+
+    found = pl.collect_all(
+        [lf.select(pl.col(v).drop_nulls().unique().sort()) for v in variables],
+        engine="streaming",
+    )
+    labels, indicators = [], []
+    for v, frame in zip(variables, found):
+        for value in frame.to_series():
+            labels.append((v, str(value)))
+            indicators.append((pl.col(v) == value).cast(pl.Float64))
+    return labels, indicators
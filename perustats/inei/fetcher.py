@@ -10,12 +10,58 @@ Typical usage
 ...     .fetch_modules()
 ...     .download(module_codes=[1, 13, 22])
 ...     .organize(organize_by="year"))
+
+Skip extraction and stream the data files straight to Parquet:
+
+>>> fetcher.fetch_modules().download(extract=False).convert()
+
+Stack every year of a module into one harmonized, partitioned dataset:
+
+>>> fetcher.fetch_modules().download(extract=False).build_lake()
+
+Read a few variables of a module across years without loading whole files:
+
+>>> lf = fetcher.scan(5, columns=["p507", "i524a1"], years=range(2015, 2024),
+...                   filters={"p507": [3, 4]})
+>>> lf.collect()
+
+Inspect what a module contains before downloading it:
+
+>>> fetcher.fetch_modules().inspect(module_codes=[1, 34]).members_df
+
+Find which modules and years carry a variable, from file headers only:
+
+>>> fetcher.fetch_modules().download(extract=False).index_variables()
+>>> fetcher.find_variable("p208a")
+>>> fetcher.search_variables("lengua materna")
+
+Join modules on the household/person keys across years:
+
+>>> lf = fetcher.join([2, 5, 34], columns={5: ["p507"], 34: ["pobreza"]})
+>>> lf.collect(engine="streaming")
+
+Survey-weighted estimates by domain and year, streamed from the lake:
+
+>>> fetcher.estimate(34, "gashog2d", weight="factor07", by=["dominio"],
+...                  strata="estrato", psu="conglome")
 """
 
 from __future__ import annotations
 
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Literal, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import pandas as pd
 from rich.console import Console
@@ -28,15 +74,27 @@ from rich.progress import (
     TimeElapsedColumn,
 )
 
-from .constants import DEFAULT_FORMAT_PREFERENCE
+from .blob_store import BlobStore
+from .constants import BASE_URL, DEFAULT_FORMAT_PREFERENCE
 from .downloader import Downloader
-from .module_fetcher import ModuleFetcher
+from .module_fetcher import DEFAULT_LISTING_CONNECTIONS, ModuleFetcher
 from .organizer import Organizer
 from .surveys.registry import Survey, registry
 from .utils.db_utils import DatabaseManager
+from .utils.zip_utils import MemberFilter, list_remote_members
+
+if TYPE_CHECKING:
+    import polars as pl
+
+    from .lake import LakeBuilder
+
+# converter, lake, joins, variables and estimation pull in pyarrow (and
+# polars); they are imported by the methods that use them
 
 console = Console()
 
+_FILTER_OPS = ("==", "!=", "<", "<=", ">", ">=", "in", "not in")
+
 
 class INEIFetcher:
     """
@@ -56,11 +114,27 @@ class INEIFetcher:
         Subdirectory inside *master_directory* used to organize INEI data.
     parallel_jobs:
         Number of concurrent download threads.
+    extract_jobs:
+        Number of concurrent extraction threads. Each ZIP is extracted as
+        soon as its download is verified.
+    segments:
+        Byte ranges fetched concurrently per large ZIP (``1`` disables
+        segmented downloads). Falls back to a single stream when the
+        server does not support ``Range`` requests.
     preferred_formats:
         Ordered list of format preferences. The first format with a valid URL
         for a given module is used.
     sql_file:
         Path (relative to *master_directory*) for the SQLite progress database.
+    blob_store:
+        Optional content-addressed archive store (a directory or a
+        :class:`~perustats.inei.blob_store.BlobStore`) shared across
+        surveys, roots and runs. ZIPs it holds are linked into ``0_zips``
+        instead of downloaded again.
+    db:
+        An open :class:`~perustats.inei.utils.db_utils.DatabaseManager` to
+        use instead of opening *sql_file* (e.g. one shared by several
+        fetchers).
     """
 
     def __init__(
@@ -70,12 +144,17 @@ class INEIFetcher:
         master_directory: str = "./data/",
         inei_directory: str = "microodatos_inei",
         parallel_jobs: int = 2,
+        extract_jobs: int = 2,
+        segments: int = 1,
         preferred_formats: List[Literal["stata", "spss", "csv", "dbf"]] = None,
         sql_file: Optional[str] = None,
+        blob_store: Union[str, Path, BlobStore, None] = None,
+        db: Optional[DatabaseManager] = None,
     ) -> None:
         self.survey: Survey = registry.get(survey)
         self.years: List[int] = list(years)
         self.parallel_jobs = parallel_jobs
+        self.extract_jobs = extract_jobs
         self.preferred_formats = preferred_formats or DEFAULT_FORMAT_PREFERENCE
 
         # ── Directory layout ───────────────────────────────────────────
@@ -84,32 +163,68 @@ class INEIFetcher:
             "zips": root / "0_zips",
             "unzip": root / "1_unzipped",
             "organized": root / "2_organized",
+            "parquet": root / "3_parquet",
         }
         for d in self._dirs.values():
             d.mkdir(parents=True, exist_ok=True)
 
+        self._lake_dir = Path(master_directory) / inei_directory / "lake"
+
         # ── Database ───────────────────────────────────────────────────
-        db_path = Path(master_directory) / (sql_file or "referrer.db")
-        self.db = DatabaseManager(db_path)
+        if db is None:
+            db = DatabaseManager(Path(master_directory) / (sql_file or "referrer.db"))
+        self.db = db
 
         # ── Sub-components ─────────────────────────────────────────────
         self._module_fetcher = ModuleFetcher(self.survey)
-        self._downloader = Downloader(self.db, parallel_jobs)
+        if blob_store is not None and not isinstance(blob_store, BlobStore):
+            blob_store = BlobStore(Path(blob_store))
+        self._downloader = Downloader(
+            self.db, parallel_jobs, extract_jobs, segments, blob_store=blob_store
+        )
 
         # Populated by fetch_modules()
         self.modules_df: Optional[pd.DataFrame] = None
+        # Populated by inspect()
+        self.members_df: Optional[pd.DataFrame] = None
+        # Populated by build_lake()
+        self.schema_map: Optional[pd.DataFrame] = None
+        # Populated by organize()
+        self.organize_plan: Optional[pd.DataFrame] = None
+        # Populated by index_variables()
+        self.variables_df: Optional[pd.DataFrame] = None
 
     # ------------------------------------------------------------------ #
     # Step 1 – fetch module listings                                       #
     # ------------------------------------------------------------------ #
 
-    def fetch_modules(self) -> "INEIFetcher":
+    def fetch_modules(
+        self, max_connections: int = DEFAULT_LISTING_CONNECTIONS
+    ) -> "INEIFetcher":
         """
         Retrieve (or load from cache) the module list for every requested year.
 
+        Years missing from the cache are listed concurrently over one pooled
+        keep-alive connection pool of at most *max_connections* connections.
+        Years that list no module are skipped.
+
         Returns self for method chaining.
+
+        Raises
+        ------
+        ValueError
+            When no module is listed for any of the years.
         """
         results: List[pd.DataFrame] = []
+        missing: List[int] = []
+        for year in self.years:
+            cached = self.db.get_cached_modules(
+                self.survey.code, year, self.survey.period
+            )
+            if cached is not None:
+                results.append(cached)
+            else:
+                missing.append(year)
 
         with Progress(
             SpinnerColumn(),
@@ -122,38 +237,30 @@ class INEIFetcher:
             task = progress.add_task(
                 f"[cyan]Fetching [yellow]{self.survey.code.upper()}[cyan] modules…",
                 total=len(self.years),
+                completed=len(self.years) - len(missing),
+            )
+            listings = self._module_fetcher.fetch_many(
+                missing,
+                max_connections=max_connections,
+                on_done=lambda _: progress.update(task, advance=1),
             )
-            for year in self.years:
-                cached = self.db.get_cached_modules(
-                    self.survey.code, year, self.survey.period
+
+        for year in missing:
+            df = listings.get(year)
+            if df is None or df.empty:
+                console.print(
+                    f"[red]No modules listed for {self.survey.code.upper()} {year}"
                 )
-                if cached is not None:
-                    results.append(cached)
-                else:
-                    df = self._module_fetcher.fetch(year)
-                    df["module_code"] = df["module_code"].astype(str).str.zfill(4)
-                    df["url"] = (
-                        df[list(self.preferred_formats)].bfill(axis=1).iloc[:, 0]
-                    )
-                    # Compute local paths
-                    df["path_download"] = df.apply(
-                        lambda r: str(
-                            self._dirs["zips"]
-                            / f"{r['year_ref']}_mod_{r['module_code']}.zip"
-                        ),
-                        axis=1,
-                    )
-                    df["path_extract"] = df.apply(
-                        lambda r: str(
-                            self._dirs["unzip"]
-                            / f"{r['year_ref']}_mod_{r['module_code']}"
-                        ),
-                        axis=1,
-                    )
-                    self.db.insert_modules(df)
-                    results.append(df)
-                progress.update(task, advance=1)
+                continue
+            df = self._prepare_listing(df)
+            self.db.insert_modules(df)
+            results.append(df)
 
+        if not results:
+            raise ValueError(
+                f"No modules listed for {self.survey.code.upper()} in any of "
+                f"the years {self.years}."
+            )
         df = pd.concat(results, ignore_index=True).drop_duplicates()
 
         self.modules_df = df
@@ -163,6 +270,78 @@ class INEIFetcher:
         )
         return self
 
+    # ------------------------------------------------------------------ #
+    # Step 1b – inspect (optional)                                         #
+    # ------------------------------------------------------------------ #
+
+    def inspect(
+        self, module_codes: Optional[List[int]] = None, force: bool = False
+    ) -> "INEIFetcher":
+        """
+        List the files inside each module ZIP without downloading it.
+
+        Only the ZIP central directory is read, through HTTP ``Range``
+        requests on the tail of the archive. Listings are stored in the
+        ``inei_zip_members`` table and reused on later calls.
+
+        Parameters
+        ----------
+        module_codes:
+            Restrict inspection to these module codes (all modules if omitted).
+        force:
+            Re-read listings that are already stored.
+
+        Returns self for method chaining. ``self.members_df`` then holds one
+        row per member with its ``kind`` (``data`` / ``doc`` / ``other``),
+        uncompressed ``file_size``, ``compress_size`` and ``compress_type``.
+        """
+        rows = self._select_rows(module_codes)
+        urls = [row["url"] for row in rows]
+        known = set() if force else set(self.db.get_zip_members(urls)["url"])
+        pending = [url for url in dict.fromkeys(urls) if url not in known]
+
+        sessions = threading.local()
+
+        def list_members(url: str) -> List[Dict]:
+            import requests
+
+            if not hasattr(sessions, "session"):
+                sessions.session = requests.Session()
+            return list_remote_members(BASE_URL["descarga"] + url, sessions.session)
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task(
+                f"[cyan]Inspecting {len(urls)} zips...",
+                total=len(urls),
+                completed=len(urls) - len(pending),
+            )
+            with ThreadPoolExecutor(max_workers=max(self.parallel_jobs, 4)) as pool:
+                futures = {pool.submit(list_members, url): url for url in pending}
+                for future in as_completed(futures):
+                    url = futures[future]
+                    try:
+                        self.db.replace_zip_members(url, future.result())
+                    except Exception as exc:
+                        console.print(f"[red]Could not inspect {url}: {exc}")
+                    finally:
+                        progress.update(task, advance=1)
+
+        # Explicit columns keep the frame well-formed when no row matched
+        modules = pd.DataFrame(
+            rows, columns=["year", "module_code", "module_name", "url"]
+        )
+        self.members_df = modules.merge(
+            self.db.get_zip_members(urls), on="url", how="inner"
+        )
+        return self
+
     # ------------------------------------------------------------------ #
     # Step 2 – download + extract                                          #
     # ------------------------------------------------------------------ #
@@ -172,6 +351,13 @@ class INEIFetcher:
         module_codes: Optional[List[int]] = None,
         force: bool = False,
         remove_zip_after_extract: bool = False,
+        verify: Literal["stat", "deep"] = "stat",
+        extract: bool = True,
+        extensions: Optional[List[str]] = None,
+        patterns: Optional[List[str]] = None,
+        max_member_size: Optional[int] = None,
+        only: Optional[Literal["data", "docs"]] = None,
+        member_jobs: int = 2,
     ) -> "INEIFetcher":
         """
         Download and extract ZIP files for the fetched modules.
@@ -185,50 +371,479 @@ class INEIFetcher:
             Re-download even if a valid ZIP already exists.
         remove_zip_after_extract:
             Delete each ZIP after successful extraction.
+        verify:
+            ``"stat"`` trusts existing ZIPs whose size and mtime match the
+            integrity manifest recorded at their first validation;
+            ``"deep"`` re-checks their content.
+        extract:
+            Set to ``False`` to keep only the verified ZIPs and skip
+            extraction, e.g. when :meth:`convert` reads them directly.
+        extensions:
+            Extract only members with these suffixes (``[".dta", ".pdf"]``).
+        patterns:
+            Extract only members whose path or name matches one of these
+            globs (``["*enaho01a*"]``).
+        max_member_size:
+            Skip members larger than this many (uncompressed) bytes.
+        only:
+            ``"data"`` extracts data files only, ``"docs"`` documentation
+            only.
+        member_jobs:
+            Threads extracting the members of one ZIP concurrently.
 
         Returns self for method chaining.
+
+        Raises
+        ------
+        ValueError
+            If *only* is not ``"data"``, ``"docs"`` or ``None``.
         """
-        self._require_modules()
+        member_filter = MemberFilter.build(extensions, patterns, max_member_size, only)
+        rows = self._select_rows(module_codes)
+        self._downloader.download_and_extract(
+            rows,
+            force=force,
+            remove_zip_after_extract=remove_zip_after_extract,
+            verify=verify,
+            extract=extract,
+            member_filter=member_filter,
+            member_jobs=member_jobs,
+        )
+        return self
 
-        # Guard: reject anything that is not a real list/tuple of ints
-        if module_codes is not None:
-            if not isinstance(module_codes, (list, tuple, set)) or isinstance(
-                module_codes, bool
-            ):
-                raise TypeError(
-                    f"module_codes must be a list/tuple of integers or None, "
-                    f"got {type(module_codes).__name__!r}. "
-                    "To download all modules, pass module_codes=None or omit it."
-                )
-            module_codes = list(module_codes)
+    # ------------------------------------------------------------------ #
+    # Step 2b – convert to Parquet (optional)                              #
+    # ------------------------------------------------------------------ #
 
-        df = self.modules_df.copy()
-        df = df.dropna(subset=["url"])
+    def convert(
+        self,
+        module_codes: Optional[List[int]] = None,
+        force: bool = False,
+        compression: str = "zstd",
+        memory_limit_mb: int = 512,
+        processes: int = 1,
+        value_labels: bool = True,
+    ) -> "INEIFetcher":
+        """
+        Stream every data file (``.dta``, ``.sav``, ``.csv``, ``.dbf``) of
+        the downloaded modules into typed, compressed Parquet.
 
-        if module_codes:
-            padded = [str(int(c)).zfill(4) for c in module_codes]
-            df = df[df["module_code"].isin(padded)]
+        Members are read straight from the ZIP, so combined with
+        ``download(extract=False)`` each byte is written to disk once.
+        When a ZIP was removed, the extracted folder is read instead.
+        Output goes to ``3_parquet/{year}_mod_{code}/{file}.parquet``.
 
-        rows = df.to_dict("records")
-        self._downloader.download_and_extract(
-            rows, force=force, remove_zip_after_extract=remove_zip_after_extract
+        Parameters
+        ----------
+        module_codes:
+            Restrict conversion to these module codes (all modules if omitted).
+        force:
+            Rewrite Parquet files that already exist.
+        compression:
+            Parquet compression codec (``"zstd"``, ``"snappy"``, ...).
+        memory_limit_mb:
+            Memory ceiling for each ``.dta`` / ``.sav`` file, which is read
+            and written in row chunks sized to fit it.
+        processes:
+            Processes used by ``pyreadstat`` to read each chunk.
+        value_labels:
+            Store labelled variables as dictionary-encoded label
+            categoricals (``False`` keeps the numeric codes).
+
+        Returns self for method chaining.
+        """
+        from .converter import Converter
+
+        rows = self._select_rows(module_codes)
+        converter = Converter(
+            self.db,
+            self._dirs["parquet"],
+            workers=self.extract_jobs,
+            compression=compression,
+            memory_limit_mb=memory_limit_mb,
+            processes=processes,
+            value_labels=value_labels,
         )
+        converter.convert(rows, force=force)
+        return self
+
+    # ------------------------------------------------------------------ #
+    # Step 2c – partitioned lake (optional)                                #
+    # ------------------------------------------------------------------ #
+
+    def build_lake(
+        self,
+        module_codes: Optional[List[int]] = None,
+        force: bool = False,
+        compression: str = "zstd",
+    ) -> "INEIFetcher":
+        """
+        Stack every year of each module into a Hive-partitioned Parquet lake.
+
+        Data files are converted first when needed (see :meth:`convert`).
+        Each table is written to
+        ``lake/survey={survey}/module={code}/year={year}/{table}.parquet``
+        with harmonized column names (lower-case, no accents) and one
+        unified type per column across years; columns absent in a year are
+        null. The lake is shared by all surveys under *inei_directory*.
+
+        Parameters
+        ----------
+        module_codes:
+            Restrict the build to these module codes (all modules if omitted).
+        force:
+            Rebuild tables even when their sources did not change.
+        compression:
+            Parquet compression codec.
+
+        Returns self for method chaining. ``self.schema_map`` then maps every
+        source column of every year to its lake column and type.
+        """
+        self.convert(module_codes, compression=compression)
+        builder = self._lake_builder(compression=compression)
+        self.schema_map = builder.build(self._select_rows(module_codes), force=force)
         return self
 
+    # ------------------------------------------------------------------ #
+    # Step 2d – variable dictionary (optional)                             #
+    # ------------------------------------------------------------------ #
+
+    def index_variables(
+        self, module_codes: Optional[List[int]] = None, force: bool = False
+    ) -> "INEIFetcher":
+        """
+        Index the variables of every downloaded data file from its header.
+
+        Names, labels, types, value-label sets and row counts are stored in
+        the ``inei_variables`` / ``inei_value_labels`` tables; no data rows
+        are read. Works on the ZIPs (``download(extract=False)`` is enough)
+        or on the extracted folders.
+
+        Parameters
+        ----------
+        module_codes:
+            Restrict indexing to these module codes (all modules if omitted).
+        force:
+            Re-index modules already in the index.
+
+        Returns self for method chaining. ``self.variables_df`` then holds
+        one row per variable, file and year.
+        """
+        from .variables import VariableIndexer
+
+        rows = self._select_rows(module_codes)
+        indexer = VariableIndexer(self.db, self.survey.code, workers=self.extract_jobs)
+        self.variables_df = indexer.index(rows, force=force)
+        return self
+
+    def find_variable(self, names) -> pd.DataFrame:
+        """
+        Where each of *names* (a name or a list, case-insensitive) appears:
+        one row per year, module and file, with its label and type.
+        """
+        if isinstance(names, str):
+            names = [names]
+        return self.db.get_variables(self.survey.code, names)
+
+    def search_variables(self, text: str, limit: Optional[int] = 200) -> pd.DataFrame:
+        """
+        Variables whose name or label contains every word of *text*
+        (case- and accent-insensitive).
+        """
+        from .variables import normalize_text
+
+        return self.db.search_variables(
+            self.survey.code, normalize_text(text).split(), limit
+        )
+
+    def value_labels(self, variable: str) -> pd.DataFrame:
+        """Value labels of *variable* in every year and file where it has them."""
+        return self.db.get_value_labels(self.survey.code, variable)
+
+    # ------------------------------------------------------------------ #
+    # Step 4 – read                                                        #
+    # ------------------------------------------------------------------ #
+
+    def scan(
+        self,
+        module_code: int,
+        columns: Optional[List[str]] = None,
+        years: Optional[Iterable[int]] = None,
+        filters: Any = None,
+        table: Optional[str] = None,
+    ) -> "pl.LazyFrame":
+        """
+        Lazily scan one module of the lake with projection and predicate
+        pushdown.
+
+        Only the requested columns, the files of the requested years and
+        the row groups whose statistics can match *filters* are read when
+        the frame is collected.
+
+        Parameters
+        ----------
+        module_code:
+            Module to read (e.g. ``5`` or ``"0005"``).
+        columns:
+            Variables to keep (``year`` is always included). Names are
+            harmonized like the lake (``"P208A"`` → ``"p208a"``).
+        years:
+            Years to read; all built years when omitted.
+        filters:
+            Row filter: a ``{column: value | list}`` dict (equality or
+            membership), a list of ``(column, op, value)`` tuples with ``op``
+            one of ``== != < <= > >= in``/``not in``, or a polars expression.
+        table:
+            Lake table of the module; defaults to its largest table.
+
+        Returns
+        -------
+        polars.LazyFrame
+
+        Raises
+        ------
+        RuntimeError
+            When the module has not been added with :meth:`build_lake`.
+        ValueError
+            For an unknown *table* or when none of *years* is in the lake.
+        """
+        import polars as pl
+
+        _, files = self._lake_files(module_code, years, table)
+        lf = pl.scan_parquet(
+            [str(f) for f in files],
+            hive_partitioning=True,
+            hive_schema={"survey": pl.String, "module": pl.String, "year": pl.Int64},
+        )
+        predicate = _filter_expression(filters)
+        if predicate is not None:
+            lf = lf.filter(predicate)
+        if columns is not None:
+            keep = ["year"] + [_lake_column(c) for c in columns]
+            lf = lf.select(list(dict.fromkeys(keep)))
+        return lf
+
+    def join(
+        self,
+        module_codes: List[int],
+        columns: Optional[Dict[int, List[str]]] = None,
+        years: Optional[Iterable[int]] = None,
+        on: Optional[Literal["hogar", "persona"]] = None,
+        how: Literal["left", "inner"] = "left",
+        filters: Any = None,
+        tables: Optional[Dict[int, str]] = None,
+    ) -> "pl.LazyFrame":
+        """
+        Lazily join several modules of the lake on the survey's keys.
+
+        The year and key columns of every row (e.g. ``conglome``,
+        ``vivienda``, ``hogar``, ``codperso`` in ENAHO) are packed once into
+        one integer per row and stored next to the lake files, so the join
+        is a single-column hash join and later joins reuse the keys. Only
+        the requested columns are read; collect with
+        ``.collect(engine="streaming")`` to bound memory.
+
+        Parameters
+        ----------
+        module_codes:
+            Modules to join, in order; the first is the left side.
+        columns:
+            Variables to keep per module (``{5: ["p507"], 34: ["pobreza"]}``);
+            modules not listed keep all their columns. Names are harmonized
+            like the lake.
+        years:
+            Years to join; all built years of the first module when omitted.
+        on:
+            Key level of every join, ``'hogar'`` or ``'persona'``. By
+            default each module joins at the finest level it shares with
+            the first one: person modules on the person keys, household
+            modules on the household keys.
+        how:
+            ``'left'`` keeps every row of the first module, ``'inner'`` only
+            rows found in all modules.
+        filters:
+            Row filter on the kept columns of the first module, as in
+            :meth:`scan`.
+        tables:
+            Lake table per module; defaults to each module's largest table.
+
+        Returns
+        -------
+        polars.LazyFrame
+            ``year``, the key columns, then the requested columns. A column
+            found in several modules is suffixed with the module code
+            (``ubigeo_0034``) after its first occurrence.
+
+        Raises
+        ------
+        KeyError
+            When no keys are known for the survey
+            (see :data:`~perustats.inei.joins.SURVEY_KEYS`).
+        ValueError
+            When a module lacks the key columns (of *on*, when given).
+        """
+        import pyarrow.parquet as pq
+
+        from .joins import (
+            KeyIndex,
+            KeySpec,
+            join_frames,
+            module_level,
+            scan_keyed,
+            survey_keys,
+        )
+
+        levels = survey_keys(self.survey.code)
+        if on is not None and on not in levels:
+            raise ValueError(f"Unknown key level {on!r}; use {list(levels)}")
+        # Coarser levels first, as in SURVEY_KEYS
+        order = list(levels)
+        columns = {int(k): v for k, v in (columns or {}).items()}
+        tables = {int(k): v for k, v in (tables or {}).items()}
+
+        sources = []
+        for code in module_codes:
+            code = str(int(code)).zfill(4)
+            table, files = self._lake_files(code, years, tables.get(int(code)))
+            if years is None:
+                # Later modules follow the years of the first one
+                years = [int(f.parent.name.split("=", 1)[1]) for f in files]
+            level = module_level(levels, pq.read_schema(files[0]).names)
+            if level is None:
+                raise ValueError(
+                    f"Module {code} ({table}) lacks the key columns "
+                    f"{list(levels[order[0]].columns)}."
+                )
+            if on is not None:
+                if order.index(level) < order.index(on):
+                    raise ValueError(f"Module {code} ({table}) has no {on!r} keys.")
+                level = on
+            sources.append((code, table, files, level))
+
+        def keep(code: str, spec: KeySpec) -> Optional[List[str]]:
+            if int(code) not in columns:
+                return None
+            names = [_lake_column(c) for c in columns[int(code)]]
+            return [c for c in dict.fromkeys([*spec.columns, *names]) if c != "year"]
+
+        def index(code: str, table: str, level: str) -> KeyIndex:
+            module_dir = self._lake_builder().module_path(code)
+            return KeyIndex(module_dir, table, levels[level])
+
+        # Each module joins at the finest level it shares with the first
+        first_code, first_table, first_files, first_level = sources[0]
+        others, left_levels = [], set()
+        for code, table, files, level in sources[1:]:
+            level = min(level, first_level, key=order.index)
+            left_levels.add(level)
+            right = index(code, table, level)
+            unique = right.ensure(files)
+            frame = scan_keyed([right], files, keep(code, levels[level]))
+            others.append((code, frame, levels[level], unique))
+
+        left_indexes = [
+            index(first_code, first_table, lv)
+            for lv in sorted(left_levels, key=order.index)
+        ]
+        for left_index in left_indexes:
+            left_index.ensure(first_files)
+        left_spec = levels[first_level]
+        left = scan_keyed(left_indexes, first_files, keep(first_code, left_spec))
+        predicate = _filter_expression(filters)
+        if predicate is not None:
+            left = left.filter(predicate)
+        return join_frames(left, left_spec, others, how=how)
+
+    def estimate(
+        self,
+        source: Union[int, "pl.LazyFrame"],
+        variables: Union[str, List[str]],
+        weight: str,
+        by: Optional[List[str]] = None,
+        strata: Optional[str] = None,
+        psu: Optional[str] = None,
+        stat: Literal["mean", "total", "proportion"] = "mean",
+        years: Optional[Iterable[int]] = None,
+        level: float = 0.95,
+    ) -> pd.DataFrame:
+        """
+        Survey-weighted means, totals or proportions per year and domain.
+
+        The rows are streamed from the lake and reduced to weighted sums
+        per year, domain, stratum and PSU, so memory depends on the number
+        of PSUs and domains, not on the number of rows or years.
+
+        Parameters
+        ----------
+        source:
+            A module code (its largest lake table is scanned) or a frame
+            from :meth:`scan` / :meth:`join`.
+        variables:
+            Variables to estimate.
+        weight:
+            Expansion factor (e.g. ``'factor07'``).
+        by:
+            Domain columns (e.g. ``['dominio']``); national when omitted.
+        strata, psu:
+            Design columns (e.g. ``'estrato'``, ``'conglome'``) for the
+            linearized standard errors.
+        stat:
+            ``'mean'``, ``'total'`` or ``'proportion'`` (categorical
+            variables, one row per category).
+        years:
+            Years to estimate; all years of *source* when omitted.
+        level:
+            Confidence level of the intervals.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per year, domain, variable (and category) with the
+            estimate, ``se``, ``cv``, confidence interval, unweighted ``n``,
+            ``n_psu`` and ``weight_sum``.
+        """
+        import polars as pl
+
+        from .estimation import Design, estimate
+
+        variables = [variables] if isinstance(variables, str) else list(variables)
+        by = list(by or [])
+        if isinstance(source, pl.LazyFrame):
+            lf = source
+            if years is not None:
+                lf = lf.filter(pl.col("year").is_in([int(y) for y in years]))
+        else:
+            names = [*variables, *by, weight, strata, psu]
+            lf = self.scan(source, [n for n in names if n], years=years)
+            variables = [_lake_column(v) for v in variables]
+            by = [_lake_column(c) for c in by]
+            weight, strata, psu = (
+                _lake_column(c) if c else None for c in (weight, strata, psu)
+            )
+        return estimate(lf, variables, Design(weight, strata, psu), by, stat, level)
+
     # ------------------------------------------------------------------ #
     # Step 3 – organize                                                    #
     # ------------------------------------------------------------------ #
 
     def organize(
         self,
-        organize_by: Literal["module", "year"] = "module",
+        organize_by: Literal["module", "year", "both"] = "module",
         keep_original_names: bool = True,
-        operation: Literal["move", "copy"] = "copy",
+        operation: Literal["move", "copy", "link"] = "copy",
         deduplicate_docs_by_hash: bool = True,
+        workers: int = 4,
+        dry_run: bool = False,
     ) -> "INEIFetcher":
         """
         Organize extracted files into a clean directory structure.
 
+        ``operation="link"`` reflinks or hard-links files instead of copying
+        them, so ``organize_by="both"`` builds ``by_module/`` and
+        ``by_year/`` at almost no disk cost. File operations run on
+        *workers* threads. With ``dry_run=True`` the plan is only printed.
+        Either way it is stored in :attr:`organize_plan`.
+
         Returns self for method chaining.
         """
         self._require_modules()
@@ -237,12 +852,14 @@ class INEIFetcher:
             unzipped_directory=self._dirs["unzip"],
             db=self.db,
             modules_df=self.modules_df,
+            workers=workers,
         )
-        organizer.organize(
+        self.organize_plan = organizer.organize(
             organize_by=organize_by,
             keep_original_names=keep_original_names,
             operation=operation,
             deduplicate_docs_by_hash=deduplicate_docs_by_hash,
+            dry_run=dry_run,
         )
         return self
 
@@ -250,6 +867,94 @@ class INEIFetcher:
     # Helpers                                                              #
     # ------------------------------------------------------------------ #
 
+    def _prepare_listing(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Resolve the download URL and local paths of a fresh module listing."""
+        df["module_code"] = df["module_code"].astype(str).str.zfill(4)
+        df["url"] = df[list(self.preferred_formats)].bfill(axis=1).iloc[:, 0]
+        # Compute local paths
+        df["path_download"] = df.apply(
+            lambda r: str(
+                self._dirs["zips"] / f"{r['year_ref']}_mod_{r['module_code']}.zip"
+            ),
+            axis=1,
+        )
+        df["path_extract"] = df.apply(
+            lambda r: str(
+                self._dirs["unzip"] / f"{r['year_ref']}_mod_{r['module_code']}"
+            ),
+            axis=1,
+        )
+        return df
+
+    def _lake_builder(self, compression: str = "zstd") -> LakeBuilder:
+        from .lake import LakeBuilder
+
+        return LakeBuilder(
+            self.db,
+            self.survey.code,
+            self._dirs["parquet"],
+            self._lake_dir,
+            compression=compression,
+        )
+
+    def _lake_files(
+        self,
+        module_code: int,
+        years: Optional[Iterable[int]],
+        table: Optional[str],
+    ) -> Tuple[str, List[Path]]:
+        """Table name and lake files of *module_code* for *years*."""
+        code = str(int(module_code)).zfill(4)
+        base = self._lake_builder().module_path(code)
+
+        sizes: Dict[str, int] = {}
+        for path in base.glob("year=*/*.parquet"):
+            sizes[path.stem] = sizes.get(path.stem, 0) + path.stat().st_size
+        if not sizes:
+            raise RuntimeError(
+                f"Module {code} is not in the lake. "
+                f"Call build_lake(module_codes=[{int(module_code)}]) first."
+            )
+        if table is None:
+            table = max(sizes, key=sizes.get)
+        elif table not in sizes:
+            raise ValueError(
+                f"Unknown table {table!r} for module {code}. Available: {sorted(sizes)}"
+            )
+
+        files = sorted(base.glob(f"year=*/{table}.parquet"))
+        if years is not None:
+            wanted = {int(y) for y in years}
+            files = [f for f in files if int(f.parent.name.split("=", 1)[1]) in wanted]
+            if not files:
+                raise ValueError(f"None of the years {sorted(wanted)} is in the lake.")
+        return table, files
+
+    def _select_rows(self, module_codes: Optional[List[int]]) -> List[Dict]:
+        """Module rows with a download URL, optionally restricted to *module_codes*."""
+        self._require_modules()
+
+        # Guard: reject anything that is not a real list/tuple of ints
+        if module_codes is not None:
+            if not isinstance(module_codes, (list, tuple, set)) or isinstance(
+                module_codes, bool
+            ):
+                raise TypeError(
+                    f"module_codes must be a list/tuple of integers or None, "
+                    f"got {type(module_codes).__name__!r}. "
+                    "To download all modules, pass module_codes=None or omit it."
+                )
+            module_codes = list(module_codes)
+
+        df = self.modules_df.copy()
+        df = df.dropna(subset=["url"])
+
+        if module_codes:
+            padded = [str(int(c)).zfill(4) for c in module_codes]
+            df = df[df["module_code"].isin(padded)]
+
+        return df.to_dict("records")
+
     def _require_modules(self) -> None:
         if self.modules_df is None:
             raise RuntimeError("Call fetch_modules() before this step.")
@@ -261,6 +966,48 @@ class INEIFetcher:
         )
 
 
+def _lake_column(name: str) -> str:
+    """Lake name of a user-supplied column (partition keys pass through)."""
+    from .lake import PARTITION_KEYS, column_name
+
+    return name if name in PARTITION_KEYS else column_name(name)
+
+
+def _filter_expression(filters: Any) -> Optional["pl.Expr"]:
+    """Translate the ``filters`` argument of :meth:`INEIFetcher.scan`."""
+    import polars as pl
+
+    if filters is None:
+        return None
+    if isinstance(filters, pl.Expr):
+        return filters
+    if isinstance(filters, dict):
+        filters = [
+            (col, "in" if isinstance(value, (list, tuple, set, range)) else "==", value)
+            for col, value in filters.items()
+        ]
+
+    predicate = None
+    for col, op, value in filters:
+        if op not in _FILTER_OPS:
+            raise ValueError(f"Unsupported filter operator {op!r}; use {_FILTER_OPS}")
+        c = pl.col(_lake_column(col))
+        if op in ("in", "not in"):
+            expr = c.is_in(list(value))
+            expr = ~expr if op == "not in" else expr
+        else:
+            expr = {
+                "==": c == value,
+                "!=": c != value,
+                "<": c < value,
+                "<=": c <= value,
+                ">": c > value,
+                ">=": c >= value,
+            }[op]
+        predicate = expr if predicate is None else predicate & expr
+    return predicate
+
+
 if __name__ == "__main__":
     pass
 
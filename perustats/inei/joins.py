@@ -0,0 +1,353 @@
+"""
+Key-indexed joins between the lake tables of one survey.
+
+Layout
+------
+::
+
+    lake/
+      survey=enaho/
+        module=0005/
+          year=2020/enaho01a_500.parquet
+          _keys/persona/year=2020/enaho01a_500.parquet    one ``_key`` column
+
+Responsibilities
+----------------
+* Know the composite keys of each survey (:data:`SURVEY_KEYS`), at the
+  household (``hogar``) and person (``persona``) level.
+* Pack the year and the key columns of every row into one ``Int64``
+  (:class:`KeySpec`), once, and keep it in a sidecar file aligned row by
+  row with the lake file (:class:`KeyIndex`). Sidecars are rebuilt only
+  when their lake file changes.
+* Hash-join modules on that single integer with polars lazy frames, each
+  at the finest level it shares with the first module, so only the
+  requested columns are read and the join can run in the streaming
+  engine.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from rich.console import Console
+
+if TYPE_CHECKING:
+    import polars as pl
+
+console = Console()
+
+# Years are packed as an offset from _YEAR_BASE in the high bits
+_YEAR_BASE = 1900
+_YEAR_BITS = 8
+
+# Schema metadata flag set on sidecars whose keys are unique
+_UNIQUE = b"perustats.unique"
+
+JOIN_TYPES = ("left", "inner")
+
+
+@dataclass(frozen=True)
+class KeySpec:
+    """
+    Composite key of one survey level and its packed layout.
+
+    Attributes
+    ----------
+    level:   Name of the level (``'hogar'``, ``'persona'``).
+    columns: Key columns, outermost first (lake names).
+    bits:    Bits reserved for each column; values must fit in them.
+    """
+
+    level: str
+    columns: Tuple[str, ...]
+    bits: Tuple[int, ...]
+
+    def __post_init__(self) -> None:
+        if len(self.columns) != len(self.bits):
+            raise ValueError("KeySpec needs one bit width per key column.")
+        if _YEAR_BITS + sum(self.bits) > 63:
+            raise ValueError(
+                f"Key {self.level!r} needs {_YEAR_BITS + sum(self.bits)} bits; "
+                "at most 63 fit in an Int64."
+            )
+
+    def pack(self, year: int, frame: "pl.DataFrame") -> "pl.Series":
+        """
+        Packed ``Int64`` key of every row of *frame* (a table of *year*).
+
+        Rows with a missing or non-numeric key value get a null key, which
+        never matches in a join.
+
+        Raises
+        ------
+        ValueError
+            When a key value does not fit in the bits of its column.
+        """
+        import polars as pl
+
+        if not 0 <= year - _YEAR_BASE < 1 << _YEAR_BITS:
+            raise ValueError(f"Year {year} cannot be packed into a key.")
+        values = frame.select(
+            [_key_value(col, frame.schema[col]) for col in self.columns]
+        )
+        key = pl.lit(year - _YEAR_BASE, dtype=pl.Int64)
+        for col, bits in zip(self.columns, self.bits):
+            low, high = values[col].min(), values[col].max()
+            if low is not None and (low < 0 or high >= 1 << bits):
+                raise ValueError(
+                    f"Values of {col!r} span {low}..{high}, "
+                    f"outside the {bits} bits of the {self.level!r} key."
+                )
+            key = key * (1 << bits) + pl.col(col)
+        return values.select(key.alias("_key")).to_series()
+
+
+# Composite keys of the surveys whose modules can be joined. ENDES keys are
+# those of the household files (RECH*): cluster, household and line number.
+SURVEY_KEYS: Dict[str, Dict[str, KeySpec]] = {
+    "enaho": {
+        "hogar": KeySpec("hogar", ("conglome", "vivienda", "hogar"), (20, 10, 7)),
+        "persona": KeySpec(
+            "persona", ("conglome", "vivienda", "hogar", "codperso"), (20, 10, 7, 7)
+        ),
+    },
+    "endes": {
+        "hogar": KeySpec("hogar", ("hv001", "hv002"), (20, 12)),
+        "persona": KeySpec("persona", ("hv001", "hv002", "hvidx"), (20, 12, 7)),
+    },
+}
+
+
+def survey_keys(survey: str) -> Dict[str, KeySpec]:
+    """Key levels of *survey*, finest last."""
+    if survey not in SURVEY_KEYS:
+        raise KeyError(
+            f"No join keys are known for survey {survey!r}. "
+            f"Available: {sorted(SURVEY_KEYS)}"
+        )
+    return SURVEY_KEYS[survey]
+
+
+class KeyIndex:
+    """
+    Packed-key sidecars of one lake table at one key level.
+
+    Parameters
+    ----------
+    module_dir:
+        ``module=`` directory of the table in the lake.
+    table:
+        Lake table name.
+    spec:
+        Key level to index.
+    """
+
+    def __init__(self, module_dir: Path, table: str, spec: KeySpec) -> None:
+        self.module_dir = Path(module_dir)
+        self.table = table
+        self.spec = spec
+
+    # ------------------------------------------------------------------ #
+    # Public API                                                           #
+    # ------------------------------------------------------------------ #
+
+    def path(self, year: int) -> Path:
+        """Sidecar of the lake file of *year*."""
+        return (
+            self.module_dir
+            / "_keys"
+            / self.spec.level
+            / f"year={year}"
+            / f"{self.table}.parquet"
+        )
+
+    def ensure(self, files: Sequence[Path]) -> bool:
+        """
+        Build the sidecars of the lake *files* that are missing or stale.
+
+        Returns whether the keys are unique within every file.
+        """
+        unique = True
+        for file in files:
+            sidecar = self.path(_file_year(file))
+            if not self._is_current(file, sidecar):
+                self._build(file, sidecar)
+            unique &= _is_unique(sidecar)
+        return unique
+
+    # ------------------------------------------------------------------ #
+    # Sidecars                                                             #
+    # ------------------------------------------------------------------ #
+
+    def _is_current(self, file: Path, sidecar: Path) -> bool:
+        import pyarrow.parquet as pq
+
+        try:
+            if sidecar.stat().st_mtime_ns < file.stat().st_mtime_ns:
+                return False
+            rows = pq.ParquetFile(sidecar).metadata.num_rows
+        except OSError:
+            return False
+        return rows == pq.ParquetFile(file).metadata.num_rows
+
+    def _build(self, file: Path, sidecar: Path) -> None:
+        import polars as pl
+        import pyarrow.parquet as pq
+
+        missing = set(self.spec.columns) - set(pq.read_schema(file).names)
+        if missing:
+            raise ValueError(
+                f"{file} lacks the {self.spec.level!r} key columns {sorted(missing)}."
+            )
+        # Only the key columns are read
+        keys = self.spec.pack(
+            _file_year(file), pl.read_parquet(file, columns=list(self.spec.columns))
+        )
+        unique = keys.drop_nulls().n_unique() == keys.count()
+
+        table = keys.to_frame().to_arrow()
+        table = table.replace_schema_metadata({_UNIQUE: b"1" if unique else b"0"})
+        sidecar.parent.mkdir(parents=True, exist_ok=True)
+        tmp = sidecar.with_name(sidecar.name + ".tmp")
+        try:
+            pq.write_table(table, tmp, compression="zstd")
+            os.replace(tmp, sidecar)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+
+def module_level(levels: Dict[str, KeySpec], names: Sequence[str]) -> Optional[str]:
+    """Finest key level of *levels* whose columns are all in *names*."""
+    found = None
+    for level, spec in levels.items():
+        if set(spec.columns) <= set(names):
+            found = level
+    return found
+
+
+def scan_keyed(
+    indexes: Sequence[KeyIndex],
+    files: Sequence[Path],
+    columns: Optional[List[str]],
+) -> "pl.LazyFrame":
+    """
+    Lazy frame of the lake *files* with ``year`` and one ``_key_{level}``
+    column per index in *indexes*.
+
+    *columns* restricts the data columns read (all when ``None``). The
+    sidecars must exist (see :meth:`KeyIndex.ensure`).
+    """
+    import polars as pl
+
+    frames = []
+    for file in files:
+        year = _file_year(file)
+        data = pl.scan_parquet(str(file))
+        if columns is not None:
+            data = data.select(columns)
+        keys = [
+            pl.scan_parquet(str(index.path(year))).rename(
+                {"_key": f"_key_{index.spec.level}"}
+            )
+            for index in indexes
+        ]
+        frames.append(
+            pl.concat([*keys, data], how="horizontal").with_columns(
+                pl.lit(year, dtype=pl.Int64).alias("year")
+            )
+        )
+    return pl.concat(frames, how="diagonal_relaxed")
+
+
+def join_frames(
+    left: "pl.LazyFrame",
+    left_spec: KeySpec,
+    others: List[Tuple[str, "pl.LazyFrame", KeySpec, bool]],
+    how: str = "left",
+) -> "pl.LazyFrame":
+    """
+    Join keyed lazy frames (see :func:`scan_keyed`) on their packed keys.
+
+    Parameters
+    ----------
+    left:
+        Left side of every join, keyed at every level used by *others*.
+    left_spec:
+        Finest key level of *left*; its columns lead the result.
+    others:
+        ``(module_code, frame, spec, unique)``: each frame is joined on
+        ``_key_{spec.level}``; *unique* tells whether that key is unique in
+        it (a warning is printed when it is not).
+    how:
+        ``'left'`` or ``'inner'``.
+
+    Data columns present in more than one module keep their name in the
+    first module and get a ``_{module_code}`` suffix in the others.
+    """
+    if how not in JOIN_TYPES:
+        raise ValueError(f"Unsupported join type {how!r}; use {JOIN_TYPES}")
+
+    key_columns = {c for _, _, spec, _ in others for c in spec.columns}
+    key_columns.update(left_spec.columns, ["year"])
+    result = left
+    seen = set(left.collect_schema().names())
+    for code, frame, spec, unique in others:
+        if not unique:
+            console.print(
+                f"[yellow]Module {code} has repeated {spec.level!r} keys; "
+                "matching rows will be repeated."
+            )
+        key = f"_key_{spec.level}"
+        names = [
+            c
+            for c in frame.collect_schema().names()
+            if c not in key_columns and not c.startswith("_key_")
+        ]
+        # Key columns already come from the left side
+        frame = frame.select([key] + names).rename(
+            {c: f"{c}_{code}" for c in names if c in seen}
+        )
+        seen.update(frame.collect_schema().names())
+        result = result.join(frame, on=key, how=how)
+
+    leading = ["year", *left_spec.columns]
+    return result.select(
+        leading
+        + [
+            c
+            for c in result.collect_schema().names()
+            if c not in leading and not c.startswith("_key_")
+        ]
+    )
+
+
+# ---------------------------------------------------------------------- #
+# Helpers                                                                  #
+# ---------------------------------------------------------------------- #
+
+
+def _key_value(col: str, dtype) -> "pl.Expr":
+    """Key column as ``Int64``: codes stored as text or floats are accepted."""
+    import polars as pl
+
+    expr = pl.col(col)
+    if dtype == pl.String or isinstance(dtype, (pl.Categorical, pl.Enum)):
+        expr = expr.cast(pl.String).str.strip_chars()
+    elif dtype.is_float():
+        expr = pl.when(expr == expr.round(0)).then(expr)
+    return expr.cast(pl.Int64, strict=False).alias(col)
+
+
+def _file_year(path: Path) -> int:
+    """Year of a lake file, from its ``year=`` partition directory."""
+    return int(Path(path).parent.name.split("=", 1)[1])
+
+
+def _is_unique(sidecar: Path) -> bool:
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(sidecar).metadata or {}
+    return metadata.get(_UNIQUE) == b"1"
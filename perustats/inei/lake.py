@@ -0,0 +1,345 @@
+"""
+LakeBuilder: stacks the converted Parquet files of every year into one
+Hive-partitioned dataset per survey module.
+
+Layout
+------
+::
+
+    lake/
+      survey=enaho/
+        module=0005/
+          year=2019/enaho01a_500.parquet
+          year=2020/enaho01a_500.parquet
+
+Responsibilities
+----------------
+* Derive a year-independent table name from each converted file
+  (``enaho01a-2020-500`` → ``enaho01a_500``).
+* Harmonize column names (lower-case, accents stripped, ``_`` separated)
+  and unify column types across years, so every file of a table shares one
+  schema; columns missing in a year are written as nulls.
+* Record the source → lake column mapping in the ``inei_schema_map`` table.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pandas as pd
+from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    Progress,
+    SpinnerColumn,
+    TaskProgressColumn,
+    TextColumn,
+    TimeElapsedColumn,
+)
+
+from .utils.db_utils import DatabaseManager
+from .utils.file_utils import slugify
+
+console = Console()
+
+# Hive partition keys; data columns with these names get a suffix
+PARTITION_KEYS = ("survey", "module", "year")
+
+_YEAR_TOKEN = re.compile(r"(?<!\d)(?:19|20)\d{2}(?!\d)")
+
+# Converted module folders: {year}_mod_{code}
+_SOURCE_DIR = re.compile(r"^(\d{4})_mod_\d+$")
+
+
+def table_name(stem: str) -> str:
+    """Year-independent table name of a converted file stem."""
+    name = _YEAR_TOKEN.sub("", slugify(stem))
+    name = re.sub(r"[-_]+", "_", name).strip("_")
+    return name or "data"
+
+
+def column_name(name: str) -> str:
+    """Harmonized lake column name."""
+    name = re.sub(r"[-_]+", "_", slugify(name)).strip("_")
+    if not name:
+        return "col"
+    if name[0].isdigit():
+        name = f"c{name}"
+    if name in PARTITION_KEYS:
+        name = f"{name}_"
+    return name
+
+
+class LakeBuilder:
+    """
+    Builds the Hive-partitioned Parquet lake of one survey.
+
+    Parameters
+    ----------
+    db:
+        A :class:`~perustats.inei.utils.db_utils.DatabaseManager` where the
+        schema map is stored.
+    survey:
+        Survey code, used as the ``survey=`` partition value.
+    parquet_directory:
+        Converted Parquet files (``3_parquet``), one folder per
+        ``{year}_mod_{code}``.
+    lake_directory:
+        Root of the lake.
+    compression:
+        Parquet compression codec.
+    batch_size:
+        Rows per record batch when rewriting files.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        survey: str,
+        parquet_directory: Path,
+        lake_directory: Path,
+        compression: str = "zstd",
+        batch_size: int = 65_536,
+    ) -> None:
+        self.db = db
+        self.survey = survey
+        self.parquet_dir = Path(parquet_directory)
+        self.lake_dir = Path(lake_directory)
+        self.compression = compression
+        self.batch_size = batch_size
+
+    # ------------------------------------------------------------------ #
+    # Public API                                                           #
+    # ------------------------------------------------------------------ #
+
+    def module_path(self, module_code: str) -> Path:
+        """Directory holding every table of *module_code* in the lake."""
+        return self.lake_dir / f"survey={self.survey}" / f"module={module_code}"
+
+    def build(self, rows: List[Dict], force: bool = False) -> pd.DataFrame:
+        """
+        Write (or refresh) the lake tables of the modules in *rows*.
+
+        Each table is built from every converted year of its module found
+        under ``parquet_directory``, whichever years *rows* cover, and lake
+        files of years no longer converted are removed. A table is rebuilt
+        when its set of source files changed (e.g. a new year was
+        converted) or when *force* is set; otherwise it is kept.
+
+        Returns the schema map of the tables in *rows*.
+        """
+        tables = self._collect_sources(rows)
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task(
+                f"[cyan]Building {len(tables)} lake tables...", total=len(tables)
+            )
+            for (module_code, table), sources in tables.items():
+                try:
+                    if force or not self._is_current(module_code, table, sources):
+                        self._build_table(module_code, table, sources)
+                except Exception as exc:
+                    console.print(f"[red]Could not build {module_code}/{table}: {exc}")
+                finally:
+                    progress.update(task, advance=1)
+
+        schema_map = self.db.get_schema_map(self.survey)
+        modules = {module_code for module_code, _ in tables}
+        return schema_map[schema_map["module_code"].isin(modules)].reset_index(
+            drop=True
+        )
+
+    # ------------------------------------------------------------------ #
+    # Sources                                                              #
+    # ------------------------------------------------------------------ #
+
+    def _collect_sources(
+        self, rows: List[Dict]
+    ) -> Dict[Tuple[str, str], List[Tuple[int, Path]]]:
+        """
+        Group converted files by ``(module_code, table)``.
+
+        Every converted year of the modules in *rows* is included, not only
+        the years of *rows*, so a table is always rebuilt over all of them.
+        """
+        modules = sorted({str(row["module_code"]).zfill(4) for row in rows})
+        tables: Dict[Tuple[str, str], List[Tuple[int, Path]]] = {}
+        for module_code in modules:
+            for src_dir in sorted(self.parquet_dir.glob(f"*_mod_{module_code}")):
+                match = _SOURCE_DIR.match(src_dir.name)
+                if not match or not src_dir.is_dir():
+                    continue
+                year = int(match.group(1))
+                seen: Dict[str, int] = {}
+                for path in sorted(src_dir.glob("*.parquet")):
+                    table = table_name(path.stem)
+                    seen[table] = seen.get(table, 0) + 1
+                    if seen[table] > 1:
+                        table = f"{table}_{seen[table]}"
+                    tables.setdefault((module_code, table), []).append((year, path))
+        return tables
+
+    def _is_current(
+        self, module_code: str, table: str, sources: List[Tuple[int, Path]]
+    ) -> bool:
+        mapped = self.db.get_schema_map(self.survey, module_code)
+        mapped = mapped[mapped["table_name"] == table]
+        recorded = set(zip(mapped["year"].astype(int), mapped["source_path"]))
+        if recorded != {(year, str(path)) for year, path in sources}:
+            return False
+        for year, path in sources:
+            out = self._output_path(module_code, table, year)
+            # A re-converted source is newer than its lake copy
+            if not out.exists() or out.stat().st_mtime_ns < path.stat().st_mtime_ns:
+                return False
+        return True
+
+    def _output_path(self, module_code: str, table: str, year: int) -> Path:
+        return self.module_path(module_code) / f"year={year}" / f"{table}.parquet"
+
+    # ------------------------------------------------------------------ #
+    # Harmonization                                                        #
+    # ------------------------------------------------------------------ #
+
+    def _build_table(
+        self, module_code: str, table: str, sources: List[Tuple[int, Path]]
+    ) -> None:
+        import pyarrow.parquet as pq
+
+        # Harmonized names per source file, first-seen column order
+        renames: Dict[Path, Dict[str, str]] = {}
+        types: Dict[str, list] = {}
+        schemas = {}
+        for year, path in sorted(sources):
+            schema = pq.read_schema(path)
+            schemas[path] = schema
+            names: Dict[str, str] = {}
+            used: set = set()
+            for field in schema:
+                name = column_name(field.name)
+                candidate, n = name, 1
+                while candidate in used:
+                    n += 1
+                    candidate = f"{name}_{n}"
+                used.add(candidate)
+                names[field.name] = candidate
+                types.setdefault(candidate, []).append(field.type)
+            renames[path] = names
+
+        unified = _unified_schema(types)
+
+        map_rows = []
+        for year, path in sources:
+            self._write_year(module_code, table, year, path, renames[path], unified)
+            for field in schemas[path]:
+                target = renames[path][field.name]
+                map_rows.append(
+                    {
+                        "survey": self.survey,
+                        "module_code": module_code,
+                        "table_name": table,
+                        "year": year,
+                        "source_path": str(path),
+                        "source_column": field.name,
+                        "column_name": target,
+                        "source_type": str(field.type),
+                        "unified_type": str(unified.field(target).type),
+                    }
+                )
+        self.db.replace_schema_map(
+            self.survey, module_code, table, pd.DataFrame(map_rows)
+        )
+
+        # Years whose source is gone would keep an outdated schema
+        years = {year for year, _ in sources}
+        for path in self.module_path(module_code).glob(f"year=*/{table}.parquet"):
+            if int(path.parent.name.split("=", 1)[1]) not in years:
+                path.unlink()
+
+    def _write_year(
+        self,
+        module_code: str,
+        table: str,
+        year: int,
+        source: Path,
+        names: Dict[str, str],
+        unified,
+    ) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        dest = self._output_path(module_code, table, year)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + ".tmp")
+        try:
+            with pq.ParquetWriter(tmp, unified, compression=self.compression) as writer:
+                for batch in pq.ParquetFile(source).iter_batches(self.batch_size):
+                    columns = dict(zip((names[n] for n in batch.schema.names), batch))
+                    arrays = [
+                        _cast(columns[field.name], field.type)
+                        if field.name in columns
+                        else pa.nulls(batch.num_rows, field.type)
+                        for field in unified
+                    ]
+                    writer.write_batch(
+                        pa.RecordBatch.from_arrays(arrays, schema=unified)
+                    )
+            os.replace(tmp, dest)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+
+# ---------------------------------------------------------------------- #
+# Type unification                                                         #
+# ---------------------------------------------------------------------- #
+
+
+def _unified_schema(types: Dict[str, list]):
+    import pyarrow as pa
+
+    return pa.schema([(name, _unify(found)) for name, found in types.items()])
+
+
+def _unify(found: list):
+    """One Arrow type able to hold every type in *found* without loss."""
+    import pyarrow as pa
+    import pyarrow.types as pt
+
+    found = [t for t in found if not pt.is_null(t)]
+    if not found:
+        return pa.string()
+    if all(t == found[0] for t in found):
+        return found[0]
+    if all(pt.is_dictionary(t) for t in found):
+        return pa.dictionary(pa.int32(), pa.string())
+    if all(pt.is_boolean(t) or pt.is_integer(t) for t in found):
+        return pa.int64()
+    if all(pt.is_boolean(t) or pt.is_integer(t) or pt.is_floating(t) for t in found):
+        return pa.float64()
+    if all(pt.is_temporal(t) for t in found):
+        return pa.timestamp("ms")
+    return pa.string()
+
+
+def _cast(array, target):
+    import pyarrow.compute as pc
+    import pyarrow.types as pt
+
+    if array.type == target:
+        return array
+    if pt.is_dictionary(array.type):
+        array = array.dictionary_decode()
+    if pt.is_dictionary(target):
+        return pc.dictionary_encode(array.cast(target.value_type))
+    # Targets only ever widen the source type (see _unify)
+    return array.cast(target, safe=False)
@@ -4,16 +4,39 @@ modules (with their download URLs) for a given survey + year combination.
 
 This class is intentionally free of any download or file-system logic so it
 can be tested or used independently.
+
+Every listing is a two-step form flow (``CambiaAnio.asp`` → period value →
+``cambiaPeriodo.asp`` → module table). Requests share a pooled keep-alive
+``httpx`` client; :func:`fetch_listings` runs the flow for many
+(survey, year) pairs concurrently on one async pool.
 """
 
 from __future__ import annotations
 
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
 import pandas as pd
 
 from .constants import BASE_URL
 from .surveys.registry import Survey
 from .utils.html_utils import extract_period_value, html_to_dataframe
-from .utils.http_utils import fetch_html, url_encode_survey_name
+from .utils.http_utils import (
+    apost_form,
+    make_async_client,
+    make_client,
+    post_form,
+    run_coroutine,
+    url_encode_survey_name,
+)
+
+logger = logging.getLogger(__name__)
+
+PERIOD_URL = BASE_URL["consulta"] + "/CambiaAnio.asp"
+MODULES_URL = BASE_URL["consulta"] + "/cambiaPeriodo.asp"
+
+DEFAULT_LISTING_CONNECTIONS = 8
 
 
 class ModuleFetcher:
@@ -29,6 +52,7 @@ class ModuleFetcher:
 
     def __init__(self, survey: Survey) -> None:
         self.survey = survey
+        self._client = None
 
     # ------------------------------------------------------------------ #
     # Public API                                                           #
@@ -41,51 +65,134 @@ class ModuleFetcher:
         The DataFrame will contain at least: ``module_code``, ``module_name``,
         ``year_ref``, ``period_ref``, ``spss``, ``stata``, ``csv``, ``dbf``.
         """
-        period_value = self._get_period_value(year)
-        df = self._get_modules_table(year, period_value)
-        df["survey"] = self.survey.code
-        df["year"] = year
-        df["periodo"] = self.survey.period
-        # Initialise progress columns to None / False
-        for col in ("url", "path_download", "path_extract", "path_organized"):
-            df[col] = None
-        return df
+        if self._client is None:
+            self._client = make_client(max_connections=1)
+        html = post_form(self._client, PERIOD_URL, self._period_form(year))
+        period_value = extract_period_value(html, self.survey)
+        html = post_form(
+            self._client, MODULES_URL, self._modules_form(year, period_value)
+        )
+        return self._tidy(html_to_dataframe(html), year)
+
+    async def afetch(self, year: int, client) -> pd.DataFrame:
+        """Async variant of :meth:`fetch` on a shared ``httpx.AsyncClient``."""
+        html = await apost_form(client, PERIOD_URL, self._period_form(year))
+        period_value = extract_period_value(html, self.survey)
+        html = await apost_form(
+            client, MODULES_URL, self._modules_form(year, period_value)
+        )
+        return self._tidy(html_to_dataframe(html), year)
+
+    def fetch_many(
+        self,
+        years: Iterable[int],
+        max_connections: int = DEFAULT_LISTING_CONNECTIONS,
+        on_done: Optional[Callable[[Tuple[str, int]], None]] = None,
+    ) -> Dict[int, pd.DataFrame]:
+        """
+        List modules for several *years* concurrently.
+
+        Years that fail are logged and left out of the result.
+        """
+        listings = fetch_listings(
+            [(self.survey, year) for year in years], max_connections, on_done
+        )
+        return {year: df for (_, year), df in listings.items()}
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
 
     # ------------------------------------------------------------------ #
     # Internal helpers                                                     #
     # ------------------------------------------------------------------ #
 
-    def _get_period_value(self, year: int) -> str | None:
+    def _period_form(self, year: int) -> str:
         """
-        POST to the INEI 'CambiaAnio' endpoint and extract the period/quarter
-        value that matches this survey's period type.
+        Form body for the INEI 'CambiaAnio' endpoint, whose response holds the
+        period/quarter value that matches this survey's period type.
         """
         encoded_name = url_encode_survey_name(self.survey.name)
         # ENAHO uses "2" as the encuesta0 parameter; all others use the name
         encuesta0 = "2" if self.survey.code.startswith("enaho") else encoded_name
-
-        data = (
+        return (
             f"bandera=1"
             f"&_cmbEncuesta={encoded_name}"
             f"&_cmbAnno={year}"
             f"&_cmbEncuesta0={encuesta0}"
         )
-        # print(data)
-        url = BASE_URL["consulta"] + "/CambiaAnio.asp"
-        html = fetch_html(url, data)
-        return extract_period_value(html, self.survey)
 
-    def _get_modules_table(self, year: int, period_value: str | None) -> pd.DataFrame:
-        """
-        POST to the INEI 'cambiaPeriodo' endpoint and parse the module table.
-        """
+    def _modules_form(self, year: int, period_value: str | None) -> str:
+        """Form body for the INEI 'cambiaPeriodo' endpoint (module table)."""
         encoded_name = url_encode_survey_name(self.survey.name)
-        data = (
+        return (
             f"bandera=1"
             f"&_cmbEncuesta={encoded_name}"
             f"&_cmbAnno={year}"
             f"&_cmbTrimestre={period_value}"
         )
-        url = BASE_URL["consulta"] + "/cambiaPeriodo.asp"
-        html = fetch_html(url, data)
-        return html_to_dataframe(html)
+
+    def _tidy(self, df: pd.DataFrame, year: int) -> pd.DataFrame:
+        df["survey"] = self.survey.code
+        df["year"] = year
+        df["periodo"] = self.survey.period
+        # Initialise progress columns to None / False
+        for col in ("url", "path_download", "path_extract", "path_organized"):
+            df[col] = None
+        return df
+
+
+# --------------------------------------------------------------------------- #
+# Concurrent listing                                                           #
+# --------------------------------------------------------------------------- #
+
+
+async def _afetch_listings(
+    jobs: List[Tuple[Survey, int]],
+    max_connections: int,
+    on_done: Optional[Callable[[Tuple[str, int]], None]],
+) -> Dict[Tuple[str, int], pd.DataFrame]:
+    results: Dict[Tuple[str, int], pd.DataFrame] = {}
+    fetchers = {survey.code: ModuleFetcher(survey) for survey, _ in jobs}
+    semaphore = asyncio.Semaphore(max_connections)
+
+    async with make_async_client(max_connections) as client:
+
+        async def one(survey: Survey, year: int) -> None:
+            key = (survey.code, year)
+            async with semaphore:
+                try:
+                    results[key] = await fetchers[survey.code].afetch(year, client)
+                except Exception as exc:
+                    logger.warning("Listing %s %s failed: %s", survey.code, year, exc)
+            if on_done is not None:
+                on_done(key)
+
+        await asyncio.gather(*(one(survey, year) for survey, year in jobs))
+    return results
+
+
+def fetch_listings(
+    jobs: Iterable[Tuple[Survey, int]],
+    max_connections: int = DEFAULT_LISTING_CONNECTIONS,
+    on_done: Optional[Callable[[Tuple[str, int]], None]] = None,
+) -> Dict[Tuple[str, int], pd.DataFrame]:
+    """
+    List modules for many (survey, year) pairs concurrently.
+
+    All requests share one keep-alive ``httpx.AsyncClient`` capped at
+    *max_connections*; the two POSTs of each pair run in order, pairs run in
+    parallel. *on_done* is called with ``(survey_code, year)`` as each pair
+    finishes (successfully or not).
+
+    Returns
+    -------
+    dict
+        ``(survey_code, year)`` → module DataFrame. Failed pairs are logged
+        and omitted.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return {}
+    return run_coroutine(_afetch_listings(jobs, max_connections, on_done))
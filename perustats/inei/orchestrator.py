@@ -0,0 +1,467 @@
+"""
+Orchestrator: runs many (survey, years, modules) jobs under one global
+concurrency and bandwidth budget.
+
+Responsibilities
+----------------
+* List the modules of every (survey, year) pair of every job concurrently,
+  over one connection pool, skipping pairs already cached.
+* Share one pool of download threads, one extraction pool and one
+  bandwidth :class:`~perustats.inei.utils.http_utils.TokenBucket` across
+  all jobs. The next download always goes to the job with the highest
+  priority; jobs of equal priority take turns (fair sharing).
+* Organize each job as soon as its own downloads and extractions finish,
+  while other jobs are still downloading.
+* Record the stage and row counts of each job in the ``inei_jobs`` table.
+  A job is done only when none of its modules failed: a finished job is
+  skipped on the next run, while an interrupted or partly failed one
+  queues only the modules not downloaded (or extracted) yet (the
+  downloader continues partial files and skips verified ZIPs).
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Literal, Optional, Tuple, Union
+
+import pandas as pd
+from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    Progress,
+    SpinnerColumn,
+    TaskProgressColumn,
+    TextColumn,
+    TimeElapsedColumn,
+)
+
+from .blob_store import BlobStore
+from .downloader import Downloader
+from .fetcher import INEIFetcher
+from .module_fetcher import DEFAULT_LISTING_CONNECTIONS, fetch_listings
+from .surveys.registry import registry
+from .utils.db_utils import DatabaseManager
+from .utils.http_utils import TokenBucket
+
+console = Console()
+
+# Stages recorded in inei_jobs, in order
+STAGES = ("pending", "listed", "downloading", "organizing", "done")
+
+
+@dataclass(frozen=True)
+class Job:
+    """
+    One unit of work for the :class:`Orchestrator`.
+
+    Attributes
+    ----------
+    survey:       Survey code (e.g. ``'enaho'``).
+    years:        Years to fetch.
+    module_codes: Modules to download (all when ``None``).
+    priority:     Higher values download first.
+    extract:      Extract the ZIPs after download.
+    organize_by:  ``'module'``, ``'year'`` or ``'both'`` to organize the
+                  job once downloaded; ``None`` skips organizing.
+    """
+
+    survey: str
+    years: Tuple[int, ...]
+    module_codes: Optional[Tuple[int, ...]] = None
+    priority: int = 0
+    extract: bool = True
+    organize_by: Optional[Literal["module", "year", "both"]] = None
+
+    def __post_init__(self) -> None:
+        registry.get(self.survey)  # fail early on unknown surveys
+        object.__setattr__(self, "years", tuple(sorted({int(y) for y in self.years})))
+        if self.module_codes is not None:
+            codes = tuple(sorted({int(c) for c in self.module_codes}))
+            object.__setattr__(self, "module_codes", codes)
+
+    @property
+    def job_id(self) -> str:
+        """Stable identifier used as the ``inei_jobs`` key."""
+        codes = ",".join(map(str, self.module_codes)) if self.module_codes else "all"
+        return f"{self.survey}:{','.join(map(str, self.years))}:{codes}"
+
+
+class Orchestrator:
+    """
+    Schedules listing, download, extraction and organizing of many jobs.
+
+    Parameters
+    ----------
+    jobs:
+        :class:`Job` objects, or dicts with the same fields.
+    master_directory, inei_directory, sql_file, blob_store:
+        As for :class:`~perustats.inei.fetcher.INEIFetcher`; every job
+        shares one database.
+    max_downloads:
+        Concurrent downloads across all jobs.
+    extract_jobs:
+        Concurrent extractions across all jobs.
+    max_listings:
+        Concurrent listing requests across all jobs.
+    bandwidth:
+        Global download budget in bytes per second (unlimited when
+        ``None``).
+    segments:
+        Byte ranges fetched concurrently per large ZIP.
+    """
+
+    def __init__(
+        self,
+        jobs: Iterable[Union[Job, Dict]],
+        master_directory: str = "./data/",
+        inei_directory: str = "microodatos_inei",
+        max_downloads: int = 4,
+        extract_jobs: int = 2,
+        max_listings: int = DEFAULT_LISTING_CONNECTIONS,
+        bandwidth: Optional[float] = None,
+        segments: int = 1,
+        sql_file: Optional[str] = None,
+        blob_store: Union[str, Path, BlobStore, None] = None,
+    ) -> None:
+        self.jobs: List[Job] = [j if isinstance(j, Job) else Job(**j) for j in jobs]
+        ids = [job.job_id for job in self.jobs]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate jobs: every job_id must be unique.")
+        self.master_directory = master_directory
+        self.inei_directory = inei_directory
+        self.max_downloads = max_downloads
+        self.extract_jobs = extract_jobs
+        self.max_listings = max_listings
+
+        self.db = DatabaseManager(Path(master_directory) / (sql_file or "referrer.db"))
+        if blob_store is not None and not isinstance(blob_store, BlobStore):
+            blob_store = BlobStore(Path(blob_store))
+        self.limiter = TokenBucket(bandwidth) if bandwidth else None
+        self._downloader = Downloader(
+            self.db,
+            max_downloads,
+            extract_jobs,
+            segments,
+            blob_store=blob_store,
+            limiter=self.limiter,
+        )
+        self.fetchers: Dict[str, INEIFetcher] = {}
+
+    # ------------------------------------------------------------------ #
+    # Public API                                                           #
+    # ------------------------------------------------------------------ #
+
+    def run(self, force: bool = False) -> pd.DataFrame:
+        """
+        Run every job not finished yet (all of them with *force*, which also
+        re-downloads their ZIPs).
+
+        Returns the ``inei_jobs`` rows of the jobs.
+        """
+        todo = []
+        for job in self.jobs:
+            stored = self.db.get_job(job.job_id)
+            if stored and stored["stage"] == "done" and not force:
+                console.print(f"[green]✓ {job.job_id} already done")
+                continue
+            self.db.save_job(
+                {
+                    "job_id": job.job_id,
+                    "survey": job.survey,
+                    "years": json.dumps(list(job.years)),
+                    "module_codes": json.dumps(job.module_codes),
+                    "priority": job.priority,
+                    "stage": stored["stage"] if stored else "pending",
+                    "error": None,
+                }
+            )
+            todo.append(job)
+
+        if todo:
+            self._list(todo)
+            self._download(todo, force)
+        return self.db.get_jobs([job.job_id for job in self.jobs])
+
+    def fetcher(self, job: Job) -> INEIFetcher:
+        """The :class:`~perustats.inei.fetcher.INEIFetcher` of *job*."""
+        if job.job_id not in self.fetchers:
+            self.fetchers[job.job_id] = INEIFetcher(
+                job.survey,
+                list(job.years),
+                master_directory=self.master_directory,
+                inei_directory=self.inei_directory,
+                db=self.db,
+            )
+        return self.fetchers[job.job_id]
+
+    # ------------------------------------------------------------------ #
+    # Stage 1 – listing                                                    #
+    # ------------------------------------------------------------------ #
+
+    def _list(self, jobs: List[Job]) -> None:
+        """List every uncached (survey, year) pair of *jobs* in one batch."""
+        owners: Dict[Tuple[str, int], INEIFetcher] = {}
+        for job in jobs:
+            fetcher = self.fetcher(job)
+            survey = fetcher.survey
+            for year in job.years:
+                cached = self.db.get_cached_modules(survey.code, year, survey.period)
+                if cached is None:
+                    owners.setdefault((survey.code, year), fetcher)
+
+        if owners:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TaskProgressColumn(),
+                TimeElapsedColumn(),
+                console=console,
+            ) as progress:
+                task = progress.add_task(
+                    f"[cyan]Listing {len(owners)} survey-years...", total=len(owners)
+                )
+                listings = fetch_listings(
+                    [(f.survey, year) for (_, year), f in owners.items()],
+                    max_connections=self.max_listings,
+                    on_done=lambda _: progress.update(task, advance=1),
+                )
+            for key, fetcher in owners.items():
+                df = listings.get(key)
+                if df is not None and not df.empty:
+                    self.db.insert_modules(fetcher._prepare_listing(df))
+
+        for job in jobs:
+            try:
+                self.fetcher(job).fetch_modules()
+            except ValueError as exc:  # nothing listed for any year
+                self._fail(job, exc)
+                continue
+            stored = self.db.get_job(job.job_id)
+            if stored["stage"] == "pending":
+                self.db.update_job(job.job_id, stage="listed")
+
+    # ------------------------------------------------------------------ #
+    # Stage 2 – download, extract, organize                                #
+    # ------------------------------------------------------------------ #
+
+    def _download(self, jobs: List[Job], force: bool) -> None:
+        scheduler = _Scheduler()
+        remaining: Dict[str, int] = {}
+        done: Dict[str, int] = {}
+        for job in jobs:
+            fetcher = self.fetcher(job)
+            if fetcher.modules_df is None:
+                continue  # listing failed
+            rows = fetcher._select_rows(job.module_codes)
+            total = len(rows)
+            if not force:
+                # Modules finished by an earlier run are not queued again
+                rows = [row for row in rows if not _row_finished(row, job.extract)]
+            remaining[job.job_id] = len(rows)
+            done[job.job_id] = total - len(rows)
+            scheduler.add(job, rows)
+            self.db.update_job(
+                job.job_id,
+                stage="downloading",
+                total=total,
+                done=done[job.job_id],
+                failed=0,
+            )
+
+        lock = threading.Lock()
+        failed: Dict[str, int] = {job_id: 0 for job_id in remaining}
+        pending = threading.BoundedSemaphore(2 * self.extract_jobs)
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress:
+            tasks = {
+                job.job_id: progress.add_task(
+                    f"[cyan]{job.job_id}",
+                    total=done[job.job_id] + remaining[job.job_id],
+                    completed=done[job.job_id],
+                )
+                for job in jobs
+                if job.job_id in remaining
+            }
+            # One thread: organizing several jobs of a survey touches the
+            # same directories
+            with ThreadPoolExecutor(max_workers=1) as organizers:
+
+                def finish_row(job: Job, ok: bool) -> None:
+                    with lock:
+                        done[job.job_id] += ok
+                        failed[job.job_id] += not ok
+                        remaining[job.job_id] -= 1
+                        last = remaining[job.job_id] == 0
+                        counts = {
+                            "done": done[job.job_id],
+                            "failed": failed[job.job_id],
+                        }
+                    self.db.update_job(job.job_id, **counts)
+                    progress.update(tasks[job.job_id], advance=1)
+                    if last:
+                        organizers.submit(self._finish, job, counts["failed"])
+
+                for job in jobs:
+                    if remaining.get(job.job_id) == 0:
+                        organizers.submit(self._finish, job, 0)
+
+                with ThreadPoolExecutor(max_workers=self.extract_jobs) as extractors:
+
+                    def extract_row(owners: List[Job], row: Dict) -> None:
+                        ok = False
+                        try:
+                            ok = self._downloader._process_row_extract(row, False)
+                        except Exception as exc:
+                            console.print(
+                                f"[red]Error extracting {row.get('url')}: {exc}"
+                            )
+                        finally:
+                            pending.release()
+                            for owner in owners:
+                                finish_row(owner, ok)
+
+                    def worker() -> None:
+                        while True:
+                            item = scheduler.next()
+                            if item is None:
+                                return
+                            job, row = item
+                            # Jobs sharing this row, still waiting for its outcome
+                            waiting = scheduler.owners(row)
+                            try:
+                                ready = self._downloader._process_row_download(
+                                    row, force
+                                )
+                                if ready:
+                                    for owner in waiting:
+                                        if not owner.extract:
+                                            finish_row(owner, True)
+                                    waiting = [j for j in waiting if j.extract]
+                                if ready and waiting:
+                                    pending.acquire()
+                                    try:
+                                        extractors.submit(extract_row, waiting, row)
+                                        waiting = []
+                                    except BaseException:
+                                        pending.release()
+                                        raise
+                            except Exception as exc:
+                                console.print(
+                                    f"[red]Error processing {row.get('url')}: {exc}"
+                                )
+                            finally:
+                                scheduler.release(job)
+                                for owner in waiting:
+                                    finish_row(owner, False)
+
+                    with ThreadPoolExecutor(max_workers=self.max_downloads) as pool:
+                        for _ in range(self.max_downloads):
+                            pool.submit(worker)
+
+    def _finish(self, job: Job, failed: int) -> None:
+        """
+        Organize *job* (when requested) and mark it done, unless *failed*
+        of its modules failed: then it stays in ``'downloading'`` with the
+        error recorded, and the next run retries those modules.
+        """
+        if failed:
+            self._fail(job, RuntimeError(f"failed modules: {failed}"))
+            return
+        try:
+            if job.organize_by:
+                self.db.update_job(job.job_id, stage="organizing")
+                self.fetcher(job).organize(organize_by=job.organize_by)
+            self.db.update_job(job.job_id, stage="done")
+        except Exception as exc:
+            self._fail(job, exc)
+
+    def _fail(self, job: Job, exc: Exception) -> None:
+        console.print(f"[red]Job {job.job_id} failed: {exc}")
+        self.db.update_job(job.job_id, error=str(exc))
+
+    def close(self) -> None:
+        """Commit pending progress and close the database."""
+        self.db.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"Orchestrator(jobs={len(self.jobs)}, max_downloads={self.max_downloads})"
+        )
+
+
+def _row_finished(row: Dict, extract: bool) -> bool:
+    """Whether a module row was downloaded (and extracted, with *extract*)."""
+    return bool(row.get("downloaded")) and (not extract or bool(row.get("unzipped")))
+
+
+class _Scheduler:
+    """
+    Hands out module rows across jobs: highest priority first, then the
+    job with the fewest downloads in flight, then the least served one.
+
+    A row shared by several jobs (same URL, hence same ZIP path) is queued
+    once, under the first job that adds it; :meth:`owners` lists every job
+    its outcome counts for.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._queues: Dict[str, deque] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[str, int] = {}
+        self._served: Dict[str, int] = {}
+        self._owners: Dict[str, List[Job]] = {}
+
+    def add(self, job: Job, rows: List[Dict]) -> None:
+        with self._lock:
+            queue = deque()
+            for row in rows:
+                owners = self._owners.setdefault(row["url"], [])
+                if not owners:
+                    queue.append(row)
+                owners.append(job)
+            self._queues[job.job_id] = queue
+            self._jobs[job.job_id] = job
+            self._active[job.job_id] = 0
+            self._served[job.job_id] = 0
+
+    def next(self) -> Optional[Tuple[Job, Dict]]:
+        """Next ``(job, row)`` to download, or ``None`` when all are handed out."""
+        with self._lock:
+            ready = [job_id for job_id, rows in self._queues.items() if rows]
+            if not ready:
+                return None
+            job_id = min(
+                ready,
+                key=lambda j: (
+                    -self._jobs[j].priority,
+                    self._active[j],
+                    self._served[j],
+                ),
+            )
+            self._active[job_id] += 1
+            self._served[job_id] += 1
+            return self._jobs[job_id], self._queues[job_id].popleft()
+
+    def owners(self, row: Dict) -> List[Job]:
+        """Every job that added *row*."""
+        with self._lock:
+            return list(self._owners[row["url"]])
+
+    def release(self, job: Job) -> None:
+        """Mark one download of *job* as finished."""
+        with self._lock:
+            self._active[job.job_id] -= 1
@@ -1,14 +1,19 @@
 """
-Organizer: moves or copies extracted data files into a clean directory
-structure (by module or by year) and deduplicates documentation files.
+Organizer: moves, copies or links extracted data files into a clean directory
+structure (by module, by year or both) and deduplicates documentation files.
+
+Organizing runs in two phases: every file operation is planned up front
+(and can be printed with ``dry_run=True``), then the plan is executed on a
+thread pool.
 """
 
 from __future__ import annotations
 
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Literal
+from typing import Dict, List, Literal, Tuple
 
 import pandas as pd
 from rich.console import Console
@@ -20,13 +25,18 @@ from rich.progress import (
     TextColumn,
     TimeElapsedColumn,
 )
+from rich.table import Table
 
 from .constants import DOC_EXTENSIONS, RELEVANT_EXTENSIONS
 from .utils.db_utils import DatabaseManager
-from .utils.file_utils import file_hash, slugify
+from .utils.file_utils import file_hash, link_or_copy, slugify
 
 console = Console()
 
+_OPERATIONS = {"copy": shutil.copy2, "move": shutil.move, "link": link_or_copy}
+
+PLAN_COLUMNS = ["kind", "layout", "source", "destination", "url"]
+
 
 class Organizer:
     """
@@ -39,9 +49,11 @@ class Organizer:
     unzipped_directory:
         Source directory containing the raw extracted module folders.
     db:
-        Database manager used to record per-file ``organized`` progress.
+        Database manager used to record per-module ``organized`` progress.
     modules_df:
         DataFrame of module metadata (used to resolve module names).
+    workers:
+        Threads used to hash documentation files and to run file operations.
     """
 
     def __init__(
@@ -50,11 +62,14 @@ class Organizer:
         unzipped_directory: Path,
         db: DatabaseManager,
         modules_df: pd.DataFrame,
+        workers: int = 4,
     ) -> None:
         self.organized_dir = organized_directory
         self.unzipped_dir = unzipped_directory
         self.db = db
         self.modules_df = modules_df
+        self.workers = max(1, workers)
+        self._modules = self._index_modules(modules_df)
 
     # ------------------------------------------------------------------ #
     # Public API                                                           #
@@ -62,201 +77,397 @@ class Organizer:
 
     def organize(
         self,
-        organize_by: Literal["module", "year"] = "module",
+        organize_by: Literal["module", "year", "both"] = "module",
         keep_original_names: bool = True,
-        operation: Literal["move", "copy"] = "copy",
+        operation: Literal["move", "copy", "link"] = "copy",
         deduplicate_docs_by_hash: bool = True,
-    ) -> None:
+        dry_run: bool = False,
+    ) -> pd.DataFrame:
         """
         Organize data files from *unzipped_directory* into *organized_directory*.
 
         Parameters
         ----------
         organize_by:
-            Whether to group files under ``by_module/`` or ``by_year/``.
+            Whether to group files under ``by_module/``, ``by_year/`` or
+            ``'both'``.
         keep_original_names:
             If ``False``, files are renamed with a size-based numeric suffix to
             avoid collisions. If ``True``, original filenames are kept (with a
             counter suffix only when there are genuine collisions).
         operation:
-            ``'copy'`` leaves originals untouched; ``'move'`` removes them.
+            ``'copy'`` leaves originals untouched; ``'move'`` removes them;
+            ``'link'`` reflinks or hard-links them (falling back to a copy),
+            so the organized tree takes almost no extra space. Hard links
+            share the file with ``1_unzipped/``: treat both as read-only.
         deduplicate_docs_by_hash:
             When ``True``, identical documentation files (same SHA-256) are
-            stored only once in ``documentation/``.
+            stored only once in ``documentation/``. Only files sharing their
+            size with another file are hashed, and digests are cached in the
+            database, so re-runs only hash new or changed files.
+        dry_run:
+            Print the plan without touching any file.
+
+        Returns
+        -------
+        pd.DataFrame
+            The plan: one row per file operation with ``kind`` (``'data'`` or
+            ``'doc'``), ``layout``, ``source``, ``destination`` and ``url``.
+
+        Raises
+        ------
+        ValueError
+            For an unknown *operation*, or ``'move'`` with ``'both'`` layouts
+            (the second layout would find no files).
         """
-        op_fn = shutil.move if operation == "move" else shutil.copy2
-        self._organize_data_files(organize_by, keep_original_names, op_fn)
-        self._organize_documentation(op_fn, deduplicate_docs_by_hash)
-        console.print(
-            f"[green]Files organized under [blue]{self.organized_dir / f'by_{organize_by}'}"
-        )
+        if operation not in _OPERATIONS:
+            raise ValueError(
+                f"operation must be one of {sorted(_OPERATIONS)}, got {operation!r}"
+            )
+        if organize_by == "both" and operation == "move":
+            raise ValueError(
+                "operation='move' cannot build both layouts; use 'link' or 'copy'"
+            )
+        layouts = ["module", "year"] if organize_by == "both" else [organize_by]
+
+        plan: List[dict] = []
+        for layout in layouts:
+            plan.extend(self._plan_data_files(layout, keep_original_names))
+        doc_plan, doc_keys = self._plan_documentation(deduplicate_docs_by_hash)
+        plan.extend(doc_plan)
+        plan_df = pd.DataFrame(plan, columns=PLAN_COLUMNS)
+
+        if dry_run:
+            self._print_plan(plan_df, operation)
+            return plan_df
+
+        failed = self._execute(plan, _OPERATIONS[operation])
+        self._record_progress(plan, failed)
+        self._record_doc_digests(doc_keys, failed)
+        for layout in layouts:
+            console.print(
+                f"[green]Files organized under [blue]{self.organized_dir / f'by_{layout}'}"
+            )
+        return plan_df
 
     # ------------------------------------------------------------------ #
-    # Data files                                                           #
+    # Planning – data files                                                #
     # ------------------------------------------------------------------ #
 
-    def _organize_data_files(
-        self,
-        organize_by: str,
-        keep_original_names: bool,
-        op_fn,
-    ) -> None:
-        files_by_dest: Dict[str, List[dict]] = {}
+    def _plan_data_files(
+        self, organize_by: str, keep_original_names: bool
+    ) -> List[dict]:
+        files_by_dest: Dict[Path, List[dict]] = {}
 
         for root, _, files in os.walk(self.unzipped_dir):
+            relative_parts = Path(root).relative_to(self.unzipped_dir).parts
+            if not relative_parts:
+                continue
+            parts = relative_parts[0].split("_mod_")  # e.g. "2014_mod_0001"
+            if len(parts) != 2:
+                continue
+            year, module_code = parts
+            module_name, url = self._modules.get((year, module_code), ("unknown", None))
+
+            if organize_by == "module":
+                folder = (
+                    self.organized_dir
+                    / "by_module"
+                    / f"{module_code}_{slugify(module_name)}"
+                )
+                prefix = year
+            else:
+                folder = self.organized_dir / "by_year" / year
+                prefix = module_code
+
             for fname in files:
-                ext = Path(fname).suffix.lower()
-                if ext not in RELEVANT_EXTENSIONS:
+                if Path(fname).suffix.lower() not in RELEVANT_EXTENSIONS:
                     continue
-
                 full_path = Path(root) / fname
-                relative_parts = Path(root).relative_to(self.unzipped_dir).parts
-                if not relative_parts:
-                    continue
-
-                year_module = relative_parts[0]  # e.g. "2014_mod_0001"
-                parts = year_module.split("_mod_")
-                if len(parts) != 2:
-                    continue
-                year, module_code = parts[0], parts[1]
-
-                module_name = self._resolve_module_name(year, module_code)
-
-                if organize_by == "module":
-                    folder = (
-                        self.organized_dir
-                        / "by_module"
-                        / f"{module_code}_{slugify(module_name)}"
-                    )
-                    new_name = f"{year}_{fname}" if keep_original_names else fname
-                else:
-                    folder = self.organized_dir / "by_year" / year
-                    new_name = (
-                        f"{module_code}_{fname}" if keep_original_names else fname
-                    )
-
-                key = str(folder)
-                files_by_dest.setdefault(key, []).append(
+                files_by_dest.setdefault(folder, []).append(
                     {
                         "source": full_path,
-                        "folder": folder,
-                        "new_name": new_name,
+                        "new_name": f"{prefix}_{fname}"
+                        if keep_original_names
+                        else fname,
                         "size": full_path.stat().st_size,
-                        "url": None,  # filled below if available
+                        "url": url,
                     }
                 )
 
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            TimeElapsedColumn(),
-            console=console,
-        ) as progress:
-            task = progress.add_task(
-                "[cyan]Sorting modules ... ", total=len(files_by_dest)
-            )
-
-            for folder_key, file_list in files_by_dest.items():
-                folder = Path(folder_key)
-                folder.mkdir(parents=True, exist_ok=True)
-
-                if not keep_original_names:
-                    file_list.sort(key=lambda x: x["size"], reverse=True)
-                    for idx, fi in enumerate(file_list, start=1):
-                        stem, _, suf = fi["new_name"].rpartition(".")
-                        final = (
-                            f"{stem}_{idx}.{suf}" if suf else f"{fi['new_name']}_{idx}"
+        plan: List[dict] = []
+        for folder, file_list in files_by_dest.items():
+            if not keep_original_names:
+                file_list.sort(key=lambda x: x["size"], reverse=True)
+                finals = []
+                for idx, fi in enumerate(file_list, start=1):
+                    stem, _, suf = fi["new_name"].rpartition(".")
+                    finals.append(
+                        f"{stem}_{idx}.{suf}" if suf else f"{fi['new_name']}_{idx}"
+                    )
+            else:
+                name_count: Dict[str, int] = {}
+                finals = []
+                for fi in file_list:
+                    name = fi["new_name"].lower()
+                    if name in name_count:
+                        name_count[name] += 1
+                        stem, _, suf = name.rpartition(".")
+                        finals.append(
+                            f"{stem}_{name_count[name]}.{suf}"
+                            if suf
+                            else f"{name}_{name_count[name]}"
                         )
-                        dest = folder / final
-                        op_fn(fi["source"], dest)
-                        self.db.mark_organized("", str(dest))  # url not available here
-                else:
-                    name_count: Dict[str, int] = {}
-                    for fi in file_list:
-                        name = fi["new_name"].lower()
-                        if name in name_count:
-                            name_count[name] += 1
-                            stem, _, suf = name.rpartition(".")
-                            final = (
-                                f"{stem}_{name_count[name]}.{suf}"
-                                if suf
-                                else f"{name}_{name_count[name]}"
-                            )
-                        else:
-                            name_count[name] = 0
-                            final = name
-                        dest = folder / final
-                        op_fn(fi["source"], dest)
-                        self.db.mark_organized("", str(dest))
-                progress.update(task, advance=1)
+                    else:
+                        name_count[name] = 0
+                        finals.append(name)
+            for fi, final in zip(file_list, finals):
+                plan.append(
+                    {
+                        "kind": "data",
+                        "layout": organize_by,
+                        "source": fi["source"],
+                        "destination": folder / final,
+                        "url": fi["url"],
+                    }
+                )
+        return plan
 
     # ------------------------------------------------------------------ #
-    # Documentation files                                                  #
+    # Planning – documentation files                                       #
     # ------------------------------------------------------------------ #
 
-    def _organize_documentation(self, op_fn, deduplicate_by_hash: bool) -> None:
+    def _plan_documentation(
+        self, deduplicate_by_hash: bool
+    ) -> Tuple[List[dict], Dict[Path, str]]:
+        """
+        Plan the documentation copies and fill :attr:`documentation_map`.
+
+        Returns the plan and the SHA-256 digest of each planned destination
+        (empty without hashing), recorded once the files exist.
+        """
         doc_dir = self.organized_dir / "documentation"
-        doc_dir.mkdir(parents=True, exist_ok=True)
 
-        seen: Dict[str, str] = {}  # hash/key → canonical filename
+        seen: Dict[object, str] = {}  # content key → canonical filename
         self.documentation_map: Dict[str, List[str]] = {}
 
-        # Index already-present docs to avoid re-hashing on repeated runs
-        if deduplicate_by_hash:
-            for existing in doc_dir.iterdir():
-                if existing.is_file():
-                    key = file_hash(existing)
-                    seen[key] = existing.name
-                    self.documentation_map.setdefault(existing.name, []).append(
-                        existing.name
-                    )
+        existing = (
+            sorted(p for p in doc_dir.iterdir() if p.is_file())
+            if doc_dir.is_dir()
+            else []
+        )
+        taken = {p.name for p in existing}
+        sources = [
+            Path(root) / fname
+            for root, _, files in os.walk(self.unzipped_dir)
+            for fname in files
+            if Path(fname).suffix.lower() in DOC_EXTENSIONS
+        ]
 
-        for root, _, files in os.walk(self.unzipped_dir):
-            for fname in files:
-                ext = Path(fname).suffix.lower()
-                if ext not in DOC_EXTENSIONS:
-                    continue
+        if deduplicate_by_hash:
+            keys = self._content_keys(existing + sources)
+            # Already-present docs are the canonical copies
+            for path in existing:
+                seen[keys[path]] = path.name
+                self.documentation_map.setdefault(path.name, []).append(path.name)
+
+        plan: List[dict] = []
+        digests: Dict[Path, str] = {}
+        for source in sources:
+            fname = source.name
+            if deduplicate_by_hash:
+                key = keys[source]
+            else:
+                key = (fname.lower(), source.stat().st_size)
+
+            if key in seen:
+                canonical = seen[key]
+                self.documentation_map.setdefault(canonical, []).append(fname)
+                continue
+
+            # Build a collision-safe destination name
+            parent = source.parent.name
+            safe_name = slugify(fname) if parent in fname else f"{parent}_{fname}"
+            name = safe_name
+            counter = 1
+            while name in taken:
+                stem, _, suf = safe_name.rpartition(".")
+                name = f"{stem}_{counter}.{suf}" if suf else f"{safe_name}_{counter}"
+                counter += 1
+            taken.add(name)
+            dest = doc_dir / name
+
+            plan.append(
+                {
+                    "kind": "doc",
+                    "layout": "documentation",
+                    "source": source,
+                    "destination": dest,
+                    "url": None,
+                }
+            )
+            seen[key] = name
+            self.documentation_map.setdefault(name, []).append(fname)
+            if deduplicate_by_hash and not isinstance(key, tuple):
+                digests[dest] = key
+        return plan, digests
 
-                source = Path(root) / fname
+    def _content_keys(self, paths: List[Path]) -> Dict[Path, object]:
+        """
+        Content key of every path in *paths*.
 
-                if deduplicate_by_hash:
-                    key = file_hash(source)
-                else:
-                    key = (fname.lower(), source.stat().st_size)
+        A file whose size no other file shares cannot have a duplicate, so
+        its key is ``('size', n)`` and it is never read. The rest get their
+        SHA-256 digest: from the database cache when size and mtime match,
+        otherwise hashed on a thread pool (once per inode, so hard links
+        are read only once).
+        """
+        stats = {path: path.stat() for path in paths}
+        by_size: Dict[int, List[Path]] = {}
+        for path, st in stats.items():
+            by_size.setdefault(st.st_size, []).append(path)
+
+        keys: Dict[Path, object] = {}
+        candidates: List[Path] = []
+        for size, group in by_size.items():
+            if len(group) == 1:
+                keys[group[0]] = ("size", size)
+            else:
+                candidates.extend(group)
+
+        cached = self.db.get_file_hashes(os.path.abspath(p) for p in candidates)
+        pending: Dict[tuple, List[Path]] = {}  # inode → paths to hash
+        for path in candidates:
+            st = stats[path]
+            hit = cached.get(os.path.abspath(path))
+            if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+                keys[path] = hit[2]
+            else:
+                pending.setdefault((st.st_dev, st.st_ino), []).append(path)
+
+        if pending:
+            groups = list(pending.values())
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                digests = list(pool.map(lambda g: file_hash(g[0]), groups))
+            rows = []
+            for group, digest in zip(groups, digests):
+                for path in group:
+                    keys[path] = digest
+                    st = stats[path]
+                    rows.append(
+                        (os.path.abspath(path), st.st_size, st.st_mtime_ns, digest)
+                    )
+            self.db.record_file_hashes(rows)
+        return keys
 
-                if key in seen:
-                    canonical = seen[key]
-                    self.documentation_map.setdefault(canonical, []).append(fname)
-                    continue
+    # ------------------------------------------------------------------ #
+    # Execution                                                            #
+    # ------------------------------------------------------------------ #
 
-                # Build a collision-safe destination name
-                parent = source.parent.name
-                safe_name = slugify(fname) if parent in fname else f"{parent}_{fname}"
-                dest = doc_dir / safe_name
-                counter = 1
-                while dest.exists():
-                    stem, _, suf = safe_name.rpartition(".")
-                    dest = doc_dir / (
-                        f"{stem}_{counter}.{suf}" if suf else f"{safe_name}_{counter}"
-                    )
-                    counter += 1
+    def _execute(self, plan: List[dict], op_fn) -> set:
+        """Run *op_fn* over the plan on a thread pool; return failed destinations."""
+        for folder in {item["destination"].parent for item in plan}:
+            folder.mkdir(parents=True, exist_ok=True)
 
-                op_fn(source, dest)
-                seen[key] = dest.name
-                self.documentation_map.setdefault(dest.name, []).append(fname)
+        failed: set = set()
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task("[cyan]Organizing files ... ", total=len(plan))
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {
+                    pool.submit(op_fn, item["source"], item["destination"]): item
+                    for item in plan
+                }
+                for future in as_completed(futures):
+                    item = futures[future]
+                    try:
+                        future.result()
+                    except Exception as exc:
+                        failed.add(item["destination"])
+                        console.print(
+                            f"[red]Could not organize {item['source']}: {exc}"
+                        )
+                    progress.update(task, advance=1)
+        return failed
+
+    def _record_progress(self, plan: List[dict], failed: set) -> None:
+        """Mark every module whose data files were all organized."""
+        folders: Dict[str, Path] = {}
+        broken: set = set()
+        for item in plan:
+            if item["kind"] != "data" or item["url"] is None:
+                continue
+            if item["destination"] in failed:
+                broken.add(item["url"])
+            folders[item["url"]] = item["destination"].parent
+        for url, folder in folders.items():
+            if url not in broken:
+                self.db.mark_organized(url, str(folder))
+
+    def _record_doc_digests(self, digests: Dict[Path, str], failed: set) -> None:
+        # The organized copy inherits its source digest: never hashed again
+        rows = []
+        for dest, digest in digests.items():
+            if dest in failed:
+                continue
+            st = dest.stat()
+            rows.append((os.path.abspath(dest), st.st_size, st.st_mtime_ns, digest))
+        if rows:
+            self.db.record_file_hashes(rows)
+
+    def _print_plan(self, plan: pd.DataFrame, operation: str) -> None:
+        table = Table(title=f"Organize plan ({operation}, dry run)")
+        table.add_column("Kind")
+        table.add_column("Source")
+        table.add_column("Destination")
+        for item in plan.itertuples(index=False):
+            table.add_row(
+                item.kind,
+                str(item.source),
+                str(Path(item.destination).relative_to(self.organized_dir)),
+            )
+        console.print(table)
+        counts = plan["kind"].value_counts()
+        console.print(
+            f"[yellow]{counts.get('data', 0)} data files and "
+            f"{counts.get('doc', 0)} documentation files would be organized."
+        )
 
     # ------------------------------------------------------------------ #
     # Helpers                                                              #
     # ------------------------------------------------------------------ #
 
-    def _resolve_module_name(self, year: str, module_code: str) -> str:
-        try:
-            mask = (self.modules_df["year"].astype(str) == year) & (
-                self.modules_df["module_code"].astype(str).str.zfill(4) == module_code
-            )
-            match = self.modules_df.loc[mask, "module_name"]
-            return match.iloc[0] if not match.empty else "unknown"
-        except Exception:
-            return "unknown"
+    @staticmethod
+    def _index_modules(modules_df: pd.DataFrame) -> Dict[Tuple[str, str], tuple]:
+        """
+        Map ``(year, module_code)`` to ``(module_name, url)``.
+
+        Extracted folders are named after ``year_ref``; the survey ``year``
+        is indexed too so either resolves. The first listed row wins.
+        """
+        index: Dict[Tuple[str, str], tuple] = {}
+        if modules_df is None or modules_df.empty:
+            return index
+        codes = modules_df["module_code"].astype(str).str.zfill(4)
+        names = modules_df.get("module_name", pd.Series("unknown", modules_df.index))
+        urls = modules_df.get("url", pd.Series(None, modules_df.index, dtype=object))
+        for year_col in ("year_ref", "year"):
+            if year_col not in modules_df:
+                continue
+            years = pd.to_numeric(modules_df[year_col], errors="coerce")
+            years = years.astype("Int64").astype(str)
+            for year, code, name, url in zip(years, codes, names, urls):
+                index.setdefault(
+                    (year, code),
+                    (
+                        name if isinstance(name, str) else "unknown",
+                        url if isinstance(url, str) and url else None,
+                    ),
+                )
+        return index
@@ -1,17 +1,39 @@
 """
 Database manager: SQLite-backed cache and progress tracker for module downloads.
+
+Writes are queued to a single writer thread that groups them into batched
+transactions on a WAL-mode database; reads flush the queue first, so they
+always see every earlier write. A failed write is reported by the writer
+and through the future returned when it was queued, never to a reader.
 """
 
 from __future__ import annotations
 
+import atexit
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
+from rich.console import Console
 
-from ..constants import CACHE_MICRODATOS, PROGRESS_COLUMNS
+from ..constants import (
+    CACHE_MICRODATOS,
+    FILE_HASHES,
+    JOBS,
+    PROGRESS_COLUMNS,
+    SCHEMA_MAP,
+    VALUE_LABELS,
+    VARIABLES,
+    ZIP_MEMBERS,
+)
 
+console = Console()
 
 _CREATE_TABLE = f"""
 CREATE TABLE IF NOT EXISTS {CACHE_MICRODATOS} (
@@ -39,10 +61,173 @@ CREATE TABLE IF NOT EXISTS {CACHE_MICRODATOS} (
     unzipped      INTEGER DEFAULT 0,
     organized     INTEGER DEFAULT 0,
     removed_zip   INTEGER DEFAULT 0,
+    path_partial  TEXT,
+    bytes_partial INTEGER DEFAULT 0,
+    content_length INTEGER,
+    remote_validator TEXT,
+    segments      TEXT,
+    zip_size      INTEGER,
+    zip_mtime_ns  INTEGER,
+    zip_sha256    TEXT,
+    verified_at   TEXT,
+    path_parquet  TEXT,
+    converted     INTEGER DEFAULT 0,
+    extract_sha256 TEXT,
     UNIQUE(survey, year, periodo, module_code)
 )
 """
 
+_CREATE_ZIP_MEMBERS = f"""
+CREATE TABLE IF NOT EXISTS {ZIP_MEMBERS} (
+    url           TEXT    NOT NULL,
+    member        TEXT    NOT NULL,
+    kind          TEXT,
+    file_size     INTEGER,
+    compress_size INTEGER,
+    compress_type TEXT,
+    crc           INTEGER,
+    inspected_at  TEXT,
+    PRIMARY KEY (url, member)
+)
+"""
+
+_CREATE_SCHEMA_MAP = f"""
+CREATE TABLE IF NOT EXISTS {SCHEMA_MAP} (
+    survey        TEXT    NOT NULL,
+    module_code   TEXT    NOT NULL,
+    table_name    TEXT    NOT NULL,
+    year          INTEGER NOT NULL,
+    source_path   TEXT,
+    source_column TEXT    NOT NULL,
+    column_name   TEXT    NOT NULL,
+    source_type   TEXT,
+    unified_type  TEXT,
+    PRIMARY KEY (survey, module_code, table_name, year, source_column)
+)
+"""
+
+_CREATE_FILE_HASHES = f"""
+CREATE TABLE IF NOT EXISTS {FILE_HASHES} (
+    path          TEXT    PRIMARY KEY,
+    size          INTEGER NOT NULL,
+    mtime_ns      INTEGER NOT NULL,
+    sha256        TEXT    NOT NULL,
+    hashed_at     TEXT
+)
+"""
+
+_CREATE_VARIABLES = f"""
+CREATE TABLE IF NOT EXISTS {VARIABLES} (
+    survey        TEXT    NOT NULL,
+    year          INTEGER NOT NULL,
+    module_code   TEXT    NOT NULL,
+    file          TEXT    NOT NULL,
+    variable      TEXT    NOT NULL COLLATE NOCASE,
+    position      INTEGER,
+    label         TEXT,
+    type          TEXT,
+    format        TEXT,
+    label_set     TEXT,
+    n_rows        INTEGER,
+    search_text   TEXT,
+    indexed_at    TEXT,
+    PRIMARY KEY (survey, year, module_code, file, variable)
+)
+"""
+
+_CREATE_VALUE_LABELS = f"""
+CREATE TABLE IF NOT EXISTS {VALUE_LABELS} (
+    survey        TEXT    NOT NULL,
+    year          INTEGER NOT NULL,
+    module_code   TEXT    NOT NULL,
+    file          TEXT    NOT NULL,
+    label_set     TEXT    NOT NULL,
+    value         TEXT    NOT NULL,
+    label         TEXT,
+    PRIMARY KEY (survey, year, module_code, file, label_set, value)
+)
+"""
+
+_CREATE_JOBS = f"""
+CREATE TABLE IF NOT EXISTS {JOBS} (
+    job_id        TEXT    PRIMARY KEY,
+    survey        TEXT    NOT NULL,
+    years         TEXT    NOT NULL,
+    module_codes  TEXT,
+    priority      INTEGER DEFAULT 0,
+    stage         TEXT    NOT NULL,
+    total         INTEGER DEFAULT 0,
+    done          INTEGER DEFAULT 0,
+    failed        INTEGER DEFAULT 0,
+    error         TEXT,
+    updated_at    TEXT
+)
+"""
+
+_JOB_COLUMNS = [
+    "job_id",
+    "survey",
+    "years",
+    "module_codes",
+    "priority",
+    "stage",
+    "total",
+    "done",
+    "failed",
+    "error",
+    "updated_at",
+]
+
+_VARIABLE_COLUMNS = [
+    "survey",
+    "year",
+    "module_code",
+    "file",
+    "variable",
+    "position",
+    "label",
+    "type",
+    "format",
+    "label_set",
+    "n_rows",
+    "search_text",
+    "indexed_at",
+]
+_VALUE_LABEL_COLUMNS = [
+    "survey",
+    "year",
+    "module_code",
+    "file",
+    "label_set",
+    "value",
+    "label",
+]
+
+# Keeps IN (...) lists below SQLite's bound-parameter limit
+_MAX_PARAMS = 500
+
+# Writer thread: statements per transaction and how long a batch stays open
+_BATCH_SIZE = 500
+_BATCH_WINDOW = 0.25  # seconds
+
+_STOP = object()
+
+# Columns added after the first release; older databases are migrated in place
+_MIGRATIONS = {
+    "path_partial": "TEXT",
+    "bytes_partial": "INTEGER DEFAULT 0",
+    "content_length": "INTEGER",
+    "remote_validator": "TEXT",
+    "segments": "TEXT",
+    "zip_size": "INTEGER",
+    "zip_mtime_ns": "INTEGER",
+    "zip_sha256": "TEXT",
+    "verified_at": "TEXT",
+    "path_parquet": "TEXT",
+    "converted": "INTEGER DEFAULT 0",
+    "extract_sha256": "TEXT",
+}
+
 
 class DatabaseManager:
     """
@@ -50,20 +235,170 @@ class DatabaseManager:
 
     * Schema initialisation
     * Module-list caching (read-through from INEI portal)
-    * Per-row progress updates (downloaded / unzipped / organized / removed_zip)
+    * Per-row progress updates (downloaded / unzipped / organized / removed_zip
+      / converted)
+    * ZIP integrity manifest (size, mtime, SHA-256) so verified archives are
+      trusted on a cheap ``stat`` instead of a full CRC pass
+    * Partial-download state (``.part`` path, bytes received, remote
+      validator) so interrupted downloads resume across restarts
+    * File digest cache keyed by ``(path, size, mtime)`` so unchanged files
+      are never hashed twice
+    * Cross-year variable dictionary (names, labels, types, value labels)
+    * Orchestrator jobs (stage and row counts) so a multi-survey run
+      resumes after a restart
+
+    Every write method only enqueues its statements; a background thread
+    commits them in batches of up to 500 statements (or every 0.25 s),
+    so parallel downloader threads never wait on ``fsync``. Call
+    :meth:`flush` to wait for pending writes and :meth:`close` when done
+    (also run at interpreter exit). A write that fails is printed by the
+    writer thread and rolled back alone; readers never see its error.
+
+    Parameters
+    ----------
+    db_path:
+        SQLite database file.
+    timeout:
+        Seconds a connection waits for a lock held by another process.
     """
 
-    def __init__(self, db_path: Path) -> None:
+    def __init__(self, db_path: Path, timeout: float = 30.0) -> None:
         db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.db_path = db_path
+        self.timeout = timeout
+        self.conn = self._connect()
         self._ensure_schema()
 
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_loop, name="inei-db-writer", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            str(self.db_path), timeout=self.timeout, check_same_thread=False
+        )
+        # WAL lets readers run while the writer commits; NORMAL skips the
+        # per-commit fsync (still durable across application crashes)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ------------------------------------------------------------------ #
+    # Writer thread                                                        #
+    # ------------------------------------------------------------------ #
+
+    def _submit(self, sql: str, params=(), many: bool = False) -> Future:
+        """Queue one statement for the writer thread (see :meth:`_submit_all`)."""
+        return self._submit_all([(sql, params, many)])
+
+    def _submit_all(self, statements: List[Tuple[str, object, bool]]) -> Future:
+        """
+        Queue statements that must be committed in the same transaction.
+
+        Returns a future that resolves once they are committed, or holds
+        the error that rolled them back.
+        """
+        if self._closed:
+            raise RuntimeError("DatabaseManager is closed")
+        future: Future = Future()
+        self._queue.put((statements, future))
+        return future
+
+    def flush(self) -> None:
+        """
+        Block until every queued write is committed (or has failed).
+
+        Failed writes are reported through their own futures, not here.
+        """
+        if not self._closed:
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait()
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + _BATCH_WINDOW
+                # Keep collecting until the window closes, the batch is full
+                # or someone waits on a flush/stop
+                while len(batch) < _BATCH_SIZE and not _is_marker(batch[-1]):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+
+                jobs = [job for job in batch if not _is_marker(job)]
+                if jobs:
+                    self._commit(conn, jobs)
+                for job in batch:
+                    if isinstance(job, threading.Event):
+                        job.set()
+                if batch[-1] is _STOP:
+                    return
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, jobs: List[tuple]) -> None:
+        try:
+            with conn:
+                for statements, _ in jobs:
+                    _run(conn, statements)
+        except Exception:
+            # Replay one job per transaction so one bad write loses nothing else
+            for statements, future in jobs:
+                try:
+                    with conn:
+                        _run(conn, statements)
+                except Exception as exc:
+                    sql = " ".join(statements[0][0].split())
+                    console.print(f"[red]Database write failed ({sql[:80]}): {exc}")
+                    future.set_exception(exc)
+                else:
+                    future.set_result(None)
+            return
+        for _, future in jobs:
+            future.set_result(None)
+
     # ------------------------------------------------------------------ #
     # Schema                                                               #
     # ------------------------------------------------------------------ #
 
     def _ensure_schema(self) -> None:
         self.conn.execute(_CREATE_TABLE)
+        self.conn.execute(_CREATE_ZIP_MEMBERS)
+        self.conn.execute(_CREATE_SCHEMA_MAP)
+        self.conn.execute(_CREATE_FILE_HASHES)
+        self.conn.execute(_CREATE_VARIABLES)
+        self.conn.execute(_CREATE_VALUE_LABELS)
+        self.conn.execute(_CREATE_JOBS)
+        # Lookups by name across every year of a survey
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{VARIABLES}_name "
+            f"ON {VARIABLES} (survey, variable)"
+        )
+        existing = {
+            row[1]
+            for row in self.conn.execute(f"PRAGMA table_info({CACHE_MICRODATOS})")
+        }
+        for column, decl in _MIGRATIONS.items():
+            if column not in existing:
+                self.conn.execute(
+                    f"ALTER TABLE {CACHE_MICRODATOS} ADD COLUMN {column} {decl}"
+                )
+        # Every progress update looks its row up by URL
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{CACHE_MICRODATOS}_url "
+            f"ON {CACHE_MICRODATOS} (url)"
+        )
         self.conn.commit()
 
     # ------------------------------------------------------------------ #
@@ -74,6 +409,7 @@ class DatabaseManager:
         self, survey: str, year: int, periodo: str
     ) -> Optional[pd.DataFrame]:
         """Return cached module rows or ``None`` when the cache is empty."""
+        self.flush()
         query = f"""
             SELECT * FROM {CACHE_MICRODATOS}
             WHERE survey = ? AND year = ? AND periodo = ?
@@ -92,7 +428,7 @@ class DatabaseManager:
         if df.empty:
             return
         # SQLite does not support INSERT OR IGNORE via pandas directly,
-        # so we write row-by-row using executemany.
+        # so the rows go through one executemany.
         cols = [c for c in df.columns if c != "id"]
         placeholders = ", ".join("?" for _ in cols)
         col_names = ", ".join(cols)
@@ -100,51 +436,473 @@ class DatabaseManager:
             f"INSERT OR IGNORE INTO {CACHE_MICRODATOS} ({col_names}) "
             f"VALUES ({placeholders})"
         )
-        rows = [tuple(row[c] for c in cols) for _, row in df.iterrows()]
-        self.conn.executemany(sql, rows)
-        self.conn.commit()
+        self._submit(sql, _records(df[cols]), many=True)
 
     # ------------------------------------------------------------------ #
     # Progress tracking                                                    #
     # ------------------------------------------------------------------ #
 
     def mark_downloaded(self, url: str, path_download: str) -> None:
-        self.conn.execute(
+        self._submit(
             f"UPDATE {CACHE_MICRODATOS} SET downloaded=1, path_download=? WHERE url=?",
             (path_download, url),
         )
-        self.conn.commit()
 
-    def mark_unzipped(self, url: str, path_extract: str) -> None:
-        self.conn.execute(
-            f"UPDATE {CACHE_MICRODATOS} SET unzipped=1, path_extract=? WHERE url=?",
-            (path_extract, url),
+    def mark_unzipped(
+        self, url: str, path_extract: str, zip_sha256: Optional[str] = None
+    ) -> None:
+        """Mark *url* extracted, from the ZIP with digest *zip_sha256* if known."""
+        self._submit(
+            f"""UPDATE {CACHE_MICRODATOS}
+                SET unzipped=1, path_extract=?,
+                    extract_sha256=COALESCE(?, extract_sha256)
+                WHERE url=?""",
+            (path_extract, zip_sha256, url),
         )
-        self.conn.commit()
+
+    def get_extract_digest(self, url: str) -> Optional[str]:
+        """Digest of the ZIP that the extracted folder of *url* came from."""
+        self.flush()
+        row = self.conn.execute(
+            f"SELECT extract_sha256 FROM {CACHE_MICRODATOS} WHERE url=?", (url,)
+        ).fetchone()
+        return row[0] if row else None
 
     def mark_organized(self, url: str, path_organized: str) -> None:
-        self.conn.execute(
+        self._submit(
             f"UPDATE {CACHE_MICRODATOS} SET organized=1, path_organized=? WHERE url=?",
             (path_organized, url),
         )
-        self.conn.commit()
+
+    def mark_converted(self, url: str, path_parquet: str) -> None:
+        self._submit(
+            f"UPDATE {CACHE_MICRODATOS} SET converted=1, path_parquet=? WHERE url=?",
+            (path_parquet, url),
+        )
 
     def mark_removed_zip(self, url: str) -> None:
-        self.conn.execute(
+        self._submit(
             f"UPDATE {CACHE_MICRODATOS} SET removed_zip=1 WHERE url=?",
             (url,),
         )
-        self.conn.commit()
 
     def reset_download(self, url: str) -> None:
         """Clear all progress flags for *url* (used when force=True)."""
-        self.conn.execute(
+        self._submit(
             f"""UPDATE {CACHE_MICRODATOS}
-                SET downloaded=0, unzipped=0, organized=0, removed_zip=0
+                SET downloaded=0, unzipped=0, organized=0, removed_zip=0,
+                    converted=0,
+                    path_partial=NULL, bytes_partial=0,
+                    content_length=NULL, remote_validator=NULL, segments=NULL,
+                    zip_size=NULL, zip_mtime_ns=NULL, zip_sha256=NULL,
+                    verified_at=NULL
                 WHERE url=?""",
             (url,),
         )
-        self.conn.commit()
+
+    # ------------------------------------------------------------------ #
+    # ZIP members                                                          #
+    # ------------------------------------------------------------------ #
+
+    def replace_zip_members(self, url: str, members: List[Dict]) -> None:
+        """Store the member listing of the ZIP at *url*, replacing any previous one."""
+        inspected_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        rows = [
+            (
+                url,
+                m["member"],
+                m["kind"],
+                m["file_size"],
+                m["compress_size"],
+                m["compress_type"],
+                m["crc"],
+                inspected_at,
+            )
+            for m in members
+        ]
+        self._submit_all(
+            [
+                (f"DELETE FROM {ZIP_MEMBERS} WHERE url=?", (url,), False),
+                (
+                    f"""INSERT INTO {ZIP_MEMBERS}
+                        (url, member, kind, file_size, compress_size,
+                         compress_type, crc, inspected_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    rows,
+                    True,
+                ),
+            ]
+        )
+
+    def get_zip_members(self, urls: Iterable[str]) -> pd.DataFrame:
+        """Return the stored member listings of *urls* (one row per member)."""
+        self.flush()
+        urls = list(urls)
+        if not urls:
+            return pd.DataFrame(
+                columns=[
+                    "url",
+                    "member",
+                    "kind",
+                    "file_size",
+                    "compress_size",
+                    "compress_type",
+                    "crc",
+                    "inspected_at",
+                ]
+            )
+        marks = ", ".join("?" for _ in urls)
+        return pd.read_sql(
+            f"SELECT * FROM {ZIP_MEMBERS} WHERE url IN ({marks})",
+            self.conn,
+            params=urls,
+        )
+
+    # ------------------------------------------------------------------ #
+    # Lake schema map                                                      #
+    # ------------------------------------------------------------------ #
+
+    def replace_schema_map(
+        self, survey: str, module_code: str, table_name: str, df: pd.DataFrame
+    ) -> None:
+        """Replace the schema map of one lake table with the rows of *df*."""
+        cols = list(df.columns)
+        self._submit_all(
+            [
+                (
+                    f"""DELETE FROM {SCHEMA_MAP}
+                        WHERE survey=? AND module_code=? AND table_name=?""",
+                    (survey, module_code, table_name),
+                    False,
+                ),
+                (
+                    f"INSERT INTO {SCHEMA_MAP} ({', '.join(cols)}) "
+                    f"VALUES ({', '.join('?' for _ in cols)})",
+                    _records(df),
+                    True,
+                ),
+            ]
+        )
+
+    def get_schema_map(
+        self, survey: str, module_code: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Return the lake schema map of *survey* (optionally one module)."""
+        self.flush()
+        query = f"SELECT * FROM {SCHEMA_MAP} WHERE survey = ?"
+        params: list = [survey]
+        if module_code is not None:
+            query += " AND module_code = ?"
+            params.append(module_code)
+        return pd.read_sql(
+            query + " ORDER BY module_code, table_name, year", self.conn, params=params
+        )
+
+    # ------------------------------------------------------------------ #
+    # Integrity manifest                                                   #
+    # ------------------------------------------------------------------ #
+
+    def record_manifest(
+        self, url: str, zip_size: int, zip_mtime_ns: int, zip_sha256: str
+    ) -> None:
+        """Store the fingerprint of a ZIP that has just been verified."""
+        verified_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._submit(
+            f"""UPDATE {CACHE_MICRODATOS}
+                SET zip_size=?, zip_mtime_ns=?, zip_sha256=?, verified_at=?
+                WHERE url=?""",
+            (zip_size, zip_mtime_ns, zip_sha256, verified_at, url),
+        )
+
+    def get_manifest(self, url: str) -> Optional[Dict]:
+        """Return the recorded ZIP fingerprint of *url*, or ``None``."""
+        self.flush()
+        row = self.conn.execute(
+            f"""SELECT zip_size, zip_mtime_ns, zip_sha256, verified_at
+                FROM {CACHE_MICRODATOS} WHERE url=? AND zip_sha256 IS NOT NULL""",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("zip_size", "zip_mtime_ns", "zip_sha256", "verified_at"), row))
+
+    # ------------------------------------------------------------------ #
+    # Partial downloads                                                    #
+    # ------------------------------------------------------------------ #
+
+    def mark_partial(
+        self,
+        url: str,
+        path_partial: str,
+        bytes_partial: int,
+        content_length: Optional[int] = None,
+        remote_validator: Optional[str] = None,
+        segments: Optional[str] = None,
+    ) -> None:
+        """
+        Record how far the ``.part`` file of *url* has progressed.
+
+        *segments* is the JSON ``[[start, end, done], ...]`` state of a
+        segmented download; it is kept until :meth:`clear_partial`.
+        """
+        self._submit(
+            f"""UPDATE {CACHE_MICRODATOS}
+                SET path_partial=?, bytes_partial=?,
+                    content_length=COALESCE(?, content_length),
+                    remote_validator=COALESCE(?, remote_validator),
+                    segments=COALESCE(?, segments)
+                WHERE url=?""",
+            (
+                path_partial,
+                bytes_partial,
+                content_length,
+                remote_validator,
+                segments,
+                url,
+            ),
+        )
+
+    def get_partial(self, url: str) -> Optional[Dict]:
+        """Return the partial-download state of *url*, or ``None``."""
+        self.flush()
+        row = self.conn.execute(
+            f"""SELECT path_partial, bytes_partial, content_length,
+                       remote_validator, segments
+                FROM {CACHE_MICRODATOS} WHERE url=? AND path_partial IS NOT NULL""",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = (
+            "path_partial",
+            "bytes_partial",
+            "content_length",
+            "remote_validator",
+            "segments",
+        )
+        return dict(zip(keys, row))
+
+    def clear_partial(self, url: str) -> None:
+        """Forget the partial-download state of *url*."""
+        self._submit(
+            f"""UPDATE {CACHE_MICRODATOS}
+                SET path_partial=NULL, bytes_partial=0,
+                    content_length=NULL, remote_validator=NULL, segments=NULL
+                WHERE url=?""",
+            (url,),
+        )
+
+    # ------------------------------------------------------------------ #
+    # File digest cache                                                    #
+    # ------------------------------------------------------------------ #
+
+    def get_file_hashes(self, paths: Iterable[str]) -> Dict[str, Tuple[int, int, str]]:
+        """
+        Return the cached ``(size, mtime_ns, sha256)`` of each of *paths*.
+
+        Paths never hashed are missing from the result; callers must compare
+        size and mtime with the file on disk before trusting a digest.
+        """
+        self.flush()
+        paths = list(paths)
+        found: Dict[str, Tuple[int, int, str]] = {}
+        for i in range(0, len(paths), _MAX_PARAMS):
+            chunk = paths[i : i + _MAX_PARAMS]
+            marks = ", ".join("?" for _ in chunk)
+            for path, size, mtime_ns, sha256 in self.conn.execute(
+                f"""SELECT path, size, mtime_ns, sha256 FROM {FILE_HASHES}
+                    WHERE path IN ({marks})""",
+                chunk,
+            ):
+                found[path] = (size, mtime_ns, sha256)
+        return found
+
+    def record_file_hashes(self, rows: Iterable[Tuple[str, int, int, str]]) -> None:
+        """Store ``(path, size, mtime_ns, sha256)`` digests, replacing old ones."""
+        hashed_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._submit(
+            f"""INSERT OR REPLACE INTO {FILE_HASHES}
+                (path, size, mtime_ns, sha256, hashed_at) VALUES (?, ?, ?, ?, ?)""",
+            [(*row, hashed_at) for row in rows],
+            many=True,
+        )
+
+    # ------------------------------------------------------------------ #
+    # Variable dictionary                                                  #
+    # ------------------------------------------------------------------ #
+
+    def replace_variable_index(
+        self,
+        survey: str,
+        year: int,
+        module_code: str,
+        variables: List[Dict],
+        value_labels: List[Dict],
+    ) -> None:
+        """Replace the indexed variables and value labels of one module-year."""
+        key = (survey, year, module_code)
+        where = "WHERE survey=? AND year=? AND module_code=?"
+        statements = [
+            (f"DELETE FROM {VARIABLES} {where}", key, False),
+            (f"DELETE FROM {VALUE_LABELS} {where}", key, False),
+        ]
+        for table, cols, rows in (
+            (VARIABLES, _VARIABLE_COLUMNS, variables),
+            (VALUE_LABELS, _VALUE_LABEL_COLUMNS, value_labels),
+        ):
+            if rows:
+                statements.append(
+                    (
+                        f"INSERT OR REPLACE INTO {table} ({', '.join(cols)}) "
+                        f"VALUES ({', '.join('?' for _ in cols)})",
+                        [tuple(r.get(c) for c in cols) for r in rows],
+                        True,
+                    )
+                )
+        self._submit_all(statements)
+
+    def get_indexed_modules(self, survey: str) -> set:
+        """``(year, module_code)`` pairs of *survey* present in the index."""
+        self.flush()
+        return set(
+            self.conn.execute(
+                f"SELECT DISTINCT year, module_code FROM {VARIABLES} WHERE survey=?",
+                (survey,),
+            ).fetchall()
+        )
+
+    def get_variables(
+        self, survey: str, names: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Indexed variables of *survey*, optionally only those called *names*
+        (case-insensitive).
+        """
+        self.flush()
+        cols = ", ".join(c for c in _VARIABLE_COLUMNS if c != "search_text")
+        query = f"SELECT {cols} FROM {VARIABLES} WHERE survey = ?"
+        params: list = [survey]
+        if names is not None:
+            names = list(names)
+            query += f" AND variable IN ({', '.join('?' for _ in names)})"
+            params += names
+        return pd.read_sql(
+            query + " ORDER BY variable, year, module_code, file, position",
+            self.conn,
+            params=params,
+        )
+
+    def search_variables(
+        self, survey: str, terms: List[str], limit: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Indexed variables of *survey* whose name + label contain every one of
+        the normalized *terms*.
+        """
+        self.flush()
+        cols = ", ".join(c for c in _VARIABLE_COLUMNS if c != "search_text")
+        query = f"SELECT {cols} FROM {VARIABLES} WHERE survey = ?"
+        params: list = [survey]
+        for term in terms:
+            query += " AND search_text LIKE ? ESCAPE '\\'"
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        query += " ORDER BY variable, year, module_code, file"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return pd.read_sql(query, self.conn, params=params)
+
+    def get_value_labels(self, survey: str, variable: str) -> pd.DataFrame:
+        """Value labels of *variable* in every year and file where it is labelled."""
+        self.flush()
+        return pd.read_sql(
+            f"""SELECT v.year, v.module_code, v.file, v.variable, l.label_set,
+                       l.value, l.label
+                FROM {VARIABLES} v
+                JOIN {VALUE_LABELS} l
+                  ON l.survey = v.survey AND l.year = v.year
+                 AND l.module_code = v.module_code AND l.file = v.file
+                 AND l.label_set = v.label_set
+                WHERE v.survey = ? AND v.variable = ?
+                ORDER BY v.year, v.module_code, v.file, l.value""",
+            self.conn,
+            params=(survey, variable),
+        )
+
+    # ------------------------------------------------------------------ #
+    # Orchestrator jobs                                                    #
+    # ------------------------------------------------------------------ #
+
+    def save_job(self, job: Dict) -> None:
+        """Insert or replace the definition of a job (keys of ``inei_jobs``)."""
+        job = {k: v for k, v in job.items() if k in _JOB_COLUMNS}
+        job["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        cols = list(job)
+        updates = ", ".join(f"{c}=excluded.{c}" for c in cols if c != "job_id")
+        self._submit(
+            f"""INSERT INTO {JOBS} ({", ".join(cols)})
+                VALUES ({", ".join("?" for _ in cols)})
+                ON CONFLICT(job_id) DO UPDATE SET {updates}""",
+            [job[c] for c in cols],
+        )
+
+    def update_job(self, job_id: str, **fields) -> None:
+        """Update some columns (``stage``, ``done``, ...) of a saved job."""
+        fields = {k: v for k, v in fields.items() if k in _JOB_COLUMNS}
+        fields["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._submit(
+            f"UPDATE {JOBS} SET {', '.join(f'{c}=?' for c in fields)} WHERE job_id=?",
+            [*fields.values(), job_id],
+        )
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Return the stored row of *job_id*, or ``None``."""
+        self.flush()
+        row = self.conn.execute(
+            f"SELECT {', '.join(_JOB_COLUMNS)} FROM {JOBS} WHERE job_id=?",
+            (job_id,),
+        ).fetchone()
+        return dict(zip(_JOB_COLUMNS, row)) if row else None
+
+    def get_jobs(self, job_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Stored jobs, optionally only *job_ids*."""
+        self.flush()
+        query = f"SELECT {', '.join(_JOB_COLUMNS)} FROM {JOBS}"
+        params: list = []
+        if job_ids is not None:
+            params = list(job_ids)
+            query += f" WHERE job_id IN ({', '.join('?' for _ in params)})"
+        return pd.read_sql(
+            query + " ORDER BY priority DESC, job_id", self.conn, params=params
+        )
 
     def close(self) -> None:
-        self.conn.close()
+        """Commit pending writes, stop the writer thread and close the database."""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            # Release the writer and connection even if the wait is interrupted
+            self._closed = True
+            self._queue.put(_STOP)
+            self._writer.join()
+            self.conn.close()
+            atexit.unregister(self.close)
+
+
+def _is_marker(job) -> bool:
+    return job is _STOP or isinstance(job, threading.Event)
+
+
+def _run(conn: sqlite3.Connection, statements: List[Tuple[str, object, bool]]):
+    for sql, params, many in statements:
+        if many:
+            conn.executemany(sql, params)
+        else:
+            conn.execute(sql, params)
+
+
+def _records(df: pd.DataFrame) -> list:
+    """Rows of *df* as lists of Python scalars, with ``None`` for missing values."""
+    return df.astype(object).where(df.notna(), None).values.tolist()
@@ -0,0 +1,175 @@
+"""
+Minimal streaming reader for dBASE (``.dbf``) tables.
+
+Reads the header and field descriptors, then yields records in fixed-size
+:class:`pyarrow.RecordBatch` chunks from any sequential binary stream (a
+ZIP member opened with :meth:`zipfile.ZipFile.open` works), so large DBF
+files are never loaded whole.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Tuple
+
+
+@dataclass(frozen=True)
+class DBFField:
+    name: str
+    type: str
+    length: int
+    decimals: int
+
+
+def read_dbf_header(stream: BinaryIO) -> Tuple[int, int, List[DBFField]]:
+    """
+    Parse the DBF header from *stream*.
+
+    Returns ``(n_records, record_length, fields)`` and leaves *stream*
+    positioned at the first record.
+    """
+    head = _read_exact(stream, 32)
+    n_records, header_length, record_length = struct.unpack("<IHH", head[4:12])
+
+    fields: List[DBFField] = []
+    consumed = 32
+    while True:
+        first = _read_exact(stream, 1)
+        consumed += 1
+        if first == b"\r":
+            break
+        desc = first + _read_exact(stream, 31)
+        consumed += 31
+        name = desc[:11].split(b"\x00", 1)[0].decode("latin-1").strip()
+        fields.append(DBFField(name, chr(desc[11]), desc[16], desc[17]))
+
+    # Skip the rest of the header (e.g. the Visual FoxPro backlink area)
+    if header_length > consumed:
+        _read_exact(stream, header_length - consumed)
+    return n_records, record_length, fields
+
+
+def arrow_schema(fields: List[DBFField]):
+    """Arrow schema matching the DBF field types."""
+    import pyarrow as pa
+
+    return pa.schema([(f.name, _arrow_type(f)) for f in fields])
+
+
+def read_dbf(
+    stream: BinaryIO, batch_size: int = 65_536, encoding: str = "latin-1"
+) -> Tuple[object, Iterator]:
+    """
+    Open the DBF table in *stream*.
+
+    Returns the Arrow schema and an iterator of :class:`pyarrow.RecordBatch`
+    objects with at most *batch_size* records each. Deleted records are
+    skipped. Numeric fields without decimals become ``int64``, other numeric
+    fields ``float64``, ``D`` fields ``date32`` and ``L`` fields ``bool``;
+    everything else is decoded as text.
+    """
+    n_records, record_length, fields = read_dbf_header(stream)
+    schema = arrow_schema(fields)
+    return schema, _iter_batches(
+        stream, n_records, record_length, fields, schema, batch_size, encoding
+    )
+
+
+def _iter_batches(
+    stream: BinaryIO,
+    n_records: int,
+    record_length: int,
+    fields: List[DBFField],
+    schema,
+    batch_size: int,
+    encoding: str,
+) -> Iterator:
+    import pyarrow as pa
+
+    offsets = []
+    pos = 1  # byte 0 is the deletion flag
+    for field in fields:
+        offsets.append((pos, pos + field.length))
+        pos += field.length
+
+    remaining = n_records
+    while remaining > 0:
+        count = min(batch_size, remaining)
+        raw = stream.read(count * record_length)
+        count = len(raw) // record_length
+        if count == 0:
+            break
+        remaining -= count
+
+        columns: List[list] = [[] for _ in fields]
+        for i in range(count):
+            record = raw[i * record_length : (i + 1) * record_length]
+            if record[:1] == b"*":
+                continue
+            for col, field, (start, end) in zip(columns, fields, offsets):
+                col.append(_parse(field, record[start:end], encoding))
+
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(col, type=schema.field(i).type) for i, col in enumerate(columns)],
+            schema=schema,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _read_exact(stream: BinaryIO, n: int) -> bytes:
+    data = stream.read(n)
+    if len(data) != n:
+        raise ValueError("Truncated DBF header")
+    return data
+
+
+def _is_integer(field: DBFField) -> bool:
+    return field.type == "N" and field.decimals == 0 and field.length < 19
+
+
+def _arrow_type(field: DBFField):
+    import pyarrow as pa
+
+    if _is_integer(field):
+        return pa.int64()
+    if field.type in ("N", "F"):
+        return pa.float64()
+    if field.type == "D":
+        return pa.date32()
+    if field.type == "L":
+        return pa.bool_()
+    return pa.string()
+
+
+def _parse(field: DBFField, raw: bytes, encoding: str):
+    kind = field.type
+    if kind in ("N", "F"):
+        text = raw.strip().replace(b",", b".")
+        if not text or text.startswith(b"*"):
+            return None
+        try:
+            return int(text) if _is_integer(field) else float(text)
+        except ValueError:
+            return None
+    if kind == "D":
+        text = raw.strip()
+        if len(text) != 8 or not text.isdigit() or text == b"00000000":
+            return None
+        try:
+            return dt.date(int(text[:4]), int(text[4:6]), int(text[6:]))
+        except ValueError:
+            return None
+    if kind == "L":
+        flag = raw[:1].upper()
+        if flag in (b"T", b"Y"):
+            return True
+        if flag in (b"F", b"N"):
+            return False
+        return None
+    return raw.decode(encoding, errors="replace").rstrip(" \x00")
@@ -1,9 +1,14 @@
 """
-File-system utilities: hashing, zip validation, filename sanitisation.
+File-system utilities: hashing, zip validation, filename sanitisation and
+zero-copy linking.
 """
 
+from __future__ import annotations
+
 import hashlib
+import os
 import re
+import shutil
 import unicodedata
 import zipfile
 from pathlib import Path
@@ -42,3 +47,63 @@ def is_zip_valid(path: str | Path) -> bool:
             return zf.testzip() is None
     except (zipfile.BadZipFile, FileNotFoundError, OSError):
         return False
+
+
+# ioctl request number of Linux FICLONE (_IOW(0x94, 9, int))
+_FICLONE = 0x40049409
+
+
+def reflink(src: str | Path, dst: str | Path) -> bool:
+    """
+    Clone *src* into *dst* as a copy-on-write reflink.
+
+    Only works on filesystems with block sharing (Btrfs, XFS, bcachefs,
+    ...) and when both paths live on the same one. Returns ``False``,
+    leaving no *dst* behind, when cloning is not possible.
+    """
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        return False
+    try:
+        with open(src, "rb") as fsrc, open(dst, "xb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            except OSError:
+                cloned = False
+            else:
+                cloned = True
+    except OSError:
+        return False
+    if not cloned:
+        Path(dst).unlink(missing_ok=True)
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def link_or_copy(src: str | Path, dst: str | Path) -> str:
+    """
+    Make *dst* hold the contents of *src* without copying bytes if possible.
+
+    Tries, in order, a reflink (independent copy-on-write file), a hard link
+    (same inode: editing one path edits the other) and finally
+    :func:`shutil.copy2`. An existing *dst* is replaced unless it already is
+    the same file as *src*.
+
+    Returns the method used: ``'reflink'``, ``'hardlink'``, ``'copy'`` or
+    ``'existing'``.
+    """
+    src, dst = Path(src), Path(dst)
+    if dst.exists():
+        if os.path.samefile(src, dst):
+            return "existing"
+        dst.unlink()
+    if reflink(src, dst):
+        return "reflink"
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:  # cross-device, FAT/exFAT, no permission, ...
+        shutil.copy2(src, dst)
+        return "copy"
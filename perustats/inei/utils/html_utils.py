@@ -7,7 +7,6 @@ from __future__ import annotations
 from typing import Optional
 
 import pandas as pd
-from bs4 import BeautifulSoup
 
 from ..surveys.registry import Survey
 
@@ -18,6 +17,8 @@ def html_to_dataframe(html: str) -> pd.DataFrame:
 
     Returns an empty DataFrame when the page contains no table or no data rows.
     """
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "html.parser")
     outer = soup.find("table")
     if outer is None:
@@ -93,6 +94,8 @@ def extract_period_value(html: str, survey: Survey) -> Optional[str]:
     survey (e.g. "Anual", "Único", "Panel").  We match against the aliases
     stored in ``survey.period_aliases``.
     """
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "html.parser")
     aliases = survey.period_aliases  # e.g. ["anual", "unico"]
 
@@ -1,12 +1,33 @@
 """
-HTTP helpers: URL encoding and curl-based form POST execution.
+HTTP helpers: URL encoding and form POSTs against the INEI portal.
+
+``fetch_html`` (one ``curl`` process per call) is kept for ad-hoc use. Bulk
+listing goes through pooled ``httpx`` clients instead: one keep-alive
+connection pool shared by every request, optionally driven by ``asyncio`` so
+many (survey, year) pairs are listed concurrently.
 """
 
 from __future__ import annotations
 
+import asyncio
 import subprocess
+import threading
+import time
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Coroutine, Optional
 from urllib.parse import quote
 
+from ..constants import USER_AGENT
+
+FORM_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Content-Type": "application/x-www-form-urlencoded",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "es,en;q=0.9",
+}
+
+DEFAULT_TIMEOUT = 60.0
+
 
 def url_encode_survey_name(name: str) -> str:
     """URL-encode *name* using ISO-8859-1 as required by the INEI portal."""
@@ -25,3 +46,138 @@ def fetch_html(url: str, data: str) -> str:
     cmd = ["curl", url, "--data-raw", data]
     result = subprocess.run(cmd, capture_output=True)
     return result.stdout.decode("utf-8", errors="ignore")
+
+
+# --------------------------------------------------------------------------- #
+# Pooled clients                                                               #
+# --------------------------------------------------------------------------- #
+
+
+def _stateless_cookies() -> CookieJar:
+    """
+    Cookie jar that rejects every cookie.
+
+    Listings for different years run concurrently on one client; keeping the
+    portal's ASP session cookie would let those requests share server-side
+    state, so each POST stays stateless (as the one-shot curl calls were).
+    """
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+def make_client(max_connections: int = 10, timeout: float = DEFAULT_TIMEOUT):
+    """Return a keep-alive ``httpx.Client`` configured for the INEI portal."""
+    import httpx
+
+    return httpx.Client(
+        headers=FORM_HEADERS,
+        cookies=_stateless_cookies(),
+        timeout=timeout,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+    )
+
+
+def make_async_client(max_connections: int = 10, timeout: float = DEFAULT_TIMEOUT):
+    """Return a keep-alive ``httpx.AsyncClient`` configured for the INEI portal."""
+    import httpx
+
+    return httpx.AsyncClient(
+        headers=FORM_HEADERS,
+        cookies=_stateless_cookies(),
+        timeout=timeout,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+    )
+
+
+def post_form(client, url: str, data: str) -> str:
+    """POST the pre-encoded form *data* with a pooled client; return the HTML."""
+    response = client.post(url, content=data)
+    response.raise_for_status()
+    return response.content.decode("utf-8", errors="ignore")
+
+
+async def apost_form(client, url: str, data: str) -> str:
+    """Async counterpart of :func:`post_form`."""
+    response = await client.post(url, content=data)
+    response.raise_for_status()
+    return response.content.decode("utf-8", errors="ignore")
+
+
+def run_coroutine(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Run *coro* to completion from synchronous code.
+
+    Inside an already running event loop (e.g. Jupyter) the coroutine is run
+    on a fresh loop in a worker thread instead of failing.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    box: dict = {}
+
+    def runner() -> None:
+        try:
+            box["result"] = asyncio.run(coro)
+        except BaseException as exc:
+            box["error"] = exc
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    thread.join()
+    if "error" in box:
+        raise box["error"]
+    return box["result"]
+
+
+# --------------------------------------------------------------------------- #
+# Bandwidth budget                                                             #
+# --------------------------------------------------------------------------- #
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every download stream.
+
+    Parameters
+    ----------
+    rate:
+        Bytes per second allowed on average.
+    capacity:
+        Largest burst in bytes (one second of *rate* by default).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: int) -> None:
+        """
+        Take *amount* bytes from the budget, sleeping until they are covered.
+
+        Tokens are reserved before sleeping, so concurrent callers are
+        served in arrival order and chunks larger than the capacity pass.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._stamp) * self.rate
+            )
+            self._stamp = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
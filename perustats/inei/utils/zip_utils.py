@@ -0,0 +1,266 @@
+"""
+ZIP utilities: read the central directory of a remote archive through HTTP
+``Range`` requests, without downloading the archive itself, and select the
+members worth extracting.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import io
+import re
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
+
+from ..constants import DOC_EXTENSIONS, RELEVANT_EXTENSIONS
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+_COMPRESSION_NAMES = {
+    zipfile.ZIP_STORED: "stored",
+    zipfile.ZIP_DEFLATED: "deflated",
+    zipfile.ZIP_BZIP2: "bzip2",
+    zipfile.ZIP_LZMA: "lzma",
+    9: "deflate64",
+}
+
+
+def member_kind(name: str) -> str:
+    """Classify a ZIP member as ``'data'``, ``'doc'`` or ``'other'``."""
+    ext = Path(name).suffix.lower()
+    if ext in RELEVANT_EXTENSIONS:
+        return "data"
+    if ext in DOC_EXTENSIONS:
+        return "doc"
+    return "other"
+
+
+@dataclass(frozen=True)
+class MemberFilter:
+    """
+    Selects ZIP members by extension, glob pattern, size and kind.
+
+    Every given criterion must hold for a member to be selected.
+
+    Parameters
+    ----------
+    extensions:
+        Lower-case suffixes to keep (``{".dta", ".pdf"}``).
+    patterns:
+        Glob patterns; a member is kept when its path or its file name
+        matches any of them (case-insensitive).
+    max_member_size:
+        Largest uncompressed size, in bytes, to keep.
+    only:
+        ``"data"`` keeps data files (``RELEVANT_EXTENSIONS``), ``"docs"``
+        documentation (``DOC_EXTENSIONS``).
+    """
+
+    extensions: Optional[frozenset] = None
+    patterns: Tuple[str, ...] = ()
+    max_member_size: Optional[int] = None
+    only: Optional[Literal["data", "docs"]] = None
+
+    @classmethod
+    def build(
+        cls,
+        extensions: Optional[Iterable[str]] = None,
+        patterns: Optional[Iterable[str]] = None,
+        max_member_size: Optional[int] = None,
+        only: Optional[Literal["data", "docs"]] = None,
+    ) -> Optional["MemberFilter"]:
+        """
+        Normalise user options into a filter; ``None`` when none is given.
+
+        Raises
+        ------
+        ValueError
+            When *only* is not ``"data"``, ``"docs"`` or ``None``.
+        """
+        if only not in (None, "data", "docs"):
+            raise ValueError(f"only must be 'data', 'docs' or None, got {only!r}")
+        if (
+            extensions is None
+            and not patterns
+            and max_member_size is None
+            and only is None
+        ):
+            return None
+        exts = None
+        if extensions is not None:
+            exts = frozenset(
+                e.lower() if e.startswith(".") else f".{e.lower()}" for e in extensions
+            )
+        return cls(
+            extensions=exts,
+            patterns=tuple(p.lower() for p in patterns or ()),
+            max_member_size=max_member_size,
+            only=only,
+        )
+
+    def accepts(self, info: zipfile.ZipInfo) -> bool:
+        """Whether the member described by *info* is selected."""
+        if info.is_dir():
+            return False
+        name = info.filename.lower()
+        if self.only == "data" and member_kind(name) != "data":
+            return False
+        if self.only == "docs" and member_kind(name) != "doc":
+            return False
+        if self.extensions is not None and Path(name).suffix not in self.extensions:
+            return False
+        if self.max_member_size is not None and info.file_size > self.max_member_size:
+            return False
+        if self.patterns:
+            base = name.rsplit("/", 1)[-1]
+            return any(
+                fnmatch.fnmatchcase(name, p) or fnmatch.fnmatchcase(base, p)
+                for p in self.patterns
+            )
+        return True
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """
+    Seekable, read-only file object over an HTTP resource.
+
+    Every read is served from a small block cache filled with ``Range``
+    requests. The first request fetches the last *block_size* bytes, which
+    for most archives already holds the whole ZIP central directory, so
+    :class:`zipfile.ZipFile` can list members in one or two round trips.
+
+    Parameters
+    ----------
+    url:
+        Absolute URL of the resource.
+    session:
+        Optional :class:`requests.Session` to reuse connections across files.
+    block_size:
+        Minimum number of bytes fetched per request.
+    timeout:
+        Per-request timeout in seconds.
+
+    Raises
+    ------
+    OSError
+        When the server does not answer range requests with ``206``.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        session=None,
+        block_size: int = 64 << 10,
+        timeout: float = 60.0,
+    ) -> None:
+        import requests
+
+        super().__init__()
+        self.url = url
+        self.block_size = block_size
+        self.timeout = timeout
+        self._own_session = session is None
+        self._session = session or requests.Session()
+        self._blocks: List[Tuple[int, bytes]] = []
+        self._pos = 0
+        self.requests_made = 0
+        self.size = self._fetch_tail()
+
+    # ------------------------------------------------------------------ #
+    # HTTP                                                                 #
+    # ------------------------------------------------------------------ #
+
+    def _get(self, range_header: str) -> Tuple[int, int, bytes]:
+        resp = self._session.get(
+            self.url, headers={"Range": range_header}, timeout=self.timeout
+        )
+        self.requests_made += 1
+        match = _CONTENT_RANGE.match(resp.headers.get("Content-Range", ""))
+        if resp.status_code != 206 or not match:
+            raise OSError(
+                f"{self.url} does not support range requests (HTTP {resp.status_code})"
+            )
+        return int(match.group(1)), int(match.group(3)), resp.content
+
+    def _fetch_tail(self) -> int:
+        start, total, data = self._get(f"bytes=-{self.block_size}")
+        self._blocks.append((start, data))
+        return total
+
+    def _read_range(self, start: int, end: int) -> bytes:
+        """Return bytes ``[start, end)``, fetching them when not cached."""
+        for block_start, data in self._blocks:
+            if block_start <= start and end <= block_start + len(data):
+                return data[start - block_start : end - block_start]
+        stop = min(max(end, start + self.block_size), self.size)
+        block_start, _, data = self._get(f"bytes={start}-{stop - 1}")
+        self._blocks.append((block_start, data))
+        return data[start - block_start : end - block_start]
+
+    # ------------------------------------------------------------------ #
+    # io.RawIOBase interface                                               #
+    # ------------------------------------------------------------------ #
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.size + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if self._pos < 0:
+            raise OSError("negative seek position")
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        end = min(self._pos + len(buffer), self.size)
+        if end <= self._pos:
+            return 0
+        data = self._read_range(self._pos, end)
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        if self._own_session and not self.closed:
+            self._session.close()
+        self._blocks = []
+        super().close()
+
+
+def list_remote_members(url: str, session=None) -> List[Dict]:
+    """
+    List the members of the remote ZIP at *url* from its central directory.
+
+    Returns one dict per file with ``member``, ``kind``, ``file_size``,
+    ``compress_size``, ``compress_type`` and ``crc`` keys.
+    """
+    with HTTPRangeFile(url, session=session) as fh:
+        with zipfile.ZipFile(fh) as zf:
+            return [_member_record(info) for info in zf.infolist() if not info.is_dir()]
+
+
+def _member_record(info: zipfile.ZipInfo) -> Dict:
+    return {
+        "member": info.filename,
+        "kind": member_kind(info.filename),
+        "file_size": info.file_size,
+        "compress_size": info.compress_size,
+        "compress_type": _COMPRESSION_NAMES.get(
+            info.compress_type, str(info.compress_type)
+        ),
+        "crc": info.CRC,
+    }
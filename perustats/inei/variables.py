@@ -0,0 +1,332 @@
+"""
+VariableIndexer: builds a cross-year dictionary of the variables in every
+data file of a survey, from file headers and metadata only.
+
+Responsibilities
+----------------
+* Read the name, label, type and value-label set of every variable, plus
+  the row count, of each ``.dta``, ``.sav``, ``.csv`` and ``.dbf`` member,
+  straight from the ZIP (or the extracted folder when the ZIP was removed).
+  No data rows are loaded: ``.dta`` / ``.sav`` use ``pyreadstat``'s
+  ``metadataonly`` mode, ``.dbf`` its field descriptors, ``.csv`` its header
+  and a 1 MiB type-inference sample. CSV files record no row count, so
+  theirs is left empty.
+* Store the result in the ``inei_variables`` and ``inei_value_labels``
+  tables, where :meth:`~perustats.inei.fetcher.INEIFetcher.find_variable`
+  and :meth:`~perustats.inei.fetcher.INEIFetcher.search_variables` query it.
+"""
+
+from __future__ import annotations
+
+import io
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pandas as pd
+from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    Progress,
+    SpinnerColumn,
+    TaskProgressColumn,
+    TextColumn,
+    TimeElapsedColumn,
+)
+
+from .converter import (
+    _CSV_SAMPLE,
+    Opener,
+    _code_text,
+    _data_members,
+    _local_path,
+    _sample_lines,
+    _sniff_delimiter,
+    _sniff_encoding,
+    _zero_padded_columns,
+)
+from .utils.db_utils import DatabaseManager
+from .utils.dbf_utils import arrow_schema, read_dbf_header
+
+console = Console()
+
+
+def normalize_text(text) -> str:
+    """Lower-case *text* without accents or repeated spaces (search key)."""
+    if text is None or (isinstance(text, float) and text != text):
+        return ""
+    text = unicodedata.normalize("NFD", str(text))
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class VariableIndexer:
+    """
+    Indexes the variables of a list of module rows.
+
+    Parameters
+    ----------
+    db:
+        A :class:`~perustats.inei.utils.db_utils.DatabaseManager` where the
+        index is stored.
+    survey:
+        Survey code the rows belong to.
+    workers:
+        Number of modules indexed concurrently.
+    """
+
+    def __init__(self, db: DatabaseManager, survey: str, workers: int = 2) -> None:
+        self.db = db
+        self.survey = survey
+        self.workers = workers
+
+    # ------------------------------------------------------------------ #
+    # Public API                                                           #
+    # ------------------------------------------------------------------ #
+
+    def index(self, rows: List[Dict], force: bool = False) -> pd.DataFrame:
+        """
+        Index every data file of *rows*.
+
+        Modules already in the index are skipped unless *force* is set.
+        Returns the variables of the modules in *rows*.
+        """
+        done = self.db.get_indexed_modules(self.survey)
+        todo = [
+            row
+            for row in rows
+            if force or (int(row["year_ref"]), row["module_code"]) not in done
+        ]
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task(
+                f"[cyan]Indexing variables of {len(todo)} modules...", total=len(todo)
+            )
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(self._process_row, row): row for row in todo}
+                for future in as_completed(futures):
+                    row = futures[future]
+                    try:
+                        future.result()
+                    except Exception as exc:
+                        console.print(f"[red]Error indexing {row.get('url')}: {exc}")
+                    finally:
+                        progress.update(task, advance=1)
+
+        variables = self.db.get_variables(self.survey)
+        keys = {(int(row["year_ref"]), row["module_code"]) for row in rows}
+        mask = [
+            (year, code) in keys
+            for year, code in zip(variables["year"], variables["module_code"])
+        ]
+        return variables[mask].reset_index(drop=True)
+
+    # ------------------------------------------------------------------ #
+    # Internal per-row pipeline                                            #
+    # ------------------------------------------------------------------ #
+
+    def _process_row(self, row: Dict) -> None:
+        year = int(row["year_ref"])
+        module_code = row["module_code"]
+        indexed_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+        variables: List[Dict] = []
+        value_labels: List[Dict] = []
+        for member, opener in _data_members(row):
+            try:
+                file_vars, file_labels = _read_header(member, opener)
+            except Exception as exc:
+                console.print(f"[red]Could not index {member}: {exc}")
+                continue
+            base = {
+                "survey": self.survey,
+                "year": year,
+                "module_code": module_code,
+                "file": member,
+            }
+            for var in file_vars:
+                var.update(base, indexed_at=indexed_at)
+                var["search_text"] = normalize_text(
+                    f"{var['variable']} {var.get('label') or ''}"
+                )
+                variables.append(var)
+            for label in file_labels:
+                label.update(base)
+                value_labels.append(label)
+
+        self.db.replace_variable_index(
+            self.survey, year, module_code, variables, value_labels
+        )
+
+
+# ---------------------------------------------------------------------- #
+# Header readers                                                           #
+# ---------------------------------------------------------------------- #
+
+
+def _read_header(member: str, opener: Opener) -> Tuple[List[Dict], List[Dict]]:
+    """Variables and value labels of one data file, without its rows."""
+    ext = Path(member).suffix.lower()
+    if ext == ".csv":
+        return _csv_header(opener), []
+    if ext == ".dbf":
+        return _dbf_header(opener), []
+    return _labelled_header(opener, ext)
+
+
+def _variable(
+    position: int,
+    name: str,
+    label=None,
+    type_=None,
+    fmt=None,
+    label_set=None,
+    n_rows=None,
+) -> Dict:
+    return {
+        "variable": str(name),
+        "position": position,
+        "label": label or None,
+        "type": type_,
+        "format": fmt,
+        "label_set": label_set,
+        "n_rows": n_rows,
+    }
+
+
+def _labelled_header(opener: Opener, ext: str) -> Tuple[List[Dict], List[Dict]]:
+    try:
+        import pyreadstat
+    except ImportError:
+        if ext == ".sav":
+            raise ImportError(
+                "Indexing .sav files requires pyreadstat (pip install pyreadstat)."
+            ) from None
+        return _stata_header_pandas(opener)
+
+    read = pyreadstat.read_dta if ext == ".dta" else pyreadstat.read_sav
+    with _local_path(opener, None, ext) as path:
+        _, meta = read(str(path), metadataonly=True)
+
+    labels = dict(zip(meta.column_names, meta.column_labels or []))
+    variables = [
+        _variable(
+            i,
+            name,
+            labels.get(name),
+            meta.readstat_variable_types.get(name),
+            meta.original_variable_types.get(name),
+            meta.variable_to_label.get(name),
+            meta.number_rows,
+        )
+        for i, name in enumerate(meta.column_names)
+    ]
+    used = set(meta.variable_to_label.values())
+    return variables, _label_rows(
+        {k: v for k, v in meta.value_labels.items() if k in used}
+    )
+
+
+def _stata_header_pandas(opener: Opener) -> Tuple[List[Dict], List[Dict]]:
+    """Fallback without pyreadstat: pandas' ``StataReader`` on the stream."""
+    import pandas as pd
+
+    with opener() as fh:
+        with pd.read_stata(fh, iterator=True, convert_categoricals=False) as reader:
+            var_labels = reader.variable_labels()
+            sets = reader.value_labels()
+            # Not public API, so each is optional
+            names = getattr(reader, "_varlist", None) or list(var_labels)
+            lbllist = getattr(reader, "_lbllist", None) or [None] * len(names)
+            fmtlist = getattr(reader, "_fmtlist", None) or [None] * len(names)
+            dtypes = getattr(reader, "_dtyplist", None) or [None] * len(names)
+            nobs = getattr(reader, "_nobs", None)
+
+    variables = [
+        _variable(
+            i,
+            name,
+            var_labels.get(name),
+            _stata_type(dtype),
+            fmt,
+            lbl if lbl in sets else None,
+            nobs,
+        )
+        for i, (name, lbl, fmt, dtype) in enumerate(
+            zip(names, lbllist, fmtlist, dtypes)
+        )
+    ]
+    used = {v["label_set"] for v in variables if v["label_set"]}
+    return variables, _label_rows({k: v for k, v in sets.items() if k in used})
+
+
+def _stata_type(dtype):
+    """pandas' dtype entry: a numpy dtype, or the width of a string variable."""
+    if dtype is None:
+        return None
+    if isinstance(dtype, int):
+        return "string"
+    return str(getattr(dtype, "name", dtype))
+
+
+def _dbf_header(opener: Opener) -> List[Dict]:
+    with opener() as fh:
+        n_records, _, fields = read_dbf_header(fh)
+    schema = arrow_schema(fields)
+    return [
+        _variable(
+            i,
+            f.name,
+            None,
+            str(schema.field(i).type),
+            f"{f.type}{f.length}",
+            None,
+            n_records,
+        )
+        for i, f in enumerate(fields)
+    ]
+
+
+def _csv_header(opener: Opener) -> List[Dict]:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+
+    # Only the sample is read: CSV headers carry no row count, and counting
+    # lines would mean reading the whole file (and miscount quoted newlines)
+    with opener() as fh:
+        sample = fh.read(_CSV_SAMPLE)
+
+    encoding = _sniff_encoding(sample)
+    delimiter = _sniff_delimiter(sample, encoding)
+    codes = _zero_padded_columns(sample, encoding, delimiter)
+    lines = _sample_lines(sample, encoding)
+    table = pv.read_csv(
+        io.BytesIO("\n".join(lines).encode("utf-8")),
+        parse_options=pv.ParseOptions(delimiter=delimiter),
+        convert_options=pv.ConvertOptions(
+            column_types={name: pa.string() for name in codes},
+            strings_can_be_null=True,
+        ),
+    )
+    return [
+        _variable(i, field.name, type_=str(field.type))
+        for i, field in enumerate(table.schema)
+    ]
+
+
+def _label_rows(value_labels: Dict[str, Dict]) -> List[Dict]:
+    return [
+        {"label_set": name, "value": _code_text(value), "label": str(label)}
+        for name, labels in value_labels.items()
+        for value, label in labels.items()
+    ]